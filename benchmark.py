@@ -0,0 +1,185 @@
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import time
+from typing import Optional
+
+from event_log import LOG_OFF
+from simulation import Simulator
+from workload import Workload
+from workload_io import read_workload
+
+try:
+    import resource
+except ImportError:
+    # not available on windows, peak rss is reported as None
+    resource = None
+
+# benchmark cases: the workload files shipped with the repo and seeded synthetic workloads of every size
+# at a few io/cpu ratios. Every case runs in a fresh process so its peak rss isn't hidden by an earlier one:
+#   python -m benchmark --output before.json
+#   python -m benchmark --output after.json --compare before.json
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CANNED = ["processes.txt", "saved_processes.txt"]
+SIZES = {"1k": 1000, "10k": 10000, "100k": 100000}
+# mean io burst / mean cpu burst
+IO_CPU_RATIOS = {"cpu-bound": 0.25, "balanced": 1.0, "io-bound": 4.0}
+CPU_MEAN = 20
+CPU_BURSTS = (1, 5)
+# fraction of the cpu the synthetic arrivals ask for. The arrival rate is the same for every size so a bigger
+# case is a proportionally longer run of the same load, not a more overloaded one
+LOAD = 0.9
+ARRIVAL_RATE = LOAD / (CPU_MEAN * sum(CPU_BURSTS) / 2)
+SEED = 1
+
+
+def case_names() -> list[str]:
+    return CANNED + [f"synthetic-{size}-{ratio}" for size in SIZES for ratio in IO_CPU_RATIOS]
+
+
+def load_case(name: str) -> Workload:
+    if name in CANNED:
+        return read_workload(os.path.join(ROOT, name))
+    # the generator imports numpy
+    from generator import Exponential, PoissonArrivals, Uniform, generate
+    _, size, ratio = name.split("-", 2)
+    return generate(SIZES[size], SEED, arrivals=PoissonArrivals(ARRIVAL_RATE),
+                    cpu_bursts_per_process=Uniform(*CPU_BURSTS), cpu=Exponential(CPU_MEAN),
+                    io=Exponential(CPU_MEAN * IO_CPU_RATIOS[ratio]))
+
+
+def peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def simulate(workload: Workload, q1: int, q2: int, alpha: float, event_driven: bool) -> Simulator:
+    simulator = Simulator(workload, q1, q2, alpha, event_driven=event_driven, log_level=LOG_OFF, record_history=False)
+    # every case runs until all of its processes terminated, MAX_CPU_TIME would cut the big ones short
+    simulator.max_time = sys.maxsize
+    simulator.run()
+    if simulator.terminated_count != len(workload):
+        raise RuntimeError(f"only {simulator.terminated_count} of {len(workload)} processes terminated")
+    return simulator
+
+
+def run_case(name: str, q1: int, q2: int, alpha: float, event_driven: bool, trace: bool) -> dict:
+    workload = load_case(name)
+    start = time.perf_counter()
+    simulator = simulate(workload, q1, q2, alpha, event_driven)
+    wall_time = time.perf_counter() - start
+    result = {
+        "name": name,
+        "processes": len(workload),
+        "bursts": len(workload.bursts),
+        "event_driven": event_driven,
+        "wall_time": wall_time,
+        "simulated_time": simulator.current_time,
+        "time_units_per_second": simulator.current_time / wall_time if wall_time else None,
+        "terminated": simulator.terminated_count,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+    if trace:
+        # a second run under tracemalloc, it is several times slower so it isn't timed
+        import tracemalloc
+        tracemalloc.start()
+        simulator = simulate(workload, q1, q2, alpha, event_driven)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_traced_bytes"] = peak
+        result["traced_bytes_per_time_unit"] = peak / max(1, simulator.current_time)
+    return result
+
+
+def git_revision() -> Optional[str]:
+    import subprocess
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names: list[str], q1: int, q2: int, alpha: float, event_driven: bool, trace: bool,
+                   isolate: bool = True) -> dict:
+    # imported here so importing this module for its command line arguments stays cheap
+    import platform
+    from generator import numpy
+    results = []
+    if isolate:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        context = multiprocessing.get_context("spawn")
+        for name in names:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results.append(executor.submit(run_case, name, q1, q2, alpha, event_driven, trace).result())
+    else:
+        results = [run_case(name, q1, q2, alpha, event_driven, trace) for name in names]
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "generator": "numpy" if numpy is not None else "random",
+        "q1": q1,
+        "q2": q2,
+        "alpha": alpha,
+        "results": results,
+    }
+
+
+def compare(before: dict, after: dict, file=sys.stdout):
+    # wall time and peak rss of the cases found in both runs, a ratio below 1 is an improvement
+    previous = {result["name"]: result for result in before["results"]}
+    file.write(f"{'case':<32}{'wall before':>14}{'wall after':>14}{'ratio':>8}{'rss ratio':>11}\n")
+    for result in after["results"]:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        ratio = result["wall_time"] / old["wall_time"] if old["wall_time"] else float("nan")
+        rss_ratio = result["peak_rss_kb"] / old["peak_rss_kb"] if old.get("peak_rss_kb") and result.get("peak_rss_kb") \
+            else float("nan")
+        file.write(f"{result['name']:<32}{old['wall_time']:>14.4f}{result['wall_time']:>14.4f}{ratio:>8.2f}{rss_ratio:>11.2f}\n")
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--cases", nargs="+", default=["*"], help="case names or glob patterns")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    parser.add_argument("--q1", type=int, default=4)
+    parser.add_argument("--q2", type=int, default=8)
+    parser.add_argument("--alpha", type=float, default=0.5)
+    parser.add_argument("--tick", action="store_true", help="advance one time unit at a time")
+    parser.add_argument("--no-trace", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--no-isolate", action="store_true", help="run every case in this process")
+    parser.add_argument("--output", help="json file, results are printed when not given")
+    parser.add_argument("--compare", help="json file of an earlier run to compare with")
+
+
+def main(args: argparse.Namespace):
+    names = [name for name in case_names() if any(fnmatch.fnmatch(name, pattern) for pattern in args.cases)]
+    if args.list:
+        print("\n".join(names))
+        return
+    report = run_benchmarks(names, args.q1, args.q2, args.alpha, not args.tick, not args.no_trace,
+                            not args.no_isolate)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the simulator on canned and synthetic workloads")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,149 @@
+import os
+import pickle
+import zlib
+from array import array
+from bisect import bisect_right
+from collections import deque
+from typing import Optional
+
+from event_log import EventLog, LogEvent
+from simulation import GanttChart, Simulator
+from workload import Workload
+
+# checkpoints of the whole state of a Simulator (or MultiCoreSimulator): clock, queues, IO queue, per process
+# counters, gantt chart, logs and queue history, as zlib compressed pickles. A checkpoint restores into a fresh
+# process, so a long run can be resumed after a crash or one warm state forked into several continuations:
+#   data = checkpoint(simulator)
+#   fork = restore(data)
+#   fork.q2 = 16
+#   fork.run()
+# Instrumentation stats are not saved, a restored simulator runs without them.
+
+CHECKPOINT_VERSION = 2
+# read from the workload, not saved
+WORKLOAD_ATTRIBUTES = ("workload", "processes", "pids", "arrival_times")
+# per run flags and instance wrappers set by Instrumentation
+SKIPPED_ATTRIBUTES = ("stats", "cancelled", "stop_time")
+ALGOS = ("RR1", "RR2", "SRTF", "FCFS")
+
+
+class CheckpointError(ValueError):
+    pass
+
+
+def gantt_columns(gantt_chart: list[GanttChart]) -> tuple[array, ...]:
+    return (array("i", (segment.pid for segment in gantt_chart)),
+            array("q", (segment.start_time for segment in gantt_chart)),
+            array("q", (segment.end_time for segment in gantt_chart)),
+            array("b", (ALGOS.index(segment.algo) for segment in gantt_chart)),
+            array("i", (segment.core for segment in gantt_chart)))
+
+
+def gantt_chart_from_columns(pids: array, starts: array, ends: array, algos: array, cores: array) -> list[GanttChart]:
+    return [GanttChart(pid, start, end, ALGOS[algo], core)
+            for pid, start, end, algo, core in zip(pids, starts, ends, algos, cores)]
+
+
+def simulator_state(simulator: Simulator) -> dict:
+    state = {}
+    for name, value in simulator.__dict__.items():
+        if name in WORKLOAD_ATTRIBUTES or name in SKIPPED_ATTRIBUTES or callable(value):
+            continue
+        if name == "gantt_chart":
+            value = gantt_columns(value)
+        elif name == "logs":
+            value = (value.level, value.events.maxlen, [tuple(event) for event in value.events])
+        state[name] = value
+    return state
+
+
+def checkpoint(simulator: Simulator, include_workload: bool = True) -> bytes:
+    # without the workload the checkpoint is much smaller, restore() then needs the same workload again.
+    # Queues are pickled together so processes returning from IO keep pointing at the right queue
+    data = {
+        "version": CHECKPOINT_VERSION,
+        "class": type(simulator),
+        "processes": len(simulator.workload),
+        "workload": simulator.workload if include_workload else None,
+        "state": simulator_state(simulator),
+    }
+    return zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+def restore(data: bytes, workload: Workload = None) -> Simulator:
+    try:
+        data = pickle.loads(zlib.decompress(data))
+    except (zlib.error, pickle.UnpicklingError, EOFError) as e:
+        raise CheckpointError(f"invalid checkpoint: {e}") from None
+    if data.get("version") != CHECKPOINT_VERSION:
+        raise CheckpointError(f"unsupported checkpoint version {data.get('version')}")
+    workload = data["workload"] if workload is None else workload
+    if workload is None:
+        raise CheckpointError("the checkpoint has no workload, pass the one it was made with")
+    if len(workload) != data["processes"]:
+        raise CheckpointError(f"the checkpoint has {data['processes']} processes, the workload {len(workload)}")
+    simulator = data["class"].__new__(data["class"])
+    state = data["state"]
+    level, max_events, events = state.pop("logs")
+    logs = EventLog(level)
+    logs.events = deque(map(LogEvent._make, events), maxlen=max_events)
+    simulator.__dict__.update(state)
+    simulator.gantt_chart = gantt_chart_from_columns(*state["gantt_chart"])
+    simulator.logs = logs
+    simulator.workload = simulator.processes = workload
+    simulator.pids = workload.pids
+    simulator.arrival_times = workload.arrival_times
+    simulator.stats = None
+    simulator.cancelled = False
+    simulator.stop_time = None
+    return simulator
+
+
+def fork(simulator: Simulator) -> Simulator:
+    # an independent copy that shares the read only workload
+    return restore(checkpoint(simulator, include_workload=False), simulator.workload)
+
+
+def save_checkpoint(simulator: Simulator, file_name: str, include_workload: bool = True):
+    # written to a temporary file first so a crash while saving keeps the previous checkpoint
+    temporary_name = file_name + ".tmp"
+    with open(temporary_name, "wb") as f:
+        f.write(checkpoint(simulator, include_workload))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary_name, file_name)
+
+
+def load_checkpoint(file_name: str, workload: Workload = None) -> Simulator:
+    with open(file_name, "rb") as f:
+        return restore(f.read(), workload)
+
+
+class CheckpointSeries:
+    # checkpoints taken every interval time units during a run without the workload, to go back to any
+    # time by restoring the closest earlier checkpoint and running forward from it
+    def __init__(self, interval: int):
+        self.interval = interval
+        self.times: list[int] = []
+        self.checkpoints: list[bytes] = []
+
+    def __len__(self):
+        return len(self.times)
+
+    def run(self, simulator: Simulator):
+        self.add(simulator)
+        while not simulator.run_until(self.times[-1] + self.interval) and not simulator.cancelled:
+            self.add(simulator)
+
+    def add(self, simulator: Simulator):
+        self.times.append(simulator.current_time)
+        self.checkpoints.append(checkpoint(simulator, include_workload=False))
+
+    def at(self, time: int, workload: Workload) -> Optional[Simulator]:
+        # the simulator at the first step boundary at or after time, None before the first checkpoint
+        index = bisect_right(self.times, time) - 1
+        if index < 0:
+            return None
+        simulator = restore(self.checkpoints[index], workload)
+        simulator.run_until(time)
+        return simulator
@@ -0,0 +1,336 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+import benchmark
+import sweep
+from event_log import LOG_ALL, LOG_ECHO, LOG_EVENTS, LOG_OFF
+from prediction import ORDER_REMAINING, QUEUE3_ORDERS
+from simulation import Simulator
+from workload_io import BINARY_SUFFIX, WorkloadFormatError, convert_workload, is_binary_workload, \
+    iter_text_workload, read_binary_workload, read_workload, write_workload
+
+# headless entry point, it doesn't import PySide6. The modules of the subcommands (numpy through the generator)
+# are imported by their handlers so a command only pays for what it uses:
+#   python -m cpusched run trace.txt --q1 4 --q2 8 --alpha 0.5 --format json
+#   python -m cpusched run trace.txt --q1 4 --q2 8 --cache
+#   python -m cpusched run trace.txt --q1 4 --q2 8 --cores 4 --per-core-queues --balance-interval 50
+#   python -m cpusched stream week.txt --q1 4 --q2 8 --horizon 604800 --events events.jsonl
+#   python -m cpusched sweep trace.txt --q1 2 4 8 --q2 4 8
+#   python -m cpusched convert trace.txt trace.wkl
+#   python -m cpusched generate stress.wkl --processes 100000 --seed 7 --cpu pareto:1.5:5
+
+PROCESS_COLUMNS = ["pid", "arrival_time", "start_time", "complete_time", "waiting_time", "turnaround_time"]
+
+
+def metrics(simulator: Simulator) -> dict:
+    from multicore import MultiCoreSimulator
+    turnaround_time = simulator.metrics.overall().histograms["turnaround_time"]
+    result = {
+        "processes": len(simulator.workload),
+        "cpu_utilization": simulator.cpu_utilization(),
+        "avg_waiting_time": simulator.avg_waiting_time(),
+        "avg_turnaround_time": simulator.avg_turnaround_time(),
+        "makespan": simulator.current_time,
+        "p95_turnaround_time": round(turnaround_time.percentile(95), 3),
+        "p99_turnaround_time": round(turnaround_time.percentile(99), 3),
+        "throughput": round(simulator.metrics.throughput(simulator.current_time), 6),
+        "context_switches": simulator.metrics.context_switches,
+        "prediction_mean_absolute_error": round(simulator.predictor.stats.mean_absolute_error(), 3),
+    }
+    if isinstance(simulator, MultiCoreSimulator):
+        result.update(cores=len(simulator.cores), migrations=simulator.migrations, steals=simulator.steals,
+                      balance_moves=simulator.balance_moves)
+    return result
+
+
+def process_results(simulator: Simulator) -> list[dict]:
+    return [{
+        "pid": simulator.pids[i],
+        "arrival_time": simulator.arrival_times[i],
+        "start_time": simulator.start_time[i],
+        "complete_time": simulator.complete_time[i],
+        "waiting_time": simulator.waiting_time(i),
+        "turnaround_time": simulator.turnaround_time(i),
+    } for i in sorted(range(len(simulator.workload)), key=simulator.pids.__getitem__)]
+
+
+def run_profiled(simulator: Simulator, profiler: str = None, output: str = None):
+    # profiles are written to output, or printed to stderr. The profilers are imported only when used
+    if profiler == "cprofile":
+        import cProfile
+        import pstats
+        profile = cProfile.Profile()
+        profile.runcall(simulator.run)
+        if output:
+            profile.dump_stats(output)
+        else:
+            pstats.Stats(profile, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+    elif profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise SystemExit("pyinstrument is not installed") from None
+        profile = Profiler()
+        profile.start()
+        simulator.run()
+        profile.stop()
+        if output:
+            with open(output, "w") as f:
+                f.write(profile.output_html())
+        else:
+            sys.stderr.write(profile.output_text())
+    else:
+        simulator.run()
+
+
+def run_checkpointed(simulator: Simulator, file_name: str, interval: int):
+    # the checkpoint is rewritten every interval time units, without the workload which is read again on resume
+    from checkpoint import save_checkpoint
+    while not simulator.run_until(simulator.current_time + interval):
+        save_checkpoint(simulator, file_name, include_workload=False)
+    save_checkpoint(simulator, file_name, include_workload=False)
+
+
+def run(args: argparse.Namespace):
+    from multicore import MultiCoreSimulator
+    workload = read_workload(args.workload)
+    log_level = LOG_ECHO if args.log else LOG_OFF
+    if args.cache is not None:
+        from result_cache import DEFAULT_MAX_BYTES, ResultCache, default_cache_directory
+        max_bytes = DEFAULT_MAX_BYTES if args.cache_size is None else args.cache_size * 1024 * 1024
+        cache = ResultCache(args.cache or default_cache_directory(), max_bytes)
+        simulator = cache.run(workload, args.q1, args.q2, args.alpha, event_driven=not args.tick, log_level=LOG_OFF,
+                              queue3_order=args.queue3_order)
+    elif args.resume:
+        from checkpoint import load_checkpoint
+        simulator = load_checkpoint(args.checkpoint, workload)
+        simulator.logs.level = log_level
+    elif args.cores > 1 or args.per_core_queues:
+        simulator = MultiCoreSimulator(workload, args.q1, args.q2, args.alpha, cores=args.cores,
+                                       global_queue=not args.per_core_queues, balance_interval=args.balance_interval,
+                                       work_stealing=not args.no_steal, event_driven=not args.tick,
+                                       log_level=log_level, queue3_order=args.queue3_order, record_history=False)
+    else:
+        simulator = Simulator(workload, args.q1, args.q2, args.alpha, event_driven=not args.tick, log_level=log_level,
+                              instrument=args.stats, queue3_order=args.queue3_order, record_history=False)
+    if args.checkpoint:
+        run_checkpointed(simulator, args.checkpoint, args.checkpoint_interval)
+    elif args.cache is None:
+        # results from the cache are finished
+        run_profiled(simulator, args.profile, args.profile_output)
+    result = metrics(simulator)
+    if args.stats and args.output_format == "csv":
+        sys.stderr.write(simulator.stats.report() + "\n")
+    if args.output_format == "json":
+        if args.processes:
+            result["process_results"] = process_results(simulator)
+        if args.stats:
+            result["stats"] = simulator.stats.as_dict()
+        result["latency"] = simulator.metrics.as_dict(simulator.current_time)
+        result["prediction"] = simulator.predictor.stats.as_dict()
+        if isinstance(simulator, MultiCoreSimulator):
+            result["core_utilization"] = simulator.core_utilization()
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    elif args.processes:
+        writer = csv.DictWriter(sys.stdout, fieldnames=PROCESS_COLUMNS)
+        writer.writeheader()
+        writer.writerows(process_results(simulator))
+    else:
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(result))
+        writer.writeheader()
+        writer.writerow(result)
+
+
+def stream(args: argparse.Namespace):
+    # text files are read one line at a time and binary ones through the memory map, in file order
+    from online import JsonLinesSink, OnlineSimulator, Sink
+    if is_binary_workload(args.workload):
+        arrivals = iter(read_binary_workload(args.workload))
+    else:
+        arrivals = iter_text_workload(args.workload)
+    sink = JsonLinesSink(args.events) if args.events else Sink()
+    simulator = OnlineSimulator(arrivals, args.q1, args.q2, args.alpha, event_driven=not args.tick,
+                                horizon=args.horizon, sink=sink, log_level=args.log_level,
+                                queue3_order=args.queue3_order)
+    try:
+        simulator.run()
+    finally:
+        sink.close()
+    result = {
+        "processes": simulator.arrived_count,
+        "terminated": simulator.metrics.terminated,
+        "cpu_utilization": simulator.cpu_utilization(),
+        "avg_waiting_time": simulator.avg_waiting_time(),
+        "avg_turnaround_time": simulator.avg_turnaround_time(),
+        "makespan": simulator.current_time,
+        "latency": simulator.metrics.as_dict(simulator.current_time),
+        "prediction": simulator.predictor.stats.as_dict(),
+    }
+    json.dump(result, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+def generate_command(args: argparse.Namespace):
+    from generator import generate, parse_arrivals, parse_distribution
+    workload = generate(args.processes, args.seed, arrivals=parse_arrivals(args.arrivals),
+                        cpu_bursts_per_process=parse_distribution(args.bursts),
+                        cpu=parse_distribution(args.cpu), io=parse_distribution(args.io))
+    write_workload(workload, args.destination)
+
+
+def convert(args: argparse.Namespace):
+    convert_workload(args.source, args.destination)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cpusched", description="MLFQ cpu scheduling simulator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="simulate a workload file and print its metrics")
+    run_parser.add_argument("workload", help="workload file")
+    run_parser.add_argument("--q1", type=int, required=True, help="quantum of round robin 1")
+    run_parser.add_argument("--q2", type=int, required=True, help="quantum of round robin 2")
+    run_parser.add_argument("--alpha", type=float, default=0.5)
+    run_parser.add_argument("--format", choices=["json", "csv"], default="json", dest="output_format")
+    run_parser.add_argument("--processes", action="store_true", help="include the results of every process")
+    run_parser.add_argument("--tick", action="store_true", help="advance one time unit at a time")
+    run_parser.add_argument("--log", action="store_true", help="print the simulation log")
+    run_parser.add_argument("--queue3-order", choices=QUEUE3_ORDERS, default=ORDER_REMAINING,
+                            help="sort queue3 by remaining cpu time, predicted time left in the burst or predicted burst")
+    run_parser.add_argument("--cores", type=int, default=1, help="number of cpus")
+    run_parser.add_argument("--per-core-queues", action="store_true",
+                            help="give every core its own queues instead of sharing one set")
+    run_parser.add_argument("--balance-interval", type=int, default=0,
+                            help="balance the per core queues every this many time units, 0 never")
+    run_parser.add_argument("--no-steal", action="store_true", help="idle cores don't steal from other cores")
+    run_parser.add_argument("--stats", action="store_true",
+                            help="collect phase timings, queue depths and context switches")
+    run_parser.add_argument("--checkpoint", help="checkpoint file rewritten while the simulation runs")
+    run_parser.add_argument("--checkpoint-interval", type=int, default=1000, help="simulated time between checkpoints")
+    run_parser.add_argument("--resume", action="store_true", help="continue from the --checkpoint file")
+    run_parser.add_argument("--cache", nargs="?", const="", metavar="DIRECTORY",
+                            help="reuse the results of an earlier run with the same workload and parameters, "
+                                 "stored in $XDG_CACHE_HOME/cpusched (~/.cache/cpusched) without a directory")
+    run_parser.add_argument("--cache-size", type=int,
+                            help="megabytes of results kept in the cache directory, 256 when not given")
+    run_parser.add_argument("--profile", choices=["cprofile", "pyinstrument"], help="run under a profiler")
+    run_parser.add_argument("--profile-output", help="cProfile stats or pyinstrument html file, stderr by default")
+    run_parser.set_defaults(handler=run)
+
+    stream_parser = commands.add_parser("stream", help="simulate a workload file read lazily in arrival order")
+    stream_parser.add_argument("workload", help="workload file sorted by arrival time")
+    stream_parser.add_argument("--q1", type=int, required=True, help="quantum of round robin 1")
+    stream_parser.add_argument("--q2", type=int, required=True, help="quantum of round robin 2")
+    stream_parser.add_argument("--alpha", type=float, default=0.5)
+    stream_parser.add_argument("--horizon", type=int, help="stop at this time, run until every process terminated "
+                                                           "when not given")
+    stream_parser.add_argument("--queue3-order", choices=QUEUE3_ORDERS, default=ORDER_REMAINING)
+    stream_parser.add_argument("--tick", action="store_true", help="advance one time unit at a time")
+    stream_parser.add_argument("--events", help="json lines file for the gantt chart segments and log events")
+    stream_parser.add_argument("--log-level", type=int, choices=[LOG_OFF, LOG_EVENTS, LOG_ALL], default=LOG_OFF,
+                               help="log events written to --events: 0 none, 1 state changes, 2 every step")
+    stream_parser.set_defaults(handler=stream)
+
+    convert_parser = commands.add_parser("convert", help="convert a workload between the text and binary formats")
+    convert_parser.add_argument("source", help="text or binary workload file")
+    convert_parser.add_argument("destination", help=f"destination file, binary if it ends with {BINARY_SUFFIX}")
+    convert_parser.set_defaults(handler=convert)
+
+    generate_parser = commands.add_parser("generate", help="write a seeded synthetic workload")
+    generate_parser.add_argument("destination", help=f"workload file, binary if it ends with {BINARY_SUFFIX}")
+    generate_parser.add_argument("--processes", type=int, required=True)
+    generate_parser.add_argument("--seed", type=int, default=0)
+    generate_parser.add_argument("--arrivals", default="poisson:0.5", help="poisson:RATE or uniform:MAX_TIME")
+    generate_parser.add_argument("--bursts", default="uniform:1:5", help="distribution of cpu bursts per process")
+    generate_parser.add_argument("--cpu", default="exponential:20",
+                                 help="uniform:LOW:HIGH, exponential:MEAN, pareto:SHAPE[:SCALE] or "
+                                      "bimodal:SHORT_MEAN:LONG_MEAN:LONG_FRACTION")
+    generate_parser.add_argument("--io", default="exponential:50", help="same choices as --cpu")
+    generate_parser.set_defaults(handler=generate_command)
+
+    sweep_parser = commands.add_parser("sweep", help="simulate a workload for many q1, q2 and alpha values")
+    sweep.add_arguments(sweep_parser)
+    sweep_parser.set_defaults(handler=sweep.main)
+
+    benchmark_parser = commands.add_parser("benchmark", help="time the simulator on canned and synthetic workloads")
+    benchmark.add_arguments(benchmark_parser)
+    benchmark_parser.set_defaults(handler=benchmark.main)
+    return parser
+
+
+def as_list(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def check_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    # parameters the simulator or the generator would reject and options that don't go together, checked
+    # before the handler runs so it can only fail on the contents of the files it reads
+    if args.command in ("run", "stream", "sweep", "benchmark"):
+        if min(as_list(args.q1) + as_list(args.q2)) < 1:
+            parser.error("--q1 and --q2 must be at least 1")
+        if not all(0 <= alpha <= 1 for alpha in as_list(args.alpha)):
+            parser.error("--alpha must be between 0 and 1")
+    if args.command == "run":
+        if args.cores < 1:
+            parser.error("--cores must be at least 1")
+        if args.balance_interval < 0:
+            parser.error("--balance-interval can't be negative")
+        if args.checkpoint_interval < 1:
+            parser.error("--checkpoint-interval must be at least 1")
+        if args.cache_size is not None and args.cache_size < 0:
+            parser.error("--cache-size can't be negative")
+        if args.resume and not args.checkpoint:
+            parser.error("--resume needs --checkpoint")
+        if args.cache is not None and (args.resume or args.log or args.stats or args.profile or args.checkpoint
+                                       or args.cores > 1 or args.per_core_queues):
+            parser.error("--cache can't be used with --resume, --log, --stats, --profile, --checkpoint or more cores")
+        if args.stats and args.resume:
+            parser.error("--stats can't be used with --resume")
+        if args.stats and (args.cores > 1 or args.per_core_queues):
+            parser.error("--stats is only available with one core")
+    elif args.command == "stream":
+        if args.horizon is not None and args.horizon < 0:
+            parser.error("--horizon can't be negative")
+    elif args.command == "sweep":
+        if args.workers is not None and args.workers < 1:
+            parser.error("--workers must be at least 1")
+    elif args.command == "generate":
+        from generator import parse_arrivals, parse_distribution
+        if args.processes < 0:
+            parser.error("--processes can't be negative")
+        try:
+            parse_arrivals(args.arrivals)
+            for spec in (args.bursts, args.cpu, args.io):
+                parse_distribution(spec)
+        except ValueError as e:
+            parser.error(str(e))
+    # files the handler reads
+    input_files = [getattr(args, name, None) for name in ("workload", "source", "compare")]
+    if getattr(args, "resume", False):
+        input_files.append(args.checkpoint)
+    for file_name in input_files:
+        if file_name is not None and not os.path.isfile(file_name):
+            parser.error(f"{file_name} doesn't exist or isn't a file")
+
+
+def main(argv: list[str] = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    check_arguments(parser, args)
+    usage_errors = (WorkloadFormatError,)
+    if getattr(args, "resume", False):
+        from checkpoint import CheckpointError
+        usage_errors += (CheckpointError,)
+    try:
+        args.handler(args)
+    except usage_errors as e:
+        # a malformed workload or checkpoint file is reported like a bad argument instead of a traceback
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
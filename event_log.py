@@ -0,0 +1,84 @@
+from collections import deque
+from typing import NamedTuple, Iterator
+
+# verbosity levels
+LOG_OFF = 0
+# state changes only: quantum/limit reached, burst finished, preempted, IO finished
+LOG_EVENTS = 1
+# state changes and every processing step
+LOG_ALL = 2
+# same as LOG_ALL and also print every event when it is added
+LOG_ECHO = 3
+
+# event kinds
+PROCESSING = 0
+FINISHED_ALL_BURSTS = 1
+FINISHED_BURST = 2
+FINISHED_LIMIT = 3
+FINISHED_QUANTUM = 4
+PREEMPTED = 5
+FINISHED_IO = 6
+
+ALGO_NAMES = {"RR1": "Round Robin 1", "RR2": "Round Robin 2", "SRTF": "SRTF", "FCFS": "FCFS", "IO": "IO"}
+
+
+class LogEvent(NamedTuple):
+    time: int
+    algo: str
+    pid: int
+    kind: int
+    # burst index for FINISHED_BURST, pid of the running process for PREEMPTED
+    detail: int = -1
+
+
+def format_event(event: LogEvent) -> str:
+    time, algo, pid, kind, detail = event
+    if algo == "IO":
+        return f"[IO] process {pid} finished IO at {time}, returning back to queue"
+    if algo in ("RR1", "RR2"):
+        prefix = f"[{ALGO_NAMES[algo]}/{time}]"
+    else:
+        prefix = f"[{algo} {detail if kind == PREEMPTED else pid}/{time}]"
+    if kind == PROCESSING:
+        if algo in ("RR1", "RR2"):
+            return f"{prefix} processing for process {pid}, at {time}"
+        return f"{prefix} processing for {pid}, at {time}"
+    if kind == FINISHED_ALL_BURSTS:
+        return f"{prefix} process {pid} finished all bursts at {time}"
+    if kind == FINISHED_BURST:
+        return f"{prefix} process {pid} finished current burst {detail} at {time}, adding to IO Queue"
+    if kind == FINISHED_LIMIT:
+        return f"{prefix} process {pid} finished its limit at {time}, adding to next queue"
+    if kind == FINISHED_QUANTUM:
+        return f"{prefix} process {pid} finished it's time quanta at {time}"
+    if kind == PREEMPTED:
+        return f"{prefix} process {pid} was preemted 3 times, at {time}"
+    return f"{prefix} process {pid} event {kind} at {time}"
+
+
+class EventLog:
+    # events are kept as tuples and only formatted when read, iterating or indexing gives the messages
+    def __init__(self, level: int = LOG_ALL, max_events: int = None):
+        self.level = level
+        # with max_events only the most recent events are kept
+        self.events: deque[LogEvent] = deque(maxlen=max_events)
+
+    def __len__(self):
+        return len(self.events)
+
+    def __getitem__(self, index: int) -> str:
+        return format_event(self.events[index])
+
+    def __iter__(self) -> Iterator[str]:
+        return map(format_event, self.events)
+
+    def enabled(self, kind: int) -> bool:
+        return self.level >= (LOG_ALL if kind == PROCESSING else LOG_EVENTS)
+
+    def add(self, time: int, algo: str, pid: int, kind: int, detail: int = -1):
+        if not self.enabled(kind):
+            return
+        event = LogEvent(time, algo, pid, kind, detail)
+        self.events.append(event)
+        if self.level >= LOG_ECHO:
+            print(format_event(event))
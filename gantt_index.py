@@ -0,0 +1,109 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Iterable, Iterator, Optional
+
+from simulation import GanttChart
+
+# queue levels in the order they are drawn
+LANES = ("RR1", "RR2", "SRTF", "FCFS")
+# most buckets in the finest level of detail of a lane
+MAX_BUCKETS = 1 << 18
+
+
+class GanttLane:
+    # gantt chart segments of one queue level as sorted columns, and a pyramid of time buckets for ranges
+    # with more segments than pixels. Buckets of level k are bucket_size * 2**k time units long, each has
+    # the busy time inside it and the pid that ran the longest in it (-1 if the bucket is idle)
+    def __init__(self, segments: Iterable[GanttChart], end_time: int):
+        segments = sorted(segments, key=lambda segment: segment.start_time)
+        self.starts = array("q", (segment.start_time for segment in segments))
+        self.ends = array("q", (segment.end_time for segment in segments))
+        self.pids = array("i", (segment.pid for segment in segments))
+        # segments of a lane can overlap: round robin 2, SRTF and FCFS segments start when the process first
+        # ran in its burst, before any preemption. The running maximum of the ends is sorted
+        self.max_ends = array("q", accumulate(self.ends, max))
+        self.bucket_size = max(1, -(-end_time // MAX_BUCKETS))
+        self.busy: list[array] = []
+        self.top_pids: list[array] = []
+        self.build_levels(max(1, -(-end_time // self.bucket_size)))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def build_levels(self, number_of_buckets: int):
+        size = self.bucket_size
+        busy = array("q", bytes(8 * number_of_buckets))
+        top_pids = array("i", [-1]) * number_of_buckets
+        # time the top pid ran in each bucket
+        top_busy = array("q", bytes(8 * number_of_buckets))
+        for start, end, pid in zip(self.starts, self.ends, self.pids):
+            bucket = start // size
+            while start < end:
+                bucket_end = (bucket + 1) * size
+                part = (end if end < bucket_end else bucket_end) - start
+                busy[bucket] += part
+                if part > top_busy[bucket]:
+                    top_busy[bucket] = part
+                    top_pids[bucket] = pid
+                start += part
+                bucket += 1
+        # overlapping segments count their common time twice, a bucket can't be busier than its length
+        busy = array("q", (time if time < size else size for time in busy))
+        self.busy.append(busy)
+        self.top_pids.append(top_pids)
+        while len(busy) > 1:
+            # every bucket of the next level is two buckets of this one
+            if len(busy) % 2:
+                busy.append(0)
+                top_pids.append(-1)
+                top_busy.append(0)
+            left, right = slice(0, None, 2), slice(1, None, 2)
+            busy = array("q", map(int.__add__, busy[left], busy[right]))
+            right_is_top = list(map(int.__gt__, top_busy[right], top_busy[left]))
+            top_pids = array("i", (r if take else l for l, r, take in zip(top_pids[left], top_pids[right], right_is_top)))
+            top_busy = array("q", map(max, top_busy[left], top_busy[right]))
+            self.busy.append(busy)
+            self.top_pids.append(top_pids)
+
+    def visible(self, start_time: float, end_time: float) -> tuple[int, int]:
+        # index range with every segment that overlaps [start_time, end_time), segments nested in an earlier
+        # longer one can be in the range and end before start_time
+        return bisect_right(self.max_ends, start_time), bisect_left(self.starts, end_time)
+
+    def level_for(self, time_per_pixel: float) -> Optional[int]:
+        # coarsest level whose buckets are at most one pixel wide, None when even the finest is wider
+        if self.bucket_size > time_per_pixel:
+            return None
+        level = 0
+        while level + 1 < len(self.busy) and self.bucket_size << (level + 1) <= time_per_pixel:
+            level += 1
+        return level
+
+    def buckets(self, level: int, start_time: float, end_time: float) -> Iterator[tuple[int, int, int, int]]:
+        # (start, end, busy time, top pid) of the non idle buckets of a level overlapping [start_time, end_time)
+        size = self.bucket_size << level
+        busy = self.busy[level]
+        top_pids = self.top_pids[level]
+        first = max(0, int(start_time // size))
+        last = min(len(busy), int(end_time // size) + 1)
+        for bucket in range(first, last):
+            if busy[bucket]:
+                yield bucket * size, (bucket + 1) * size, busy[bucket], top_pids[bucket]
+
+
+def lane_name(segment: GanttChart, multi_core: bool) -> str:
+    return f"{segment.core}:{segment.algo}" if multi_core else segment.algo
+
+
+def build_lanes(gantt_chart: list[GanttChart]) -> dict[str, GanttLane]:
+    # one lane per queue level, or per core and queue level ("1:RR2") when the segments ran on several
+    # cores, in drawing order. All lanes share the same bucket boundaries
+    end_time = max((segment.end_time for segment in gantt_chart), default=0)
+    cores = sorted({segment.core for segment in gantt_chart}) or [0]
+    multi_core = cores != [0]
+    segments_per_lane: dict[str, list[GanttChart]] = {f"{core}:{lane}" if multi_core else lane: []
+                                                      for core in cores for lane in LANES}
+    for segment in gantt_chart:
+        segments_per_lane.setdefault(lane_name(segment, multi_core), []).append(segment)
+    return {lane: GanttLane(segments, end_time) for lane, segments in segments_per_lane.items()}
@@ -0,0 +1,218 @@
+import random
+from abc import ABC, abstractmethod
+from array import array
+from typing import Union
+
+from workload import Workload
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# seeded synthetic workloads. Every distribution draws a whole batch at once, with numpy when it is
+# installed and with random.Random otherwise. A seed always gives the same workload on the same backend,
+# the two backends give different workloads for the same seed
+
+Rng = Union[random.Random, "numpy.random.Generator"]
+
+
+class Distribution(ABC):
+    # positive integer durations (or counts), draw returns a list for random.Random and an int64 array
+    # for a numpy generator. Subclasses draw count raw values with either backend, draw rounds them
+    def draw(self, rng: Rng, count: int):
+        if isinstance(rng, random.Random):
+            return [max(1, round(value)) for value in self.draw_floats(rng, count)]
+        return numpy.maximum(numpy.rint(self.draw_numpy(rng, count)), 1).astype(numpy.int64)
+
+    @abstractmethod
+    def draw_floats(self, rng: random.Random, count: int) -> list[float]:
+        ...
+
+    @abstractmethod
+    def draw_numpy(self, rng, count: int):
+        ...
+
+
+class Uniform(Distribution):
+    # integers in [low, high]
+    def __init__(self, low: int, high: int):
+        self.low = low
+        self.high = high
+
+    def draw_floats(self, rng: random.Random, count: int) -> list[float]:
+        return [rng.randint(self.low, self.high) for _ in range(count)]
+
+    def draw_numpy(self, rng, count: int):
+        return rng.integers(self.low, self.high, size=count, endpoint=True)
+
+
+class Exponential(Distribution):
+    def __init__(self, mean: float):
+        self.mean = mean
+
+    def draw_floats(self, rng: random.Random, count: int) -> list[float]:
+        rate = 1 / self.mean
+        return [rng.expovariate(rate) for _ in range(count)]
+
+    def draw_numpy(self, rng, count: int):
+        return rng.exponential(self.mean, size=count)
+
+
+class Pareto(Distribution):
+    # heavy tailed, scale is the smallest value, a shape close to 1 gives a heavier tail
+    def __init__(self, shape: float, scale: float = 1.0):
+        self.shape = shape
+        self.scale = scale
+
+    def draw_floats(self, rng: random.Random, count: int) -> list[float]:
+        return [self.scale * rng.paretovariate(self.shape) for _ in range(count)]
+
+    def draw_numpy(self, rng, count: int):
+        # numpy draws the Lomax distribution, shifting by one gives the classic Pareto
+        return self.scale * (rng.pareto(self.shape, size=count) + 1)
+
+
+class Bimodal(Distribution):
+    # mostly short bursts with a long_fraction of long ones, like interactive and batch processes
+    def __init__(self, short: Distribution, long: Distribution, long_fraction: float):
+        self.short = short
+        self.long = long
+        self.long_fraction = long_fraction
+
+    def draw_floats(self, rng: random.Random, count: int) -> list[float]:
+        short = self.short.draw_floats(rng, count)
+        long = self.long.draw_floats(rng, count)
+        return [l if rng.random() < self.long_fraction else s for s, l in zip(short, long)]
+
+    def draw_numpy(self, rng, count: int):
+        short = self.short.draw_numpy(rng, count)
+        long = self.long.draw_numpy(rng, count)
+        return numpy.where(rng.random(count) < self.long_fraction, long, short)
+
+
+class PoissonArrivals:
+    # arrival times of a Poisson process with rate arrivals per time unit, in increasing order
+    def __init__(self, rate: float):
+        self.rate = rate
+
+    def draw(self, rng: Rng, count: int):
+        if isinstance(rng, random.Random):
+            time = 0.0
+            arrivals = []
+            for _ in range(count):
+                time += rng.expovariate(self.rate)
+                arrivals.append(int(time))
+            return arrivals
+        return numpy.cumsum(rng.exponential(1 / self.rate, size=count)).astype(numpy.int64)
+
+
+class UniformArrivals:
+    # arrival times spread uniformly over [0, max_arrival_time], in increasing order
+    def __init__(self, max_arrival_time: int):
+        self.max_arrival_time = max_arrival_time
+
+    def draw(self, rng: Rng, count: int):
+        if isinstance(rng, random.Random):
+            return sorted(rng.randint(0, self.max_arrival_time) for _ in range(count))
+        return numpy.sort(rng.integers(0, self.max_arrival_time, size=count, endpoint=True))
+
+
+def make_rng(seed: int = None, use_numpy: bool = None) -> Rng:
+    # numpy is used when it is installed unless use_numpy is False
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    if use_numpy:
+        if numpy is None:
+            raise ImportError("numpy is not installed")
+        return numpy.random.default_rng(seed)
+    return random.Random(seed)
+
+
+def generate(number_of_processes: int, seed: int = None, arrivals=PoissonArrivals(0.5),
+             cpu_bursts_per_process: Distribution = Uniform(1, 5), cpu: Distribution = Exponential(20),
+             io: Distribution = Exponential(50), use_numpy: bool = None) -> Workload:
+    # processes get pids 0..n-1 in arrival order, each has cpu_bursts_per_process cpu bursts with an io
+    # burst between every two of them
+    rng = make_rng(seed, use_numpy)
+    arrival_times = arrivals.draw(rng, number_of_processes)
+    counts = cpu_bursts_per_process.draw(rng, number_of_processes)
+    # a list with random.Random, an array with numpy
+    total = sum(counts) if isinstance(rng, random.Random) else int(counts.sum())
+    cpu_bursts = cpu.draw(rng, total)
+    io_bursts = io.draw(rng, total - number_of_processes)
+    if isinstance(rng, random.Random):
+        return build_workload(arrival_times, counts, cpu_bursts, io_bursts)
+    return build_workload_numpy(arrival_times, counts, cpu_bursts, io_bursts)
+
+
+def build_workload(arrival_times: list[int], counts: list[int], cpu_bursts: list[int], io_bursts: list[int]) -> Workload:
+    workload = Workload()
+    next_cpu = next_io = 0
+    for pid, (arrival_time, count) in enumerate(zip(arrival_times, counts)):
+        bursts = [0] * (2 * count - 1)
+        bursts[0::2] = cpu_bursts[next_cpu:next_cpu + count]
+        bursts[1::2] = io_bursts[next_io:next_io + count - 1]
+        next_cpu += count
+        next_io += count - 1
+        workload.append_bursts(pid, arrival_time, bursts)
+    return workload
+
+
+def build_workload_numpy(arrival_times, counts, cpu_bursts, io_bursts) -> Workload:
+    # the bursts of every process are laid out at once: positions at an even distance from the start of
+    # their process are cpu bursts, the others io bursts
+    lengths = 2 * counts - 1
+    offsets = numpy.zeros(len(counts) + 1, dtype=numpy.int64)
+    numpy.cumsum(lengths, out=offsets[1:])
+    local = numpy.arange(offsets[-1]) - numpy.repeat(offsets[:-1], lengths)
+    is_cpu = local % 2 == 0
+    bursts = numpy.empty(offsets[-1], dtype=numpy.int32)
+    bursts[is_cpu] = cpu_bursts
+    bursts[~is_cpu] = io_bursts
+    return Workload.from_columns(numpy_array("i", numpy.arange(len(counts), dtype=numpy.int32)),
+                                 numpy_array("i", arrival_times.astype(numpy.int32)),
+                                 numpy_array("q", offsets), numpy_array("i", bursts))
+
+
+def numpy_array(typecode: str, values) -> array:
+    copy = array(typecode)
+    copy.frombytes(numpy.ascontiguousarray(values).tobytes())
+    return copy
+
+
+def parse_distribution(spec: str) -> Distribution:
+    # command line distributions: uniform:LOW:HIGH, exponential:MEAN, pareto:SHAPE[:SCALE],
+    # bimodal:SHORT_MEAN:LONG_MEAN:LONG_FRACTION (exponential modes). Means, shapes and scales must be positive
+    name, *values = spec.split(":")
+    try:
+        if name == "uniform" and len(values) == 2:
+            low, high = map(int, values)
+            if low <= high:
+                return Uniform(low, high)
+        elif name == "exponential" and len(values) == 1:
+            if float(values[0]) > 0:
+                return Exponential(float(values[0]))
+        elif name == "pareto" and len(values) in (1, 2):
+            if all(float(value) > 0 for value in values):
+                return Pareto(*map(float, values))
+        elif name == "bimodal" and len(values) == 3:
+            short_mean, long_mean, long_fraction = map(float, values)
+            if short_mean > 0 and long_mean > 0 and 0 <= long_fraction <= 1:
+                return Bimodal(Exponential(short_mean), Exponential(long_mean), long_fraction)
+    except ValueError:
+        pass
+    raise ValueError(f"invalid distribution {spec}")
+
+
+def parse_arrivals(spec: str) -> Union[PoissonArrivals, UniformArrivals]:
+    # poisson:RATE or uniform:MAX_ARRIVAL_TIME
+    name, _, value = spec.partition(":")
+    try:
+        if name == "poisson" and float(value) > 0:
+            return PoissonArrivals(float(value))
+        if name == "uniform" and int(value) >= 0:
+            return UniformArrivals(int(value))
+    except ValueError:
+        pass
+    raise ValueError(f"invalid arrivals {spec}")
@@ -0,0 +1,79 @@
+from typing import Any
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt
+
+from event_log import format_event
+from simulation import Simulator
+
+# table models over the results of a finished simulation. Cells are built in data() when the view asks
+# for them, so only the visible rows are ever formatted
+
+PROCESS_HEADERS = ["PID", "Arrival Time", "Start Time", "End Time", "Waiting Time", "Turn Around Time",
+                   "CPU Bursts", "IO Bursts"]
+
+
+class ProcessTableModel(QAbstractTableModel):
+    def __init__(self, simulator: Simulator, parent: QObject = None):
+        super().__init__(parent)
+        self.simulator = simulator
+        # process slots ordered by pid
+        self.rows = sorted(range(len(simulator.workload)), key=simulator.pids.__getitem__)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(PROCESS_HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return PROCESS_HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        simulator = self.simulator
+        workload = simulator.workload
+        i = self.rows[index.row()]
+        column = index.column()
+        if column == 0:
+            value = simulator.pids[i]
+        elif column == 1:
+            value = simulator.arrival_times[i]
+        elif column == 2:
+            value = simulator.start_time[i]
+        elif column == 3:
+            value = simulator.complete_time[i]
+        elif column == 4:
+            value = simulator.waiting_time(i)
+        elif column == 5:
+            value = simulator.turnaround_time(i)
+        elif column == 6:
+            value = ", ".join(map(str, workload[i].cpu_burst_duration))
+        else:
+            value = ", ".join(map(str, workload[i].io_burst_duration))
+        return str(value)
+
+
+class LogTableModel(QAbstractTableModel):
+    def __init__(self, simulator: Simulator, parent: QObject = None):
+        super().__init__(parent)
+        # the log is a deque, indexing its middle walks the deque so the events are copied to a list once
+        self.events = list(simulator.logs.events)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.events)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else 1
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return "Event"
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        return format_event(self.events[index.row()])
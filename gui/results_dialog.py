@@ -16,8 +16,9 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QImage, QKeySequence, QLinearGradient, QPainter,
     QPalette, QPixmap, QRadialGradient, QTransform)
 from PySide6.QtWidgets import (QApplication, QDialog, QHBoxLayout, QHeaderView,
-    QLabel, QSizePolicy, QTableWidget, QTableWidgetItem,
-    QWidget)
+    QLabel, QSizePolicy, QTableView, QWidget)
+
+from gui.timeline import TimelineWidget
 
 class Ui_results_dialog(object):
     def setupUi(self, results_dialog):
@@ -33,7 +34,7 @@ class Ui_results_dialog(object):
         results_dialog.setMinimumSize(QSize(1920, 1080))
         results_dialog.setBaseSize(QSize(1920, 1080))
         results_dialog.setModal(True)
-        self.results_table = QTableWidget(results_dialog)
+        self.results_table = QTableView(results_dialog)
         self.results_table.setObjectName(u"results_table")
         self.results_table.setEnabled(True)
         self.results_table.setGeometry(QRect(20, 130, 911, 231))
@@ -49,7 +50,7 @@ class Ui_results_dialog(object):
         font = QFont()
         font.setPointSize(18)
         self.label.setFont(font)
-        self.guant_chart = QTableWidget(results_dialog)
+        self.guant_chart = TimelineWidget(results_dialog)
         self.guant_chart.setObjectName(u"guant_chart")
         self.guant_chart.setGeometry(QRect(20, 420, 921, 431))
         self.label_2 = QLabel(results_dialog)
@@ -60,7 +61,7 @@ class Ui_results_dialog(object):
         self.label_3.setObjectName(u"label_3")
         self.label_3.setGeometry(QRect(1020, 30, 241, 31))
         self.label_3.setFont(font)
-        self.log = QTableWidget(results_dialog)
+        self.log = QTableView(results_dialog)
         self.log.setObjectName(u"log")
         self.log.setGeometry(QRect(1000, 70, 661, 801))
         self.widget = QWidget(results_dialog)
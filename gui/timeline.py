@@ -0,0 +1,168 @@
+import math
+
+from PySide6.QtCore import QPointF, QRectF, Qt
+from PySide6.QtGui import QColor, QMouseEvent, QPainter, QPaintEvent, QWheelEvent
+from PySide6.QtWidgets import QWidget
+
+from gantt_index import GanttLane, build_lanes
+from simulation import GanttChart
+
+LABEL_WIDTH = 60
+AXIS_HEIGHT = 24
+# smallest distance between two time axis ticks
+TICK_SPACING = 80
+# segments narrower than this don't get a pid label
+LABEL_MIN_WIDTH = 30
+ZOOM_STEP = 1.25
+
+
+def process_color(pid: int) -> QColor:
+    # same color for a pid on every run, hues are spread by the golden angle so neighbours differ
+    return QColor.fromHsv(int(pid * 137.508) % 360, 120, 240)
+
+
+class TimelineWidget(QWidget):
+    # gantt chart drawn on a time axis with one lane per queue level. The wheel zooms around the cursor,
+    # dragging pans and a double click fits the whole chart. Segments narrower than a pixel are merged,
+    # and when a lane has more visible segments than pixels it is drawn from its bucket pyramid
+    def __init__(self, parent: QWidget = None):
+        super().__init__(parent)
+        self.lanes: dict[str, GanttLane] = {}
+        self.end_time = 0
+        # time at the left edge and pixels per time unit
+        self.view_start = 0.0
+        self.scale = 1.0
+        self.drag_x = None
+        self.colors: dict[int, QColor] = {}
+        self.setMinimumHeight(AXIS_HEIGHT + 4 * 24)
+
+    def set_gantt_chart(self, gantt_chart: list[GanttChart]):
+        self.lanes = build_lanes(gantt_chart)
+        self.end_time = max((segment.end_time for segment in gantt_chart), default=0)
+        self.fit()
+
+    def fit(self):
+        self.view_start = 0.0
+        self.scale = self.chart_width() / max(1, self.end_time)
+        self.update()
+
+    def chart_width(self) -> int:
+        return max(1, self.width() - LABEL_WIDTH)
+
+    def color(self, pid: int) -> QColor:
+        color = self.colors.get(pid)
+        if color is None:
+            color = self.colors[pid] = process_color(pid)
+        return color
+
+    def time_at(self, x: float) -> float:
+        return self.view_start + (x - LABEL_WIDTH) / self.scale
+
+    def x_at(self, time: float) -> float:
+        return LABEL_WIDTH + (time - self.view_start) * self.scale
+
+    def wheelEvent(self, event: QWheelEvent):
+        x = event.position().x()
+        anchor = self.time_at(x)
+        self.scale *= ZOOM_STEP ** (event.angleDelta().y() / 120)
+        # no more than 200 pixels per time unit and the whole chart at least 100 pixels wide
+        self.scale = min(200.0, max(self.scale, 100 / max(1, self.end_time)))
+        self.view_start = anchor - (x - LABEL_WIDTH) / self.scale
+        self.update()
+
+    def mousePressEvent(self, event: QMouseEvent):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.drag_x = event.position().x()
+
+    def mouseMoveEvent(self, event: QMouseEvent):
+        if self.drag_x is None:
+            return
+        x = event.position().x()
+        self.view_start -= (x - self.drag_x) / self.scale
+        self.drag_x = x
+        self.update()
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        self.drag_x = None
+
+    def mouseDoubleClickEvent(self, event: QMouseEvent):
+        self.fit()
+
+    def paintEvent(self, event: QPaintEvent):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().base())
+        lane_height = (self.height() - AXIS_HEIGHT) / max(1, len(self.lanes))
+        start_time = self.view_start
+        end_time = self.time_at(self.width())
+        painter.setClipRect(QRectF(LABEL_WIDTH, 0, self.chart_width(), self.height()))
+        for row, lane in enumerate(self.lanes.values()):
+            if not len(lane):
+                continue
+            top = row * lane_height + 2
+            height = lane_height - 4
+            first, last = lane.visible(start_time, end_time)
+            level = lane.level_for(1 / self.scale)
+            if level is None or last - first <= 2 * self.chart_width():
+                self.draw_segments(painter, lane, first, last, top, height)
+            else:
+                self.draw_buckets(painter, lane, level, start_time, end_time, top, height)
+        painter.setClipping(False)
+        painter.setPen(self.palette().text().color())
+        for row, name in enumerate(self.lanes):
+            painter.drawText(QRectF(0, row * lane_height, LABEL_WIDTH, lane_height),
+                             Qt.AlignmentFlag.AlignCenter, name)
+            painter.drawLine(QPointF(LABEL_WIDTH, (row + 1) * lane_height), QPointF(self.width(), (row + 1) * lane_height))
+        self.draw_axis(painter, start_time, end_time)
+        painter.end()
+
+    def draw_segments(self, painter: QPainter, lane: GanttLane, first: int, last: int, top: float, height: float):
+        # runs of segments inside the same pixel are drawn as one rectangle in the color of the first one
+        run_x0 = run_x1 = None
+        run_pid = -1
+        for k in range(first, last):
+            x0 = self.x_at(lane.starts[k])
+            x1 = self.x_at(lane.ends[k])
+            if x1 - x0 >= 1:
+                if run_x0 is not None:
+                    painter.fillRect(QRectF(run_x0, top, max(1.0, run_x1 - run_x0), height), self.color(run_pid))
+                    run_x0 = None
+                pid = lane.pids[k]
+                rect = QRectF(x0, top, x1 - x0, height)
+                painter.fillRect(rect, self.color(pid))
+                if x1 - x0 >= LABEL_MIN_WIDTH:
+                    painter.setPen(Qt.GlobalColor.black)
+                    painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, str(pid))
+            elif run_x0 is not None and math.floor(x0) <= math.floor(run_x1):
+                run_x1 = x1
+            else:
+                if run_x0 is not None:
+                    painter.fillRect(QRectF(run_x0, top, max(1.0, run_x1 - run_x0), height), self.color(run_pid))
+                run_x0, run_x1, run_pid = x0, x1, lane.pids[k]
+        if run_x0 is not None:
+            painter.fillRect(QRectF(run_x0, top, max(1.0, run_x1 - run_x0), height), self.color(run_pid))
+
+    def draw_buckets(self, painter: QPainter, lane: GanttLane, level: int, start_time: float, end_time: float,
+                     top: float, height: float):
+        # one bar per bucket, its height shows how busy the bucket was
+        for bucket_start, bucket_end, busy, pid in lane.buckets(level, start_time, end_time):
+            x0 = self.x_at(bucket_start)
+            bar_height = height * busy / (bucket_end - bucket_start)
+            painter.fillRect(QRectF(x0, top + height - bar_height, max(1.0, self.x_at(bucket_end) - x0), bar_height),
+                             self.color(pid))
+
+    def draw_axis(self, painter: QPainter, start_time: float, end_time: float):
+        # ticks at 1, 2 or 5 times a power of ten, at least TICK_SPACING pixels apart
+        axis_top = self.height() - AXIS_HEIGHT
+        painter.drawLine(QPointF(LABEL_WIDTH, axis_top), QPointF(self.width(), axis_top))
+        step = TICK_SPACING / self.scale
+        power = 10 ** math.floor(math.log10(step))
+        step = next(power * factor for factor in (1, 2, 5, 10) if power * factor >= step)
+        number = math.ceil(max(0.0, start_time) / step)
+        while number * step <= end_time:
+            tick = number * step
+            x = self.x_at(tick)
+            painter.drawLine(QPointF(x, axis_top), QPointF(x, axis_top + 4))
+            painter.drawText(QRectF(x - TICK_SPACING / 2, axis_top + 4, TICK_SPACING, AXIS_HEIGHT - 4),
+                             Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop,
+                             str(round(tick)) if step >= 1 else f"{tick:g}")
+            number += 1
@@ -0,0 +1,108 @@
+from heapq import heappop, heappush
+from typing import Any, Iterator, Optional
+
+
+class IndexedHeap:
+    # binary min heap of items keyed by pid, a pid -> position index allows removing and updating
+    # the key of any pid in O(log n). Equal keys are ordered by the time the pid was pushed so
+    # items themselves are never compared.
+    def __init__(self):
+        # entries are [key, order, pid, item]
+        self.heap: list[list] = []
+        self.positions: dict[int, int] = {}
+        self.counter = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, pid: int):
+        return pid in self.positions
+
+    def __iter__(self):
+        # items in heap order, not sorted
+        return (entry[3] for entry in self.heap)
+
+    def empty(self) -> bool:
+        return not self.heap
+
+    def push(self, pid: int, key: int, item: Any):
+        if pid in self.positions:
+            raise KeyError(f"pid {pid} is already in the heap")
+        self.heap.append([key, self.counter, pid, item])
+        self.counter += 1
+        self.positions[pid] = len(self.heap) - 1
+        self.sift_up(len(self.heap) - 1)
+
+    def peek(self) -> Optional[Any]:
+        return self.heap[0][3] if self.heap else None
+
+    def in_order(self) -> Iterator[Any]:
+        # items by increasing key without changing the heap, the next item is found in O(log n)
+        heap = self.heap
+        frontier = [(heap[0][0], heap[0][1], 0)] if heap else []
+        while frontier:
+            _, _, position = heappop(frontier)
+            yield heap[position][3]
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heappush(frontier, (heap[child][0], heap[child][1], child))
+
+    def last(self) -> Optional[Any]:
+        # item with the largest key, O(n)
+        return max(self.heap)[3] if self.heap else None
+
+    def pop(self) -> Any:
+        return self.remove(self.heap[0][2])
+
+    def key(self, pid: int) -> int:
+        return self.heap[self.positions[pid]][0]
+
+    def remove(self, pid: int) -> Any:
+        position = self.positions.pop(pid)
+        entry = self.heap[position]
+        last = self.heap.pop()
+        if position < len(self.heap):
+            self.heap[position] = last
+            self.positions[last[2]] = position
+            self.sift_down(self.sift_up(position))
+        return entry[3]
+
+    def update(self, pid: int, key: int):
+        position = self.positions[pid]
+        old_key = self.heap[position][0]
+        self.heap[position][0] = key
+        if key < old_key:
+            self.sift_up(position)
+        elif key > old_key:
+            self.sift_down(position)
+
+    def less(self, i: int, j: int) -> bool:
+        a, b = self.heap[i], self.heap[j]
+        return a[0] < b[0] or (a[0] == b[0] and a[1] < b[1])
+
+    def swap(self, i: int, j: int):
+        heap = self.heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self.positions[heap[i][2]] = i
+        self.positions[heap[j][2]] = j
+
+    def sift_up(self, position: int) -> int:
+        while position > 0:
+            parent = (position - 1) // 2
+            if not self.less(position, parent):
+                break
+            self.swap(position, parent)
+            position = parent
+        return position
+
+    def sift_down(self, position: int) -> int:
+        size = len(self.heap)
+        while True:
+            smallest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < size and self.less(child, smallest):
+                    smallest = child
+            if smallest == position:
+                return position
+            self.swap(position, smallest)
+            position = smallest
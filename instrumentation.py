@@ -0,0 +1,121 @@
+from time import perf_counter_ns
+from typing import Callable
+
+from metrics import MetricsCollector
+
+# opt in instrumentation of a Simulator. The methods of one simulator are replaced by timing wrappers on
+# the instance, so simulators without instrumentation run the plain methods and pay nothing
+
+PHASES = ("run_round_robin_1", "run_round_robin_2", "run_shortest_remaining_time_first",
+          "run_first_come_first_served", "check_arrived_processes", "check_io_queue", "add_to_log",
+          "record_queue_event")
+QUEUE_NAMES = ("RR1", "RR2", "SRTF", "FCFS", "IO")
+
+
+class PhaseStats:
+    def __init__(self):
+        self.calls = 0
+        # nanoseconds including the phases called from this one, and without them
+        self.total_time = 0
+        self.own_time = 0
+
+    def as_dict(self) -> dict:
+        return {"calls": self.calls, "total_seconds": self.total_time / 1e9, "own_seconds": self.own_time / 1e9}
+
+
+class SimulatorStats:
+    def __init__(self, metrics: MetricsCollector):
+        self.phases = {name: PhaseStats() for name in PHASES}
+        # for RR1, RR2, SRTF, FCFS and IO: queue depth -> simulated time units spent at that depth
+        self.queue_depths: list[dict[int, int]] = [{} for _ in QUEUE_NAMES]
+        # the simulator's metrics count the context switches
+        self.metrics = metrics
+        # cpu segments in the gantt chart
+        self.dispatches = 0
+        self.run_time = 0
+
+    @property
+    def context_switches(self) -> int:
+        # the cpu went from one process to another
+        return self.metrics.context_switches
+
+    def mean_queue_depth(self, queue: int) -> float:
+        histogram = self.queue_depths[queue]
+        time = sum(histogram.values())
+        return sum(depth * units for depth, units in histogram.items()) / time if time else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "run_seconds": self.run_time / 1e9,
+            "context_switches": self.context_switches,
+            "dispatches": self.dispatches,
+            "phases": {name: phase.as_dict() for name, phase in self.phases.items()},
+            "queue_depths": {name: {"mean": self.mean_queue_depth(queue),
+                                    "histogram": dict(sorted(self.queue_depths[queue].items()))}
+                             for queue, name in enumerate(QUEUE_NAMES)},
+        }
+
+    def report(self) -> str:
+        lines = [f"run {self.run_time / 1e9:.4f}s, {self.dispatches} dispatches, {self.context_switches} context switches",
+                 f"{'phase':<36}{'calls':>10}{'total s':>10}{'own s':>10}"]
+        for name, phase in sorted(self.phases.items(), key=lambda item: -item[1].own_time):
+            lines.append(f"{name:<36}{phase.calls:>10}{phase.total_time / 1e9:>10.4f}{phase.own_time / 1e9:>10.4f}")
+        lines.append("mean queue depths: " + ", ".join(f"{name} {self.mean_queue_depth(queue):.2f}"
+                                                       for queue, name in enumerate(QUEUE_NAMES)))
+        return "\n".join(lines)
+
+
+class Instrumentation:
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.stats = SimulatorStats(simulator.metrics)
+        # time spent in wrapped phases below the phase that is running now
+        self.nested_time = 0
+        for name in PHASES:
+            setattr(simulator, name, self.timed(self.stats.phases[name], getattr(simulator, name)))
+        simulator.tick = self.sampled_tick(simulator.tick)
+        simulator.add_to_gantt_chart = self.counted_dispatch(simulator.add_to_gantt_chart)
+        # run() goes through run_until()
+        simulator.run_until = self.timed_run(simulator.run_until)
+        simulator.step = self.timed_run(simulator.step)
+
+    def timed(self, phase: PhaseStats, method: Callable) -> Callable:
+        def wrapper(*args):
+            outer_nested_time = self.nested_time
+            self.nested_time = 0
+            start = perf_counter_ns()
+            result = method(*args)
+            elapsed = perf_counter_ns() - start
+            phase.calls += 1
+            phase.total_time += elapsed
+            phase.own_time += elapsed - self.nested_time
+            self.nested_time = outer_nested_time + elapsed
+            return result
+        return wrapper
+
+    def sampled_tick(self, tick: Callable) -> Callable:
+        # the queue depths hold for the units about to pass
+        queue_depths = self.stats.queue_depths
+
+        def wrapper(units: int = 1):
+            for histogram, depth in zip(queue_depths, self.simulator.queue_depths()):
+                histogram[depth] = histogram.get(depth, 0) + units
+            tick(units)
+        return wrapper
+
+    def counted_dispatch(self, add_to_gantt_chart: Callable) -> Callable:
+        stats = self.stats
+
+        def wrapper(i: int, start_time: int, algo: str):
+            stats.dispatches += 1
+            add_to_gantt_chart(i, start_time, algo)
+        return wrapper
+
+    def timed_run(self, run: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return run(*args, **kwargs)
+            finally:
+                self.stats.run_time += perf_counter_ns() - start
+        return wrapper
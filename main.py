@@ -1,16 +1,18 @@
-import math
+import random
 import sys
-from copy import deepcopy
-from random import randint
-
-from PySide6.QtGui import QColor, QFont, QStandardItemModel, QStandardItem
+import time
 
 from process import Process
+from result_cache import ResultCache, default_cache_directory, result_key
 from simulation import Simulator
+from generator import Uniform, UniformArrivals, generate
+from workload import as_workload
+from workload_io import FORMAT_BINARY, FORMAT_TEXT, WorkloadFormatError, read_workload, write_workload
 
-from PySide6.QtWidgets import QApplication, QMainWindow, QTableWidgetItem, QFileDialog, QDialog
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog, QDialog, QHeaderView, QTableView
+from PySide6.QtCore import QAbstractTableModel, QObject, QThread, Signal, Slot
 from gui.main_window import Ui_MainWindow
+from gui.models import LogTableModel, ProcessTableModel
 from gui.results_dialog import Ui_results_dialog
 
 
@@ -20,12 +22,50 @@ class ResultsDialog(QDialog, Ui_results_dialog):
         self.setupUi(self)
 
 
-def generate_color():
-    r = randint(0, 255)
-    g = randint(0, 255)
-    b = randint(0, 255)
-    rand_color = (r, g, b)
-    return rand_color
+TEXT_FILTER = "Text workload (*.txt)"
+BINARY_FILTER = "Binary workload (*.wkl)"
+# seconds between two progress updates of a running simulation
+PROGRESS_INTERVAL = 0.1
+
+
+class SimulationWorker(QObject):
+    # runs a simulator on a QThread, progress is sent as (time, terminated processes, queue depths)
+    # at most every PROGRESS_INTERVAL seconds. A finished simulation is stored in the result cache on the
+    # same thread, the main window doesn't use the cache while a worker runs
+    progress = Signal(int, int, list)
+    finished = Signal()
+
+    def __init__(self, simulator: Simulator, result_cache: ResultCache = None, cache_key: str = None):
+        super().__init__()
+        self.simulator = simulator
+        self.result_cache = result_cache
+        self.cache_key = cache_key
+        self.last_progress = 0.0
+
+    @Slot()
+    def run(self):
+        self.simulator.run(self.report_progress)
+        if self.result_cache is not None and not self.simulator.cancelled:
+            self.result_cache.put(self.cache_key, self.simulator)
+        self.finished.emit()
+
+    def report_progress(self, simulator: Simulator):
+        now = time.monotonic()
+        if now - self.last_progress < PROGRESS_INTERVAL and simulator.terminated_count < len(simulator.workload):
+            return
+        self.last_progress = now
+        self.progress.emit(simulator.current_time, simulator.terminated_count, list(simulator.queue_depths()))
+
+
+def set_model(view: QTableView, model: QAbstractTableModel):
+    # the model of the previous run is dropped, rows all have the same height so the view doesn't
+    # measure every row of a large model
+    previous = view.model()
+    view.setModel(model)
+    if previous is not None:
+        previous.deleteLater()
+    view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+    view.verticalHeader().setDefaultSectionSize(view.fontMetrics().height() + 8)
 
 
 class MainWindow(QMainWindow):
@@ -35,8 +75,12 @@ class MainWindow(QMainWindow):
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
         self.simulator = None
+        self.simulation_thread = None
+        self.simulation_worker = None
+        # a run with the same processes and parameters shows the results of the earlier one
+        self.result_cache = ResultCache(default_cache_directory())
+        self.cache_key = None
         self.processes: list[Process] = []
-        self.original_processes: list[Process] = []
         self.ui.file_radio.toggled.connect(self.file_radio_toggled)
         self.ui.save_processes.clicked.connect(self.save_to_file)
         self.ui.generate_radio.toggled.connect(self.generate_radio_toggled)
@@ -56,98 +100,91 @@ class MainWindow(QMainWindow):
         self.ui.main_widget.setCurrentIndex(0)
 
     def run(self):
-        q1 = int(self.ui.q1.text())
-        q2 = int(self.ui.q2.text())
-        alpha = float(self.ui.alpha.text())
-        if self.ui.generate_radio.isChecked():
-            self.generate_processes()
-
-        self.simulator = Simulator(self.processes, q1, q2, alpha)
-        self.simulator.run()
+        if self.simulation_thread is not None:
+            # the run button is a cancel button while a simulation is running
+            self.simulator.cancel()
+            return
+        try:
+            q1 = int(self.ui.q1.text())
+            q2 = int(self.ui.q2.text())
+            alpha = float(self.ui.alpha.text())
+            if self.ui.generate_radio.isChecked():
+                self.generate_processes()
+            workload = as_workload(self.processes)
+            self.cache_key = result_key(workload, q1, q2, alpha)
+            result = self.result_cache.get(self.cache_key, workload)
+            if result is None:
+                self.simulator = Simulator(workload, q1, q2, alpha, event_driven=True)
+        except ValueError as e:
+            self.ui.statusbar.showMessage(f"Invalid parameters: {e}")
+            return
+        if result is not None:
+            self.simulator = result
+            self.ui.statusbar.showMessage(f"Results of an earlier run, finished at time {result.current_time}")
+            self.show_results()
+            return
+        self.simulation_thread = QThread(self)
+        self.simulation_worker = SimulationWorker(self.simulator, self.result_cache, self.cache_key)
+        self.simulation_worker.moveToThread(self.simulation_thread)
+        self.simulation_thread.started.connect(self.simulation_worker.run)
+        self.simulation_worker.progress.connect(self.show_progress)
+        self.simulation_worker.finished.connect(self.simulation_finished)
+        self.ui.run_button.setText("Cancel")
+        self.simulation_thread.start()
+
+    def show_progress(self, current_time: int, terminated: int, queue_depths: list[int]):
+        rr1, rr2, srtf, fcfs, io = queue_depths
+        self.ui.statusbar.showMessage(
+            f"Time {current_time}, terminated {terminated}/{len(self.processes)}, "
+            f"RR1 {rr1}, RR2 {rr2}, SRTF {srtf}, FCFS {fcfs}, IO {io}")
+
+    def simulation_finished(self):
+        self.simulation_thread.quit()
+        self.simulation_thread.wait()
+        self.simulation_thread = None
+        self.simulation_worker = None
+        self.ui.run_button.setText("Run App")
+        if self.simulator.cancelled:
+            self.ui.statusbar.showMessage(f"Simulation cancelled at time {self.simulator.current_time}")
+            return
+        self.ui.statusbar.showMessage(f"Simulation finished at time {self.simulator.current_time}")
         self.show_results()
 
     def draw_gantt_chart(self):
-        table = self.ui_results.guant_chart
-        colors_per_process = {}
-        table.resizeColumnsToContents()
-        table.resizeRowsToContents()
-        table.setRowCount(math.ceil(len(self.simulator.gantt_chart)/8) + 1)
-        table.setColumnCount(8)
-        for process in self.processes:
-            colors_per_process[process.pid] = generate_color()
-        for column, gg in enumerate(self.simulator.gantt_chart):
-            row = math.floor(column / 8)
-            col = column % 8
-            item = QTableWidgetItem(f"{gg.start_time}-{gg.end_time}  {gg.pid}({gg.algo})")
-            item.setTextAlignment(Qt.AlignmentFlag.AlignLeft)
-            item.setBackground(QColor(*colors_per_process[gg.pid]))
-            table.setItem(row, col, item)
-            item.setSizeHint(QSize(150, 50))
-
+        self.ui_results.guant_chart.set_gantt_chart(self.simulator.gantt_chart)
 
     def show_logs(self):
-        log_view = self.ui_results.log
-        log_view.resizeColumnsToContents()
-        log_view.resizeRowsToContents()
-        log_view.setRowCount(len(self.simulator.logs))
-        log_view.setColumnCount(1)
-        for i, log in enumerate(self.simulator.logs):
-            log_item = QTableWidgetItem(log)
-            log_item.setTextAlignment(Qt.AlignmentFlag.AlignLeft)
-            log_view.setItem(i, 0, log_item)
-            log_view.setColumnWidth(i, 600)
+        view = self.ui_results.log
+        set_model(view, LogTableModel(self.simulator, view))
+        view.horizontalHeader().setStretchLastSection(True)
 
     def show_results(self):
         self.ui_results.cpu_utilization.setText(f"CPU Utilization: {self.simulator.cpu_utilization()}%")
         self.ui_results.average_waiting.setText(f"Average Waiting Time: {self.simulator.avg_waiting_time()}")
-        table = self.ui_results.results_table
-        table.resizeColumnsToContents()
-        table.resizeRowsToContents()
-        headers = ["PID", "Arrival Time", "Start Time", "End Time", "Waiting Time", "Turn Around Time", "CPU Bursts", "IO Bursts"]
-        table.setRowCount(len(self.processes))
-        table.setColumnCount(len(headers))
-        original_processes = sorted(self.original_processes, key=lambda p: p.pid)
-        processes = sorted(self.processes, key=lambda p: p.pid)
-        for row, process in enumerate(zip(original_processes, processes)):
-            o, p = process
-            for column, item in enumerate([p.pid, p.arrival_time, p.start_time,
-                                           p.complete_time, p.waiting_time(), p.turnaround_time(), ", ".join(map(str, o.cpu_burst_duration)), ", ".join(map(str, o.io_burst_duration))]):
-                new_item = QTableWidgetItem(str(item))
-                table.setItem(row, column, new_item)
-        table.setHorizontalHeaderLabels(headers)
+        view = self.ui_results.results_table
+        set_model(view, ProcessTableModel(self.simulator, view))
+        view.resizeColumnsToContents()
         self.draw_gantt_chart()
         self.show_logs()
         self.ui_results.exec()
 
     def read_from_file(self):
-        file_name, _ = QFileDialog.getOpenFileName(self, "Choose File", filter="*.txt")
+        file_name, _ = QFileDialog.getOpenFileName(self, "Choose File", filter="Workloads (*.txt *.wkl)")
         if not file_name:
             return
+        print("Reading processes from file")
+        try:
+            workload = read_workload(file_name)
+        except WorkloadFormatError as e:
+            self.ui.statusbar.showMessage(str(e))
+            return
         self.ui.file_name.setText(f"File Name: {file_name}")
         self.ui.run_button.setEnabled(True)
-        print("Reading processes from file")
-        with open(file_name, "r") as f:
-            lines = f.readlines()
-            for line in lines:
-                if not line or line == "\n" or line.startswith("#"):
-                    continue
-                values = line.strip().split("\t")
-                process = Process()
-                process.pid = int(values[0])
-                process.arrival_time = int(values[1])
-                bursts = values[2:]
-                for i, burst in enumerate(bursts):
-                    burst = int(burst)
-                    if i % 2 == 0:
-                        process.cpu_burst_duration.append(burst)
-                    else:
-                        process.io_burst_duration.append(burst)
-                self.processes.append(process)
+        self.processes.extend(workload)
         self.processes = sorted(self.processes, key=lambda p: p.arrival_time)
-        self.original_processes = deepcopy(self.processes)
 
     def generate_processes(self):
-        if not len(self.original_processes) == 0:
+        if not len(self.processes) == 0:
             return
         print("generating processes")
         max_number_of_processes = int(self.ui.max_number_of_processes.text())
@@ -157,38 +194,32 @@ class MainWindow(QMainWindow):
         min_io_burst_duration = int(self.ui.min_io_burst_duration.text())
         max_cpu_burst_duration = int(self.ui.max_cpu_burst_duration.text())
         min_cpu_burst_duration = int(self.ui.min_cpu_burst_duration.text())
-        number_of_processes = randint(2, max_number_of_processes)
-
-        print(f"number of processes {number_of_processes}")
-        for index in range(number_of_processes):
-            new_process = Process()
-            new_process.pid = index
-            new_process.arrival_time = randint(0, max_arrival_time)
-            new_process.number_of_cpu_bursts = randint(2, max_no_of_cpu_bursts)
-            for i in range(new_process.number_of_cpu_bursts):
-                new_process.cpu_burst_duration.append(randint(min_cpu_burst_duration, max_cpu_burst_duration))
-            max_number_of_io_burst = new_process.number_of_cpu_bursts - 1
-            for i in range(max_number_of_io_burst):
-                new_process.io_burst_duration.append(randint(min_io_burst_duration, max_io_burst_duration))
-            self.processes.append(new_process)
-        self.processes = sorted(self.processes, key=lambda p: p.arrival_time)
-        self.original_processes = deepcopy(self.processes)
+        # the seed is shown so a generated workload can be made again
+        seed = random.randrange(1 << 32)
+        number_of_processes = random.Random(seed).randint(2, max_number_of_processes)
+        workload = generate(number_of_processes, seed, arrivals=UniformArrivals(max_arrival_time),
+                            cpu_bursts_per_process=Uniform(2, max_no_of_cpu_bursts),
+                            cpu=Uniform(min_cpu_burst_duration, max_cpu_burst_duration),
+                            io=Uniform(min_io_burst_duration, max_io_burst_duration))
+        print(f"number of processes {len(workload)}")
+        self.ui.statusbar.showMessage(f"Generated {len(workload)} processes with seed {seed}")
+        self.processes = list(workload)
 
     def save_to_file(self):
-        if len(self.original_processes) == 0:
+        if len(self.processes) == 0:
             self.generate_processes()
+        file_name, selected_filter = QFileDialog.getSaveFileName(self, "Save Processes", "saved_processes.txt",
+                                                                 f"{TEXT_FILTER};;{BINARY_FILTER}")
+        if not file_name:
+            return
         print("saving processes to file")
-        with open("saved_processes.txt", "w") as file:
-            lines = []
-            for process in self.original_processes:
-                all_bursts = [x for pair in zip(process.io_burst_duration, process.cpu_burst_duration) for x in pair]
-                all_bursts_str = "\t".join(map(str, all_bursts))
-                process_str = f"{process.pid}\t{process.arrival_time}\t{all_bursts_str}\n"
-                lines.append(process_str)
-            file.writelines(lines)
-
-
-app = QApplication(sys.argv)
-window = MainWindow()
-window.show()
-app.exec()
+        write_workload(as_workload(self.processes), file_name,
+                       FORMAT_BINARY if selected_filter == BINARY_FILTER else FORMAT_TEXT)
+        self.ui.statusbar.showMessage(f"Saved {len(self.processes)} processes to {file_name}")
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    app.exec()
@@ -0,0 +1,160 @@
+from array import array
+from typing import Iterable
+
+# latency metrics collected while the simulator runs, nothing is kept per process. Every metric goes into a
+# log linear histogram (like HdrHistogram): values below 2**(SUB_BUCKET_BITS + 1) are exact, larger ones share
+# a bucket with values less than 1 / 2**SUB_BUCKET_BITS of them away. Histograms with the same settings merge by
+# adding their counts, so the results of several runs or shards can be combined
+
+SUB_BUCKET_BITS = 7
+# slowdowns are recorded in hundredths
+SLOWDOWN_SCALE = 100
+LEVELS = ("RR1", "RR2", "SRTF", "FCFS")
+METRICS = ("response_time", "waiting_time", "turnaround_time", "slowdown")
+PERCENTILES = (50, 95, 99)
+
+
+def bucket_index(value: int) -> int:
+    shift = max(0, value.bit_length() - SUB_BUCKET_BITS - 1)
+    return (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+
+def bucket_value(index: int) -> float:
+    # middle of the values that fall into the bucket
+    shift = max(0, (index >> SUB_BUCKET_BITS) - 1)
+    low = (index - (shift << SUB_BUCKET_BITS)) << shift
+    return low + ((1 << shift) - 1) / 2
+
+
+class LatencyHistogram:
+    def __init__(self, scale: int = 1):
+        # values are multiplied by scale and rounded before they are counted
+        self.scale = scale
+        self.counts = array("q")
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value: float):
+        if value < 0:
+            raise ValueError("latencies can't be negative")
+        index = bucket_index(round(value * self.scale))
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend(array("q", [0]) * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+
+    def merge(self, other: "LatencyHistogram"):
+        if other.scale != self.scale:
+            raise ValueError("histograms with different scales can't be merged")
+        if len(other.counts) > len(self.counts):
+            self.counts.extend(array("q", [0]) * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        # smallest recorded bucket with at least percent % of the values at or below it, clamped to the
+        # exact min and max
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(max(bucket_value(index) / self.scale, self.min), self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        result = {"count": self.count, "mean": round(self.mean(), 3), "max": self.max}
+        for percent in PERCENTILES:
+            result[f"p{percent}"] = round(self.percentile(percent), 3)
+        return result
+
+
+class LevelMetrics:
+    # histograms of the processes that finished their last burst in one queue level
+    def __init__(self):
+        self.histograms = {name: LatencyHistogram(SLOWDOWN_SCALE if name == "slowdown" else 1) for name in METRICS}
+
+    def merge(self, other: "LevelMetrics"):
+        for name, histogram in self.histograms.items():
+            histogram.merge(other.histograms[name])
+
+    def as_dict(self) -> dict:
+        return {name: histogram.as_dict() for name, histogram in self.histograms.items()}
+
+
+class MetricsCollector:
+    # per process:
+    #   response time: arrival until it first runs
+    #   waiting time: time spent ready in a queue, turnaround without the cpu and io time
+    #   turnaround time: arrival until it terminates
+    #   slowdown: turnaround time over the time the process would take alone (its cpu and io time)
+    # and for the run: terminated processes per time unit and context switches (a cpu runs a
+    # different process than in its previous gantt chart segment)
+    def __init__(self):
+        self.levels = {level: LevelMetrics() for level in LEVELS}
+        self.terminated = 0
+        self.context_switches = 0
+        # pid of the last segment of every core
+        self.last_pids: dict[int, int] = {}
+
+    def add_process(self, level: str, arrival_time: int, start_time: int, complete_time: int, cpu_time: int,
+                    io_time: int):
+        turnaround_time = complete_time - arrival_time
+        histograms = self.levels[level].histograms
+        histograms["response_time"].add(start_time - arrival_time)
+        histograms["waiting_time"].add(turnaround_time - cpu_time - io_time)
+        histograms["turnaround_time"].add(turnaround_time)
+        histograms["slowdown"].add(turnaround_time / max(1, cpu_time + io_time))
+        self.terminated += 1
+
+    def add_segment(self, core: int, pid: int):
+        last_pid = self.last_pids.get(core)
+        if last_pid is not None and last_pid != pid:
+            self.context_switches += 1
+        self.last_pids[core] = pid
+
+    def overall(self) -> LevelMetrics:
+        return merge_levels(self.levels.values())
+
+    def merge(self, other: "MetricsCollector"):
+        # combine the metrics of another run or shard, its context switches are added as they are
+        for level, metrics in self.levels.items():
+            metrics.merge(other.levels[level])
+        self.terminated += other.terminated
+        self.context_switches += other.context_switches
+
+    def throughput(self, elapsed_time: int) -> float:
+        return self.terminated / elapsed_time if elapsed_time > 0 else 0.0
+
+    def as_dict(self, elapsed_time: int) -> dict:
+        return {
+            "terminated": self.terminated,
+            "throughput": round(self.throughput(elapsed_time), 6),
+            "context_switches": self.context_switches,
+            "overall": self.overall().as_dict(),
+            "levels": {level: metrics.as_dict() for level, metrics in self.levels.items()},
+        }
+
+
+def merge_levels(levels: Iterable[LevelMetrics]) -> LevelMetrics:
+    merged = LevelMetrics()
+    for metrics in levels:
+        merged.merge(metrics)
+    return merged
@@ -0,0 +1,451 @@
+from array import array
+from heapq import heappop
+from typing import Optional, Union
+
+from event_log import LOG_ALL, PROCESSING, FINISHED_LIMIT, FINISHED_QUANTUM, PREEMPTED, FINISHED_IO
+from indexed_heap import IndexedHeap
+from prediction import ORDER_REMAINING
+from process import Process
+from queue_history import QUEUE_RR1, QUEUE_RR2, QUEUE_SRTF, QUEUE_FCFS, ENQUEUE, DEQUEUE, DEMOTE
+from ready_queue import ReadyQueue
+from simulation import NEW, NEW_ADDED, READY, RUNNING, GanttChart, Simulator
+from workload import Workload
+
+ALGOS = ("RR1", "RR2", "SRTF", "FCFS")
+
+QueueSet = tuple[ReadyQueue, ReadyQueue, IndexedHeap, ReadyQueue]
+
+
+class Core:
+    def __init__(self, index: int, queues: QueueSet):
+        self.index = index
+        # queue1..queue4 this core takes processes from, shared by all cores with a global queue
+        self.queues = queues
+        # process running on this core in the current time unit and the queue level it came from
+        self.current: Optional[int] = None
+        self.level = QUEUE_RR1
+        # start of the current round robin 1 quantum, the core keeps its process until the quantum ends
+        self.segment_start = 0
+        self.in_quantum = False
+        # last process this core ran from SRTF, running another one preempts it
+        self.prev: Optional[int] = None
+        self.busy_time = 0
+
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self.queues)
+
+
+class MultiCoreSimulator(Simulator):
+    # the same MLFQ on several cpus that advance together one time unit at a time. Every free core takes
+    # the highest priority process that isn't running on another core; with a global queue all cores share
+    # queue1..queue4, otherwise every core has its own queues, arrivals go to the least loaded core,
+    # processes come back from IO to the core they left, idle cores steal work and the queues are
+    # balanced every balance_interval time units. With one core the results are the same as Simulator.
+    # Round robin 1 keeps its core for a whole quantum, the other levels are chosen again every unit,
+    # event_driven only skips time when every core is idle.
+    def __init__(self, processes: Union[Workload, list[Process]], q1: int, q2: int, alpha: float, cores: int = 1,
+                 global_queue: bool = True, balance_interval: int = 0, work_stealing: bool = True,
+                 event_driven: bool = False, log_level: int = LOG_ALL, max_log_events: int = None,
+                 queue3_order: str = ORDER_REMAINING, record_history: bool = True):
+        super().__init__(processes, q1, q2, alpha, event_driven=event_driven, log_level=log_level,
+                         max_log_events=max_log_events, queue3_order=queue3_order, record_history=record_history)
+        if cores < 1:
+            raise ValueError("at least one core is needed")
+        self.global_queue = global_queue
+        self.balance_interval = 0 if global_queue else balance_interval
+        self.work_stealing = work_stealing and not global_queue
+        self.cores = [Core(c, self.ready_queues() if global_queue or c == 0 else
+                           (ReadyQueue(), ReadyQueue(), IndexedHeap(), ReadyQueue())) for c in range(cores)]
+        self.last_core = array("i", [-1]) * len(self.workload)
+        # level of the recent queue of a blocked process, with last_core it gives the queue the process returns
+        # to without looking through the queues of every core
+        self.recent_level = array("b", [QUEUE_RR1]) * len(self.workload)
+        # core whose prev is the process, so forget_prev doesn't look at every core
+        self.prev_core = array("i", [-1]) * len(self.workload)
+        # a process ran on a different core than the last time, processes moved by stealing and balancing
+        self.migrations = 0
+        self.steals = 0
+        self.balance_moves = 0
+
+    def queue_sets(self) -> list[QueueSet]:
+        return [self.cores[0].queues] if self.global_queue else [core.queues for core in self.cores]
+
+    def queue_depths(self) -> tuple[int, int, int, int, int]:
+        depths = [0, 0, 0, 0]
+        for queues in self.queue_sets():
+            for level, queue in enumerate(queues):
+                depths[level] += len(queue)
+        return depths[0], depths[1], depths[2], depths[3], len(self.io_queue)
+
+    def has_ready_processes(self) -> bool:
+        return any(queue for queues in self.queue_sets() for queue in queues)
+
+    def core_loads(self) -> list[int]:
+        # waiting processes of every core and the one it runs
+        return [core.waiting() + (core.current is not None) for core in self.cores]
+
+    def least_loaded_core(self, loads: list[int]) -> Core:
+        # loads from core_loads(), counted once for all processes arriving together and updated here
+        if self.global_queue:
+            return self.cores[0]
+        c = loads.index(min(loads))
+        loads[c] += 1
+        return self.cores[c]
+
+    def check_arrived_processes(self):
+        loads = None
+        while self.next_arrival_index < len(self.arrival_order) and \
+                self.arrival_times[self.arrival_order[self.next_arrival_index]] <= self.current_time:
+            i = self.arrival_order[self.next_arrival_index]
+            self.next_arrival_index += 1
+            if self.states[i] == NEW:
+                self.states[i] = NEW_ADDED
+                if loads is None and not self.global_queue:
+                    loads = self.core_loads()
+                self.least_loaded_core(loads).queues[QUEUE_RR1].put(i)
+                self.record_queue_event(QUEUE_RR1, ENQUEUE, i)
+
+    def check_io_queue(self):
+        # like Simulator, the recent queue of a process belongs to the core it ran on
+        while self.io_queue and self.io_queue[0][0] <= self.current_time:
+            _, _, i = heappop(self.io_queue)
+            self.add_to_log("IO", FINISHED_IO, i)
+            self.io_burst_index[i] += 1
+            self.states[i] = READY
+            # a process in IO isn't moved by stealing or balancing, it is still on the core it ran on
+            level = self.recent_level[i]
+            queue = self.cores[self.last_core[i]].queues[level]
+            if level == QUEUE_SRTF:
+                queue.push(i, self.queue3_key(i), i)
+            else:
+                queue.put(i)
+            self.record_queue_event(level, ENQUEUE, i)
+
+    def finish_burst(self, algo: str, queue):
+        self.recent_level[self.current] = ALGOS.index(algo)
+        super().finish_burst(algo, queue)
+
+    def add_segment(self, core: Core, i: int, start_time: int, algo: str):
+        self.metrics.add_segment(core.index, self.pids[i])
+        self.gantt_chart.append(GanttChart(self.pids[i], start_time, self.current_time, algo, core.index))
+
+    def forget_prev(self, i: int):
+        # a process only counts as preempted on the last core that ran it from SRTF
+        c = self.prev_core[i]
+        if c != -1:
+            self.cores[c].prev = None
+            self.prev_core[i] = -1
+
+    def set_prev(self, core: Core, i: int):
+        self.forget_prev(i)
+        if core.prev is not None:
+            self.prev_core[core.prev] = -1
+        core.prev = i
+        self.prev_core[i] = core.index
+
+    def candidates(self, queues: QueueSet, count: int, running: set[int]) -> list[tuple[int, int]]:
+        # up to count (process, level) pairs in priority order, leaving out processes running on other cores
+        found = []
+        for level, queue in enumerate(queues):
+            for i in queue.in_order() if level == QUEUE_SRTF else queue:
+                if i not in running:
+                    found.append((i, level))
+                    if len(found) == count:
+                        return found
+        return found
+
+    def dispatch(self, core: Core, i: int, level: int, running: set[int]) -> bool:
+        # start running process i on the core for this time unit, False if it finished without running
+        # (an empty cpu burst) and the core has to choose again
+        if self.last_core[i] not in (-1, core.index):
+            self.migrations += 1
+        self.last_core[i] = core.index
+        self.current = core.current = i
+        core.level = level
+        queues = core.queues
+        if level == QUEUE_RR1:
+            queues[QUEUE_RR1].remove(i)
+            self.record_queue_event(QUEUE_RR1, DEQUEUE, i)
+            if self.start_time[i] == -1:
+                self.start_time[i] = self.current_time
+            core.segment_start = self.current_time
+            self.add_to_log("RR1", PROCESSING, i)
+            core.in_quantum = self.check_round_robin_1(core)
+            if not core.in_quantum:
+                core.current = None
+            return core.in_quantum
+        if level == QUEUE_RR2:
+            self.states[i] = RUNNING
+            self.add_to_log("RR2", PROCESSING, i)
+            if self.processes_start_time[i] == 0:
+                self.processes_start_time[i] = self.current_time
+            return True
+        if self.processes_start_time[i] == 0:
+            self.processes_start_time[i] = self.current_time
+        if level == QUEUE_SRTF:
+            # a process running on another core wasn't preempted
+            prev = core.prev
+            if prev is not None and prev != i and prev not in running:
+                self.preempted[prev] += 1
+                if self.preempted[prev] >= 3 and prev in queues[QUEUE_SRTF]:
+                    self.add_to_log("SRTF", PREEMPTED, prev, self.pids[i])
+                    queues[QUEUE_SRTF].remove(prev)
+                    queues[QUEUE_FCFS].put(prev)
+                    self.record_queue_event(QUEUE_FCFS, DEMOTE, prev)
+            self.states[i] = RUNNING
+            self.set_prev(core, i)
+            self.add_to_log("SRTF", PROCESSING, i)
+            queues[QUEUE_SRTF].update(i, self.queue3_key(i, 1))
+            return True
+        self.states[i] = RUNNING
+        self.add_to_log("FCFS", PROCESSING, i)
+        return True
+
+    def check_round_robin_1(self, core: Core) -> bool:
+        # end of a round robin 1 time unit, True while the process keeps the core
+        i = self.current = core.current
+        current_burst = self.remaining_burst[i]
+        queues = core.queues
+        if current_burst == 0:
+            self.add_segment(core, i, core.segment_start, "RR1")
+            self.round_robin_1_process_total_cpu_duration_for_burst[i] = 0
+            self.finish_burst("RR1", queues[QUEUE_RR1])
+            return False
+        if current_burst > 0 and self.round_robin_1_process_total_cpu_duration_for_burst[i] == 10 * self.q1:
+            self.round_robin_1_process_total_cpu_duration_for_burst[i] = 0
+            self.states[i] = READY
+            self.add_to_log("RR1", FINISHED_LIMIT, i)
+            queues[QUEUE_RR2].put(i)
+            self.record_queue_event(QUEUE_RR2, DEMOTE, i)
+            self.add_segment(core, i, core.segment_start, "RR1")
+            return False
+        if current_burst > 0 and self.current_time == core.segment_start + self.q1:
+            self.states[i] = READY
+            queues[QUEUE_RR1].put(i)
+            self.record_queue_event(QUEUE_RR1, ENQUEUE, i)
+            self.add_to_log("RR1", FINISHED_QUANTUM, i)
+            self.add_segment(core, i, core.segment_start, "RR1")
+            return False
+        return True
+
+    def check_round_robin_2(self, core: Core):
+        i = self.current = core.current
+        current_burst = self.remaining_burst[i]
+        queue = core.queues[QUEUE_RR2]
+        start_time = self.processes_start_time[i]
+        if current_burst == 0:
+            queue.remove(i)
+            self.record_queue_event(QUEUE_RR2, DEQUEUE, i)
+            self.finish_burst("RR2", queue)
+            self.round_robin_2_process_burst_cpu_duration[i] = 0
+            self.round_robin_2_process_total_cpu_duration_for_burst[i] = 0
+            self.add_segment(core, i, start_time, "RR2")
+            self.processes_start_time[i] = 0
+        elif current_burst > 0 and self.round_robin_2_process_total_cpu_duration_for_burst[i] == 10 * self.q2:
+            self.round_robin_2_process_total_cpu_duration_for_burst[i] = 0
+            self.round_robin_2_process_burst_cpu_duration[i] = 0
+            self.states[i] = READY
+            self.add_to_log("RR2", FINISHED_LIMIT, i)
+            queue.remove(i)
+            core.queues[QUEUE_SRTF].push(i, self.queue3_key(i), i)
+            self.record_queue_event(QUEUE_SRTF, DEMOTE, i)
+            self.add_segment(core, i, start_time, "RR2")
+            self.processes_start_time[i] = 0
+        elif current_burst > 0 and self.round_robin_2_process_burst_cpu_duration[i] == self.q2:
+            self.round_robin_2_process_burst_cpu_duration[i] = 0
+            self.states[i] = READY
+            queue.rotate(i)
+            self.record_queue_event(QUEUE_RR2, DEQUEUE, i)
+            self.record_queue_event(QUEUE_RR2, ENQUEUE, i)
+            self.add_to_log("RR2", FINISHED_QUANTUM, i)
+            self.add_segment(core, i, start_time, "RR2")
+            self.processes_start_time[i] = 0
+        else:
+            self.states[i] = READY
+
+    def check_shortest_remaining_time_first(self, core: Core):
+        i = self.current = core.current
+        current_burst = self.remaining_burst[i]
+        if current_burst == 0:
+            queue = core.queues[QUEUE_SRTF]
+            queue.remove(i)
+            self.record_queue_event(QUEUE_SRTF, DEQUEUE, i)
+            self.forget_prev(i)
+            self.finish_burst("SRTF", queue)
+            self.add_segment(core, i, self.processes_start_time[i], "SRTF")
+            self.processes_start_time[i] = 0
+        elif current_burst > 0:
+            self.states[i] = READY
+
+    def check_first_come_first_served(self, core: Core):
+        i = self.current = core.current
+        current_burst = self.remaining_burst[i]
+        if current_burst == 0:
+            queue = core.queues[QUEUE_FCFS]
+            queue.remove(i)
+            self.record_queue_event(QUEUE_FCFS, DEQUEUE, i)
+            self.finish_burst("FCFS", queue)
+            self.add_segment(core, i, self.processes_start_time[i], "FCFS")
+            self.processes_start_time[i] = 0
+        elif current_burst > 0:
+            self.states[i] = READY
+
+    def move(self, i: int, level: int, source: Core, destination: Core):
+        # move a waiting process to the same level of another core
+        if level == QUEUE_SRTF:
+            key = source.queues[QUEUE_SRTF].key(i)
+            source.queues[QUEUE_SRTF].remove(i)
+            destination.queues[QUEUE_SRTF].push(i, key, i)
+        else:
+            source.queues[level].remove(i)
+            destination.queues[level].put(i)
+        self.forget_prev(i)
+
+    def victims(self) -> list[Core]:
+        # cores with waiting processes, busiest first, in the order they had when the scheduling pass began
+        waiting = [(-core.waiting(), core.index) for core in self.cores]
+        return [self.cores[c] for count, c in sorted(waiting) if count]
+
+    def steal(self, thief: Core, running: set[int], victims: list[Core]) -> bool:
+        # an idle core takes the highest priority waiting process of the busiest core. A victim without a
+        # process that can move is dropped from victims, nothing is added to its queues later in the pass
+        k = 0
+        while k < len(victims):
+            victim = victims[k]
+            if victim is thief:
+                k += 1
+                continue
+            found = self.candidates(victim.queues, 1, running)
+            if found:
+                i, level = found[0]
+                self.move(i, level, victim, thief)
+                self.steals += 1
+                return True
+            del victims[k]
+        return False
+
+    def balance(self):
+        # move waiting processes from the busiest to the least busy core until they differ by one at most,
+        # the lowest priority process at the tail of its queue moves first
+        waiting = [core.waiting() for core in self.cores]
+        while True:
+            busiest = waiting.index(max(waiting))
+            idlest = waiting.index(min(waiting))
+            if waiting[busiest] - waiting[idlest] <= 1:
+                return
+            for level in (QUEUE_FCFS, QUEUE_SRTF, QUEUE_RR2, QUEUE_RR1):
+                i = self.cores[busiest].queues[level].last()
+                if i is not None:
+                    self.move(i, level, self.cores[busiest], self.cores[idlest])
+                    self.balance_moves += 1
+                    waiting[busiest] -= 1
+                    waiting[idlest] += 1
+                    break
+
+    def schedule(self, free: list[Core], running: set[int]):
+        # choose a process for every free core
+        if not self.global_queue:
+            victims = None
+            for core in free:
+                while True:
+                    found = self.candidates(core.queues, 1, running)
+                    if not found and self.work_stealing:
+                        if victims is None:
+                            victims = self.victims()
+                        if self.steal(core, running, victims):
+                            found = self.candidates(core.queues, 1, running)
+                    if not found:
+                        break
+                    i, level = found[0]
+                    if self.dispatch(core, i, level, running):
+                        running.add(i)
+                        break
+            return
+        while free:
+            found = self.candidates(self.cores[0].queues, len(free), running)
+            if not found:
+                return
+            # a process goes back to the core it last ran on when that core is free
+            assignment: dict[int, tuple[int, int]] = {}
+            rest = []
+            free_indexes = {core.index for core in free}
+            for i, level in found:
+                last = self.last_core[i]
+                if last in free_indexes and last not in assignment:
+                    assignment[last] = (i, level)
+                else:
+                    rest.append((i, level))
+            for core in free:
+                if core.index not in assignment and rest:
+                    assignment[core.index] = rest.pop(0)
+            running.update(i for i, _ in assignment.values())
+            again = []
+            for core in free:
+                if core.index not in assignment:
+                    continue
+                i, level = assignment[core.index]
+                if not self.dispatch(core, i, level, running - {i}):
+                    running.discard(i)
+                    again.append(core)
+            if not again:
+                return
+            free = again
+
+    def finished(self) -> bool:
+        # a round robin 1 quantum that started before max_time still runs to its end
+        working = (self.terminated_count < len(self.workload) or self.has_ready_processes()) and \
+            self.current_time < self.max_time
+        return not working and not any(core.in_quantum for core in self.cores)
+
+    def run_step(self):
+        # one time unit on every core, or a jump to the next event when all of them are idle
+        working = (self.terminated_count < len(self.workload) or self.has_ready_processes()) and \
+            self.current_time < self.max_time
+        self.check_arrived_processes()
+        busy = [core for core in self.cores if core.in_quantum]
+        if working:
+            if self.balance_interval and self.current_time % self.balance_interval == 0:
+                self.balance()
+            free = [core for core in self.cores if not core.in_quantum]
+            self.schedule(free, {core.current for core in busy})
+            busy = [core for core in self.cores if core.current is not None]
+        if not busy:
+            units = self.units_to_run(self.max_time - self.current_time)
+            self.tick(units)
+            self.free_cpu_time += units
+            return
+        for core in busy:
+            i = core.current
+            self.remaining_burst[i] -= 1
+            self.remaining_cpu_time[i] -= 1
+            core.busy_time += 1
+            if core.level == QUEUE_RR1:
+                self.round_robin_1_process_total_cpu_duration_for_burst[i] += 1
+            elif core.level == QUEUE_RR2:
+                self.round_robin_2_process_total_cpu_duration_for_burst[i] += 1
+                self.round_robin_2_process_burst_cpu_duration[i] += 1
+        self.tick(1)
+        for core in busy:
+            if core.level == QUEUE_RR1:
+                self.states[core.current] = RUNNING
+                core.in_quantum = self.check_round_robin_1(core)
+            elif core.level == QUEUE_RR2:
+                self.check_round_robin_2(core)
+            elif core.level == QUEUE_SRTF:
+                self.check_shortest_remaining_time_first(core)
+            else:
+                self.check_first_come_first_served(core)
+            if not core.in_quantum:
+                core.current = None
+
+    def core_utilization(self) -> list[float]:
+        if self.current_time <= 0:
+            return [0] * len(self.cores)
+        return [round(core.busy_time / self.current_time * 100, 1) for core in self.cores]
+
+    def cpu_utilization(self):
+        # busy time of all cores over the time all of them were available
+        if self.current_time <= 0:
+            return 0
+        busy_time = sum(core.busy_time for core in self.cores)
+        return round(busy_time / (self.current_time * len(self.cores)) * 100, 1)
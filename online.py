@@ -0,0 +1,264 @@
+import json
+import sys
+from array import array
+from collections import deque
+from typing import AsyncIterable, Callable, Iterable, Optional, Sequence, TextIO, Union
+
+from event_log import LOG_OFF, LogEvent, format_event
+from prediction import ORDER_REMAINING
+from process import Process
+from queue_history import QUEUE_RR1, ENQUEUE
+from simulation import NEW_ADDED, TERMINATED, GanttChart, Simulator
+from workload import Workload, check_cpu_bursts
+
+# online mode: processes are read from an iterator (or an async iterable) only when they arrive, terminated
+# processes are folded into the streaming metrics and their slots reused, gantt chart segments and log events go
+# to a sink instead of lists. Memory depends on how many processes are in the system at once, not on the
+# length of the trace. Processes must come in arrival time order, a late one is added when it is read
+
+# (pid, arrival time, bursts in file order: cpu, io, cpu, ...) as yielded by workload_io.iter_text_workload
+Arrival = tuple[int, int, Sequence[int]]
+# per process arrays of the Simulator and their value for a new process
+SLOT_COLUMNS = (("cpu_burst_index", 0), ("io_burst_index", 0), ("remaining_burst", 0), ("remaining_cpu_time", 0),
+                ("preempted", 0), ("start_time", -1), ("complete_time", -1),
+                ("round_robin_1_process_total_cpu_duration_for_burst", 0),
+                ("round_robin_2_process_total_cpu_duration_for_burst", 0),
+                ("round_robin_2_process_burst_cpu_duration", 0), ("processes_start_time", 0))
+
+
+def as_arrival(item: Union[Process, Arrival]) -> Arrival:
+    if not isinstance(item, Process):
+        return item
+    # same layout as Workload.append
+    bursts = []
+    cpu_bursts, io_bursts = item.cpu_burst_duration, item.io_burst_duration
+    for k, cpu in enumerate(cpu_bursts):
+        if k > 0:
+            bursts.append(io_bursts[k - 1] if k - 1 < len(io_bursts) else 0)
+        bursts.append(cpu)
+    return item.pid, item.arrival_time, bursts
+
+
+class Sink:
+    # receives the gantt chart segments and log events of an OnlineSimulator as they happen, drops them
+    def add_segment(self, segment: GanttChart):
+        pass
+
+    def add_event(self, event: LogEvent):
+        pass
+
+    def close(self):
+        pass
+
+
+class ListSink(Sink):
+    # the most recent max_items segments and events, all of them without max_items
+    def __init__(self, max_items: int = None):
+        self.gantt_chart: deque[GanttChart] = deque(maxlen=max_items)
+        self.events: deque[LogEvent] = deque(maxlen=max_items)
+
+    def add_segment(self, segment: GanttChart):
+        self.gantt_chart.append(segment)
+
+    def add_event(self, event: LogEvent):
+        self.events.append(event)
+
+
+class CallbackSink(Sink):
+    def __init__(self, on_segment: Callable[[GanttChart], None] = None, on_event: Callable[[LogEvent], None] = None):
+        self.on_segment = on_segment
+        self.on_event = on_event
+
+    def add_segment(self, segment: GanttChart):
+        if self.on_segment is not None:
+            self.on_segment(segment)
+
+    def add_event(self, event: LogEvent):
+        if self.on_event is not None:
+            self.on_event(event)
+
+
+class JsonLinesSink(Sink):
+    # one json object per segment and event, a file name is opened and closed by the sink
+    def __init__(self, file: Union[str, TextIO]):
+        self.owns_file = isinstance(file, str)
+        self.file = open(file, "w") if self.owns_file else file
+
+    def write(self, record: dict):
+        self.file.write(json.dumps(record, separators=(",", ":")))
+        self.file.write("\n")
+
+    def add_segment(self, segment: GanttChart):
+        self.write({"type": "segment", "pid": segment.pid, "start_time": segment.start_time,
+                    "end_time": segment.end_time, "algo": segment.algo})
+
+    def add_event(self, event: LogEvent):
+        self.write({"type": "event", "time": event.time, "algo": event.algo, "pid": event.pid, "kind": event.kind,
+                    "detail": event.detail, "message": format_event(event)})
+
+    def close(self):
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class ProcessSlots:
+    # workload of the processes in the system with the methods the Simulator reads, slots of terminated
+    # processes are reused
+    def __init__(self):
+        self.pids = array("q")
+        self.arrival_times = array("q")
+        self.bursts: list[Sequence[int]] = []
+        self.free: list[int] = []
+
+    def __len__(self):
+        return len(self.bursts)
+
+    def add(self, pid: int, arrival_time: int, bursts: Sequence[int]) -> int:
+        check_cpu_bursts(bursts[0::2])
+        if self.free:
+            i = self.free.pop()
+            self.pids[i] = pid
+            self.arrival_times[i] = arrival_time
+            self.bursts[i] = bursts
+            return i
+        self.pids.append(pid)
+        self.arrival_times.append(arrival_time)
+        self.bursts.append(bursts)
+        return len(self.bursts) - 1
+
+    def release(self, i: int):
+        # the pid stays readable until the slot is reused
+        self.bursts[i] = ()
+        self.free.append(i)
+
+    def number_of_cpu_bursts(self, i: int) -> int:
+        return (len(self.bursts[i]) + 1) // 2
+
+    def cpu_burst(self, i: int, k: int) -> int:
+        return self.bursts[i][2 * k]
+
+    def io_burst(self, i: int, k: int) -> int:
+        bursts = self.bursts[i]
+        return bursts[2 * k + 1] if 2 * k + 1 < len(bursts) else 0
+
+    def total_cpu_time(self, i: int) -> int:
+        return sum(self.bursts[i][0::2])
+
+
+class OnlineSimulator(Simulator):
+    # the same MLFQ as Simulator fed from arrivals, runs until horizon or, without one, until the source
+    # is exhausted and every process terminated. An async iterable is run with run_async(). The queue history
+    # isn't recorded, queues_at() is not available
+    def __init__(self, arrivals: Union[Iterable[Union[Process, Arrival]], AsyncIterable[Union[Process, Arrival]]],
+                 q1: int, q2: int, alpha: float, event_driven: bool = True, horizon: int = None, sink: Sink = None,
+                 log_level: int = LOG_OFF, queue3_order: str = ORDER_REMAINING):
+        # the queue history would grow with the trace
+        super().__init__(Workload(), q1, q2, alpha, event_driven=event_driven, log_level=log_level,
+                         queue3_order=queue3_order, record_history=False)
+        self.max_time = horizon if horizon is not None else sys.maxsize
+        self.workload = self.processes = ProcessSlots()
+        self.pids = self.workload.pids
+        self.arrival_times = self.workload.arrival_times
+        for name, _ in SLOT_COLUMNS:
+            setattr(self, name, array("q"))
+        self.sink = sink if sink is not None else Sink()
+        # processes read from the source that haven't arrived yet
+        self.pending: deque[Arrival] = deque()
+        is_async = hasattr(arrivals, "__aiter__")
+        self.source = None if is_async else iter(arrivals)
+        self.async_source = arrivals if is_async else None
+        # processes in the system
+        self.alive = 0
+        self.arrived_count = 0
+
+    def peek_arrival(self) -> Optional[Arrival]:
+        if not self.pending and self.source is not None:
+            item = next(self.source, None)
+            if item is None:
+                self.source = None
+            else:
+                self.pending.append(as_arrival(item))
+        return self.pending[0] if self.pending else None
+
+    def admit(self, pid: int, arrival_time: int, bursts: Sequence[int]):
+        i = self.workload.add(pid, arrival_time, bursts)
+        if i == len(self.states):
+            self.states.append(NEW_ADDED)
+            for name, default in SLOT_COLUMNS:
+                getattr(self, name).append(default)
+            self.recent_queue_per_process.append(None)
+            self.predictor.add()
+        else:
+            self.states[i] = NEW_ADDED
+            for name, default in SLOT_COLUMNS:
+                getattr(self, name)[i] = default
+            self.recent_queue_per_process[i] = None
+            self.predictor.reset(i)
+        self.remaining_burst[i] = bursts[0] if bursts else 0
+        self.remaining_cpu_time[i] = self.workload.total_cpu_time(i)
+        self.alive += 1
+        self.arrived_count += 1
+        self.queue1.put(i)
+        self.record_queue_event(QUEUE_RR1, ENQUEUE, i)
+
+    def retire(self, i: int):
+        # the process is already in the metrics
+        self.alive -= 1
+        if self.prev == i:
+            self.prev = None
+        self.workload.release(i)
+
+    def check_arrived_processes(self):
+        while True:
+            arrival = self.peek_arrival()
+            if arrival is None or arrival[1] > self.current_time:
+                return
+            self.pending.popleft()
+            self.admit(*arrival)
+
+    def next_arrival_time(self) -> Optional[int]:
+        arrival = self.peek_arrival()
+        return arrival[1] if arrival is not None else None
+
+    def finish_burst(self, algo: str, queue):
+        super().finish_burst(algo, queue)
+        if self.states[self.current] == TERMINATED:
+            self.retire(self.current)
+
+    def finished(self) -> bool:
+        return (self.alive == 0 and self.peek_arrival() is None) or self.current_time >= self.max_time
+
+    def add_to_log(self, algo: str, kind: int, i: int, detail: int = -1):
+        if self.logs.enabled(kind):
+            self.sink.add_event(LogEvent(self.current_time, algo, self.pids[i], kind, detail))
+
+    def add_to_gantt_chart(self, i: int, start_time: int, algo: str):
+        self.metrics.add_segment(0, self.pids[i])
+        self.sink.add_segment(GanttChart(self.pids[i], start_time, self.current_time, algo))
+
+    async def run_async(self, progress: Callable[["Simulator"], None] = None, progress_every: int = 256):
+        # the simulation only runs up to times for which every arrival is known and waits for the source
+        # otherwise. A round robin 1 quantum can go up to q1 - 1 units past run_until's time, so arrivals
+        # are read until one comes more than q1 units after the clock
+        source = self.async_source.__aiter__()
+        lead = max(self.q1, 1)
+        while self.async_source is not None and not self.cancelled and self.current_time < self.max_time:
+            while not self.pending or self.pending[-1][1] <= self.current_time + lead:
+                try:
+                    item = await source.__anext__()
+                except StopAsyncIteration:
+                    self.async_source = None
+                    break
+                self.pending.append(as_arrival(item))
+            if self.async_source is not None:
+                self.run_until(self.pending[-1][1] - lead, progress, progress_every)
+        self.run_until(None, progress, progress_every)
+
+    def avg_waiting_time(self):
+        # over the terminated processes, the time until they first ran like Simulator.avg_waiting_time()
+        return round(self.metrics.overall().histograms["response_time"].mean(), 1)
+
+    def avg_turnaround_time(self):
+        return round(self.metrics.overall().histograms["turnaround_time"].mean(), 1)
@@ -0,0 +1,79 @@
+import math
+from array import array
+
+# exponential average of the cpu bursts of every process, tau(n+1) = alpha * t(n) + (1 - alpha) * tau(n),
+# updated once per finished burst
+
+# prediction of the first burst of a process, nothing is known about it yet
+INITIAL_PREDICTION = 10.0
+
+# orderings of queue3: remaining cpu time of all bursts (the simulator knows the bursts in advance),
+# predicted time left in the current burst, or predicted length of the current burst (shortest job first)
+ORDER_REMAINING = "remaining"
+ORDER_PREDICTED = "predicted"
+ORDER_SJF = "sjf"
+QUEUE3_ORDERS = (ORDER_REMAINING, ORDER_PREDICTED, ORDER_SJF)
+
+
+class PredictionStats:
+    # errors of the predictions of finished bursts, actual - predicted
+    def __init__(self):
+        self.count = 0
+        self.total_error = 0.0
+        self.total_absolute_error = 0.0
+        self.total_squared_error = 0.0
+        self.total_actual = 0
+
+    def add(self, actual: int, predicted: float):
+        error = actual - predicted
+        self.count += 1
+        self.total_error += error
+        self.total_absolute_error += abs(error)
+        self.total_squared_error += error * error
+        self.total_actual += actual
+
+    def mean_error(self) -> float:
+        # positive when bursts are under predicted
+        return self.total_error / self.count if self.count else 0.0
+
+    def mean_absolute_error(self) -> float:
+        return self.total_absolute_error / self.count if self.count else 0.0
+
+    def root_mean_squared_error(self) -> float:
+        return math.sqrt(self.total_squared_error / self.count) if self.count else 0.0
+
+    def relative_error(self) -> float:
+        # mean absolute error over the mean burst
+        return self.total_absolute_error / self.total_actual if self.total_actual else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "bursts": self.count,
+            "mean_error": round(self.mean_error(), 3),
+            "mean_absolute_error": round(self.mean_absolute_error(), 3),
+            "root_mean_squared_error": round(self.root_mean_squared_error(), 3),
+            "relative_error": round(self.relative_error(), 3),
+        }
+
+
+class BurstPredictor:
+    def __init__(self, number_of_processes: int, alpha: float, initial_prediction: float = INITIAL_PREDICTION):
+        if not 0 <= alpha <= 1:
+            raise ValueError("alpha must be between 0 and 1")
+        self.alpha = alpha
+        self.initial_prediction = initial_prediction
+        # prediction of the current (or next) cpu burst of every process
+        self.predicted = array("d", [initial_prediction]) * number_of_processes
+        self.stats = PredictionStats()
+
+    def observe(self, i: int, burst: int):
+        predicted = self.predicted[i]
+        self.stats.add(burst, predicted)
+        self.predicted[i] = self.alpha * burst + (1 - self.alpha) * predicted
+
+    def reset(self, i: int):
+        # a reused slot of the online simulator
+        self.predicted[i] = self.initial_prediction
+
+    def add(self):
+        self.predicted.append(self.initial_prediction)
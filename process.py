@@ -1,54 +1,41 @@
+from typing import Sequence
+
+
+def as_bursts(bursts: Sequence[int]) -> Sequence[int]:
+    # bursts are copied to a tuple so the process can't be changed, read only views are kept as they are
+    if isinstance(bursts, memoryview) and bursts.readonly:
+        return bursts
+    return tuple(bursts or ())
+
+
 class Process:
+    # workload definition of a process, it is never changed by the simulator so the same processes
+    # can be shared by many runs, the progress of a run is kept in the Simulator
+    __slots__ = ("pid", "arrival_time", "number_of_cpu_bursts", "io_burst_duration", "cpu_burst_duration")
     pid: int
     arrival_time: int
     number_of_cpu_bursts: int
-    io_burst_duration: list[int]
-    cpu_burst_duration: list[int]
-    state: str
-    preempted: int
+    io_burst_duration: Sequence[int]
+    cpu_burst_duration: Sequence[int]
 
     def __init__(self, pid: int = None, arrival_time: int = None, number_of_cpu_bursts: int = None,
-                 io_burst_duration: list[int] = None, cpu_burst_duration: list[int] = None):
+                 io_burst_duration: Sequence[int] = None, cpu_burst_duration: Sequence[int] = None):
         self.pid = pid
         self.arrival_time = arrival_time
-        self.number_of_cpu_bursts = number_of_cpu_bursts
-        self.io_burst_duration = io_burst_duration or []
-        self.cpu_burst_duration = cpu_burst_duration or []
-        self.state = "new" # new, new_added, ready, terminated, blocked
-        self.preempted = 0
-        self.current_cpu_burst_index = 0
-        self.current_io_burst_index = 0
-        # start/end time for the process
-        self.start_time = -1
-        self.complete_time = -1
+        self.io_burst_duration = as_bursts(io_burst_duration)
+        self.cpu_burst_duration = as_bursts(cpu_burst_duration)
+        self.number_of_cpu_bursts = number_of_cpu_bursts if number_of_cpu_bursts is not None \
+            else len(self.cpu_burst_duration)
 
     def __str__(self):
-        return f"{self.pid}-{self.state}"
+        return f"{self.pid}"
 
     def __repr__(self):
         return self.__str__()
 
-    def terminate(self, complete_time: int):
-        self.state = "terminated"
-        self.current_cpu_burst_index = 0
-        self.current_io_burst_index = 0
-        self.complete_time = complete_time
-
-    def is_terminated(self):
-        return self.state == "terminated"
-
-    def total_remaining_cpu_bursts(self):
+    def total_cpu_bursts(self):
         return sum(self.cpu_burst_duration)
 
-    def is_cpu_bursts_completed(self):
-        return self.current_cpu_burst_index == len(self.cpu_burst_duration) - 1
-
-    def waiting_time(self):
-        return self.start_time - self.arrival_time
-
-    def turnaround_time(self):
-        return self.complete_time - self.arrival_time
-
     def predicted_cpu_bursts(self, a: float):
         predicted = []
         prev_burst = 0
@@ -56,4 +43,4 @@ class Process:
             next_burst = a * cpu + (1.0 - a) * prev_burst
             prev_burst = next_burst
             predicted.append(next_burst)
-            return sum(predicted)
\ No newline at end of file
+        return sum(predicted)
@@ -0,0 +1,76 @@
+from array import array
+from bisect import bisect_right
+
+# ready queue ids, same order as queue1..queue4 in the simulator
+QUEUE_RR1 = 0
+QUEUE_RR2 = 1
+QUEUE_SRTF = 2
+QUEUE_FCFS = 3
+NUMBER_OF_QUEUES = 4
+
+# queue operations
+ENQUEUE = 0
+DEQUEUE = 1
+# remove from the queue above (if it is still there) and add to this queue
+DEMOTE = 2
+
+RECORD_SIZE = 4
+EMPTY_QUEUES = (array("i"),) * NUMBER_OF_QUEUES
+
+
+class QueueHistory:
+    # records every change to the ready queues as (time, queue_id, op, pid) integers in a flat array,
+    # queue contents at any time are rebuilt by replaying the records from the closest checkpoint
+    def __init__(self, checkpoint_interval: int = 4096):
+        self.records = array("i")
+        # number of records between checkpoints, 0 disables checkpoints
+        self.checkpoint_interval = checkpoint_interval
+        # (number of records applied, time of the last applied record, pids in each queue)
+        self.checkpoints: list[tuple[int, int, tuple[array, ...]]] = []
+        self.checkpoint_times: list[int] = []
+
+    def __len__(self):
+        return len(self.records) // RECORD_SIZE
+
+    def record(self, time: int, queue_id: int, op: int, pid: int):
+        self.records.extend((time, queue_id, op, pid))
+        if self.checkpoint_interval and len(self) % self.checkpoint_interval == 0:
+            self.add_checkpoint()
+
+    def add_checkpoint(self):
+        count = len(self)
+        if self.checkpoints:
+            start, _, contents = self.checkpoints[-1]
+        else:
+            start, contents = 0, EMPTY_QUEUES
+        queues = self.replay(contents, start, count)
+        time = self.records[(count - 1) * RECORD_SIZE]
+        self.checkpoints.append((count, time, tuple(array("i", queue) for queue in queues)))
+        self.checkpoint_times.append(time)
+
+    def replay(self, contents: tuple[array, ...], start: int, end: int,
+               until_time: int = None) -> list[dict[int, None]]:
+        # apply records [start, end) to the queues. Every queue is a dict of its pids in queue order, so a pid
+        # is removed without searching for it
+        queues = [dict.fromkeys(queue) for queue in contents]
+        records = self.records
+        for i in range(start * RECORD_SIZE, end * RECORD_SIZE, RECORD_SIZE):
+            time, queue_id, op, pid = records[i:i + RECORD_SIZE]
+            if until_time is not None and time > until_time:
+                break
+            if op == DEQUEUE:
+                queues[queue_id].pop(pid, None)
+            else:
+                if op == DEMOTE and queue_id > 0:
+                    queues[queue_id - 1].pop(pid, None)
+                queues[queue_id][pid] = None
+        return queues
+
+    def queues_at(self, time: int) -> tuple[list[int], ...]:
+        # pids in each ready queue after all changes made at this time
+        index = bisect_right(self.checkpoint_times, time) - 1
+        if index >= 0:
+            start, _, contents = self.checkpoints[index]
+        else:
+            start, contents = 0, EMPTY_QUEUES
+        return tuple(list(queue) for queue in self.replay(contents, start, len(self), time))
@@ -0,0 +1,43 @@
+from collections import OrderedDict
+from typing import Iterator, Optional
+
+
+class ReadyQueue:
+    # FIFO queue of process indexes for the single threaded simulator, no locking. Indexes are kept
+    # as keys of an OrderedDict (a hash indexed doubly linked list), so put, get, moving a process to
+    # the tail and removing a process are all O(1)
+    def __init__(self):
+        self.processes: OrderedDict[int, None] = OrderedDict()
+
+    def __len__(self):
+        return len(self.processes)
+
+    def __contains__(self, i: int):
+        return i in self.processes
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.processes)
+
+    def empty(self) -> bool:
+        return not self.processes
+
+    def put(self, i: int):
+        if i in self.processes:
+            raise KeyError(f"process {i} is already in the queue")
+        self.processes[i] = None
+
+    def get(self) -> int:
+        return self.processes.popitem(last=False)[0]
+
+    def peek(self) -> Optional[int]:
+        return next(iter(self.processes), None)
+
+    def last(self) -> Optional[int]:
+        return next(reversed(self.processes), None)
+
+    def rotate(self, i: int):
+        # move the process to the tail
+        self.processes.move_to_end(i)
+
+    def remove(self, i: int):
+        del self.processes[i]
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import pickle
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from typing import Optional, Union
+
+from checkpoint import gantt_chart_from_columns, gantt_columns
+from event_log import LOG_ALL, EventLog, LogEvent
+from prediction import INITIAL_PREDICTION, ORDER_REMAINING
+from simulation import MAX_CPU_TIME, GanttChart, Simulator
+from workload import Workload
+
+# results of finished Simulator runs keyed by a hash of the workload contents, the parameters and the
+# simulator source, so changing any of them misses the cache. Recent results are kept in memory, all of them
+# as zlib compressed pickles in a directory that is trimmed to max_bytes by dropping the least recently used:
+#   cache = ResultCache()
+#   result = cache.run(workload, 4, 8, 0.5)
+# Only the single cpu Simulator is cached
+
+CACHE_VERSION = 1
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# a change to any of these gives new keys
+ENGINE_SOURCES = ("simulation.py", "prediction.py", "metrics.py", "indexed_heap.py", "ready_queue.py",
+                  "event_log.py", "queue_history.py", "workload.py")
+RESULT_SUFFIX = ".result"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MEMORY_ENTRIES = 16
+
+engine_digest: Optional[str] = None
+
+
+def default_cache_directory() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "cpusched")
+
+
+def engine_version() -> str:
+    global engine_digest
+    if engine_digest is None:
+        digest = hashlib.blake2b(str(CACHE_VERSION).encode(), digest_size=16)
+        for name in ENGINE_SOURCES:
+            try:
+                with open(os.path.join(ROOT, name), "rb") as f:
+                    digest.update(f.read())
+            except OSError:
+                # installed without sources, only CACHE_VERSION tells engines apart
+                digest.update(name.encode())
+        engine_digest = digest.hexdigest()
+    return engine_digest
+
+
+def workload_digest(workload: Workload) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    for column in (workload.pids, workload.arrival_times, workload.offsets, workload.bursts):
+        view = memoryview(column)
+        digest.update(f"{view.format}:{len(view)};".encode())
+        digest.update(view.cast("B"))
+    return digest.hexdigest()
+
+
+def result_key(workload: Workload, q1: int, q2: int, alpha: float, event_driven: bool = True,
+               log_level: int = LOG_ALL, queue3_order: str = ORDER_REMAINING,
+               initial_prediction: float = INITIAL_PREDICTION, max_time: int = MAX_CPU_TIME) -> str:
+    # the logs of tick and event driven runs differ so event_driven is part of the key
+    parameters = json.dumps({"q1": q1, "q2": q2, "alpha": alpha, "event_driven": event_driven, "log_level": log_level,
+                             "queue3_order": queue3_order, "initial_prediction": initial_prediction,
+                             "max_time": max_time}, sort_keys=True)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(engine_version().encode())
+    digest.update(workload_digest(workload).encode())
+    digest.update(parameters.encode())
+    return digest.hexdigest()
+
+
+class SimulationResult:
+    # the results of a finished Simulator with the same attributes and metrics methods, it can be shown
+    # and reported instead of the simulator
+    waiting_time = Simulator.waiting_time
+    turnaround_time = Simulator.turnaround_time
+    cpu_utilization = Simulator.cpu_utilization
+    avg_waiting_time = Simulator.avg_waiting_time
+    avg_turnaround_time = Simulator.avg_turnaround_time
+
+    def __init__(self, workload: Workload, state: dict):
+        self.workload = self.processes = workload
+        self.pids = workload.pids
+        self.arrival_times = workload.arrival_times
+        self.start_time: array = state["start_time"]
+        self.complete_time: array = state["complete_time"]
+        self.current_time: int = state["current_time"]
+        self.free_cpu_time: int = state["free_cpu_time"]
+        self.terminated_count: int = state["terminated_count"]
+        self.metrics = state["metrics"]
+        self.predictor = state["predictor"]
+        self.gantt_columns = state["gantt_chart"]
+        level, max_events, events = state["logs"]
+        self.logs = EventLog(level)
+        self.logs.events = deque(map(LogEvent._make, events), maxlen=max_events)
+        self.built_gantt_chart: Optional[list[GanttChart]] = None
+
+    @classmethod
+    def from_simulator(cls, simulator: Simulator) -> "SimulationResult":
+        return cls(simulator.workload, simulation_state(simulator))
+
+    @property
+    def gantt_chart(self) -> list[GanttChart]:
+        if self.built_gantt_chart is None:
+            self.built_gantt_chart = gantt_chart_from_columns(*self.gantt_columns)
+        return self.built_gantt_chart
+
+    def is_terminated(self, i: int) -> bool:
+        return self.complete_time[i] != -1
+
+    def state(self) -> dict:
+        return {
+            "start_time": self.start_time,
+            "complete_time": self.complete_time,
+            "current_time": self.current_time,
+            "free_cpu_time": self.free_cpu_time,
+            "terminated_count": self.terminated_count,
+            "metrics": self.metrics,
+            "predictor": self.predictor,
+            "gantt_chart": self.gantt_columns,
+            "logs": (self.logs.level, self.logs.events.maxlen, [tuple(event) for event in self.logs.events]),
+        }
+
+
+def simulation_state(simulator: Simulator) -> dict:
+    return {
+        "start_time": array("q", simulator.start_time),
+        "complete_time": array("q", simulator.complete_time),
+        "current_time": simulator.current_time,
+        "free_cpu_time": simulator.free_cpu_time,
+        "terminated_count": simulator.terminated_count,
+        "metrics": simulator.metrics,
+        "predictor": simulator.predictor,
+        "gantt_chart": gantt_columns(simulator.gantt_chart),
+        "logs": (simulator.logs.level, simulator.logs.events.maxlen, [tuple(event) for event in simulator.logs.events]),
+    }
+
+
+class ResultCache:
+    def __init__(self, directory: str = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 memory_entries: int = DEFAULT_MEMORY_ENTRIES):
+        # without a directory, or one that can't be created, only the memory tier is used
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.memory: OrderedDict[str, SimulationResult] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError:
+                self.directory = None
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + RESULT_SUFFIX)
+
+    def get(self, key: str, workload: Workload) -> Optional[SimulationResult]:
+        # the workload the key was made from, results don't store it
+        result = self.memory.get(key)
+        if result is not None and result.workload is not workload:
+            result = SimulationResult(workload, result.state())
+        if result is None and self.directory is not None:
+            result = self.read(key, workload)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.remember(key, result)
+        return result
+
+    def put(self, key: str, result: Union[SimulationResult, Simulator]):
+        if isinstance(result, Simulator):
+            result = SimulationResult.from_simulator(result)
+        self.remember(key, result)
+        if self.directory is not None:
+            self.write(key, result)
+            self.evict()
+
+    def run(self, workload: Workload, q1: int, q2: int, alpha: float, event_driven: bool = True,
+            log_level: int = LOG_ALL, queue3_order: str = ORDER_REMAINING,
+            initial_prediction: float = INITIAL_PREDICTION) -> SimulationResult:
+        key = result_key(workload, q1, q2, alpha, event_driven, log_level, queue3_order, initial_prediction)
+        result = self.get(key, workload)
+        if result is None:
+            simulator = Simulator(workload, q1, q2, alpha, event_driven=event_driven, log_level=log_level,
+                                  queue3_order=queue3_order, initial_prediction=initial_prediction,
+                                  record_history=False)
+            simulator.run()
+            result = SimulationResult.from_simulator(simulator)
+            self.put(key, result)
+        return result
+
+    def remember(self, key: str, result: SimulationResult):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def read(self, key: str, workload: Workload) -> Optional[SimulationResult]:
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = pickle.loads(zlib.decompress(f.read()))
+            # the modification time orders the entries for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # a damaged or outdated entry is a miss
+            self.remove(path)
+            return None
+        if data.get("version") != CACHE_VERSION or data.get("processes") != len(workload):
+            self.remove(path)
+            return None
+        return SimulationResult(workload, data["state"])
+
+    def write(self, key: str, result: SimulationResult):
+        data = {"version": CACHE_VERSION, "processes": len(result.workload), "state": result.state()}
+        path = self.path(key)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "wb") as f:
+                f.write(zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), 1))
+            os.replace(temporary_path, path)
+        except OSError:
+            # a full or read only directory loses the entry, the result is still in memory
+            self.remove(temporary_path)
+
+    def evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(RESULT_SUFFIX):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+                    total += stat.st_size
+        entries.sort()
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= size
+
+    def remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        self.memory.clear()
+        if self.directory is not None:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.name.endswith(RESULT_SUFFIX):
+                        self.remove(entry.path)
@@ -1,348 +1,501 @@
-from typing import Optional, Union
+from array import array
+from typing import Callable, Optional, Union
 
 from process import Process
-from queue import Queue, PriorityQueue
-from copy import deepcopy
+from heapq import heappush, heappop
+from indexed_heap import IndexedHeap
+from instrumentation import Instrumentation, SimulatorStats
+from metrics import MetricsCollector
+from prediction import INITIAL_PREDICTION, ORDER_REMAINING, ORDER_SJF, QUEUE3_ORDERS, BurstPredictor
+from ready_queue import ReadyQueue
+from workload import Workload, as_workload
+from event_log import EventLog, LOG_ALL, PROCESSING, FINISHED_ALL_BURSTS, FINISHED_BURST, FINISHED_LIMIT, \
+    FINISHED_QUANTUM, PREEMPTED, FINISHED_IO
+from queue_history import QueueHistory, QUEUE_RR1, QUEUE_RR2, QUEUE_SRTF, QUEUE_FCFS, ENQUEUE, DEQUEUE, DEMOTE
 
 MAX_CPU_TIME = 20000
 
-def delete_from_queue(queue: PriorityQueue, pid: int):
-    p_index = -1
-    for i, t_p in enumerate(queue.queue):
-        _, p = t_p
-        if p.pid == pid:
-            p_index = i
-    if p_index >= 0:
-        del queue.queue[p_index]
+# process states kept by the simulator
+NEW = 0
+NEW_ADDED = 1
+READY = 2
+RUNNING = 3
+BLOCKED = 4
+TERMINATED = 5
 
 
 class GanttChart:
-    def __init__(self, pid: int, start_time: int, end_time: int, algo: str):
+    def __init__(self, pid: int, start_time: int, end_time: int, algo: str, core: int = 0):
         self.start_time = start_time
         self.end_time = end_time
         self.pid = pid
         self.algo = algo
+        # cpu the segment ran on, always 0 for the single cpu Simulator
+        self.core = core
 
 
 class Simulator:
-    current_process: Optional[Process]
-    prev_process: Optional[Process]
+    # processes are only read, the progress of each process is kept in arrays indexed by the position
+    # of the process in the workload, queues hold these indexes
+    current: Optional[int]
+    prev: Optional[int]
     gantt_chart: list[GanttChart]
 
-    def __init__(self, processes: list[Process], q1: int, q2: int, alpha: float):
+    def __init__(self, processes: Union[Workload, list[Process]], q1: int, q2: int, alpha: float, event_driven: bool = False,
+                 log_level: int = LOG_ALL, max_log_events: int = None, instrument: bool = False,
+                 queue3_order: str = ORDER_REMAINING, initial_prediction: float = INITIAL_PREDICTION,
+                 record_history: bool = True):
         self.current_time = 0
-        self.processes = processes
+        # event driven mode jumps straight to the next arrival, IO completion, quantum or burst end
+        # instead of advancing one time unit per tick, results are the same as the tick mode
+        self.event_driven = event_driven
+        # a list of processes is copied once into a columnar workload, processes gives Process views of it
+        self.workload = as_workload(processes)
+        self.processes = self.workload
+        self.pids = self.workload.pids
+        self.arrival_times = self.workload.arrival_times
+        n = len(self.workload)
+        # process indexes sorted by arrival time, the ones before next_arrival_index were already added to queue1
+        self.arrival_order = array("i", sorted(range(n), key=self.arrival_times.__getitem__))
+        self.next_arrival_index = 0
         self.q1 = q1
         self.q2 = q2
+        if queue3_order not in QUEUE3_ORDERS:
+            raise ValueError(f"queue3_order must be one of {', '.join(QUEUE3_ORDERS)}")
+        # what queue3 is sorted by, see prediction.py
+        self.queue3_order = queue3_order
+        # the simulation stops at this time even if processes are left
+        self.max_time = MAX_CPU_TIME
         self.alpha = alpha
-        self.current_process = None
-        self.prev_process = None
-        self.queue1: Queue[Process] = Queue()
-        self.queue2: Queue[Process] = Queue()
-        # PriorityQueue was used to always arrange process based on minimum remaining cpu bursts
-        self.queue3: PriorityQueue[tuple[int, Process]] = PriorityQueue()
-        self.queue4: Queue[Process] = Queue()
-        self.io_queue: Queue[Process] = Queue()
-        self.round_robin_1_process_total_cpu_duration_for_burst = {p.pid: 0 for p in self.processes}
-        self.round_robin_2_process_total_cpu_duration_for_burst = {p.pid: 0 for p in self.processes}
-        self.round_robin_2_process_burst_cpu_duration = {p.pid: 0 for p in self.processes}
-        self.processes_start_time = {p.pid: 0 for p in self.processes}
+        # exponential average of the cpu bursts of every process, with the error of its predictions
+        self.predictor = BurstPredictor(n, alpha, initial_prediction)
+        # index of the running process and of the last process run by SRTF
+        self.current = None
+        self.prev = None
+        # progress of each process
+        self.states = bytearray(n)
+        self.cpu_burst_index = array("i", [0]) * n
+        self.io_burst_index = array("i", [0]) * n
+        # remaining time of the current cpu burst and of all cpu bursts
+        self.remaining_burst = array("i", (self.workload.cpu_burst(i, 0) if self.workload.number_of_cpu_bursts(i)
+                                           else 0 for i in range(n)))
+        self.remaining_cpu_time = array("q", (self.workload.total_cpu_time(i) for i in range(n)))
+        self.preempted = array("i", [0]) * n
+        self.start_time = array("i", [-1]) * n
+        self.complete_time = array("i", [-1]) * n
+        self.queue1: ReadyQueue = ReadyQueue()
+        self.queue2: ReadyQueue = ReadyQueue()
+        # processes keyed by pid and ordered by minimum remaining cpu bursts, ties go to the process added first
+        self.queue3: IndexedHeap = IndexedHeap()
+        self.queue4: ReadyQueue = ReadyQueue()
+        # blocked processes as a heap of (IO finish time, order added, process index)
+        self.io_queue: list[tuple[int, int, int]] = []
+        self.io_queue_counter = 0
+        self.round_robin_1_process_total_cpu_duration_for_burst = array("i", [0]) * n
+        self.round_robin_2_process_total_cpu_duration_for_burst = array("i", [0]) * n
+        self.round_robin_2_process_burst_cpu_duration = array("i", [0]) * n
+        self.processes_start_time = array("i", [0]) * n
         self.gantt_chart: list[GanttChart] = []
-        self.queues_per_time = {}
-        self.logs = []
-        self.recent_queue_per_process: dict[int, Union[Queue, PriorityQueue]] = {p.pid: None for p in self.processes}
+        # enqueue/dequeue/demotion records of the ready queues, see queues_at(). Runs that only want the
+        # results turn it off with record_history=False
+        self.queue_history = QueueHistory() if record_history else None
+        self.logs = EventLog(log_level, max_log_events)
+        self.recent_queue_per_process: list[Union[ReadyQueue, IndexedHeap, None]] = [None] * n
         self.free_cpu_time = 0
-        if self.current_process is not None:
-            self.current_process.predicted_cpu_bursts(self.a)
+        self.terminated_count = 0
+        # set from another thread to stop run() early
+        self.cancelled = False
+        # run_until() keeps event driven jumps from going past this time
+        self.stop_time: Optional[int] = None
+        # process and time where the stop time cut its step short, the next step goes on with it
+        self.resumed_step: Optional[tuple[int, int]] = None
+        # latency percentiles per queue level, throughput and context switches
+        self.metrics = MetricsCollector()
+        # phase timings, queue depths and context switches, only collected with instrument
+        self.stats: Optional[SimulatorStats] = Instrumentation(self).stats if instrument else None
 
     def run_round_robin_1(self):
         # get process in queue
-        self.current_process = self.queue1.get()
+        self.current = i = self.queue1.get()
+        self.record_queue_event(QUEUE_RR1, DEQUEUE, i)
 
         #capture start time of process
-        if self.current_process.start_time == -1:
-            self.current_process.start_time = self.current_time
+        if self.start_time[i] == -1:
+            self.start_time[i] = self.current_time
 
         # get current burst
-        current_burst = self.current_process.cpu_burst_duration[self.current_process.current_cpu_burst_index]
+        current_burst = self.remaining_burst[i]
         current_burst_start = self.current_time
-        self.add_to_log(
-            f"[Round Robin 1/{self.current_time}] processing for process {self.current_process.pid}, at {self.current_time}")
+        self.add_to_log("RR1", PROCESSING, i)
         while current_burst > -1:
             if current_burst == 0:
-                self.gantt_chart.append(
-                    GanttChart(self.current_process.pid, current_burst_start, self.current_time, "RR1"))
+                self.add_to_gantt_chart(i, current_burst_start, "RR1")
                 # total cpu time for this burst
-                self.round_robin_1_process_total_cpu_duration_for_burst[self.current_process.pid] = 0
-                # all burst are done terminate process
-                if self.current_process.is_cpu_bursts_completed():
-                    self.current_process.terminate(self.current_time)
-                    self.add_to_log(
-                        f"[Round Robin 1/{self.current_time}] process {self.current_process.pid} finished all bursts at {self.current_time}")
-                else: # this cpu burst finished, add it to IO queue and block the process
-                    self.current_process.state = "blocked"
-                    self.current_process.current_cpu_burst_index += 1
-                    self.recent_queue_per_process[self.current_process.pid] = self.queue1
-                    self.io_queue.put(self.current_process)
-                    self.add_to_log(
-                        f"[Round Robin 1/{self.current_time}] process {self.current_process.pid} finished current burst {self.current_process.current_cpu_burst_index} at {self.current_time}, adding to IO Queue")
+                self.round_robin_1_process_total_cpu_duration_for_burst[i] = 0
+                # all burst are done terminate process, else add it to IO queue and block the process
+                self.finish_burst("RR1", self.queue1)
                 break
                 #  total cpu duration equals quantum * 10 limit, add it to next queue
-            elif current_burst > 0 and self.round_robin_1_process_total_cpu_duration_for_burst[
-                self.current_process.pid] == 10 * self.q1:
-                self.round_robin_1_process_total_cpu_duration_for_burst[self.current_process.pid] = 0
-                self.current_process.state = "ready"
-                self.add_to_log(
-                    f"[Round Robin 1/{self.current_time}] process {self.current_process.pid} finished its limit at {self.current_time}, "
-                    f"adding to next queue")
+            elif current_burst > 0 and self.round_robin_1_process_total_cpu_duration_for_burst[i] == 10 * self.q1:
+                self.round_robin_1_process_total_cpu_duration_for_burst[i] = 0
+                self.states[i] = READY
+                self.add_to_log("RR1", FINISHED_LIMIT, i)
                 # add it tp next queue
-                self.queue2.put(self.current_process)
-                self.gantt_chart.append(
-                    GanttChart(self.current_process.pid, current_burst_start, self.current_time, "RR1"))
+                self.queue2.put(i)
+                self.record_queue_event(QUEUE_RR2, DEMOTE, i)
+                self.add_to_gantt_chart(i, current_burst_start, "RR1")
                 break
             #time quantum finished for this cpu, but it back to queue, and allow other process to work
             elif current_burst > 0 and self.current_time == current_burst_start + self.q1:
-                self.current_process.state = "ready"
+                self.states[i] = READY
                 # add it back to queue1
-                self.queue1.put(self.current_process)
-                self.add_to_log(
-                    f"[Round Robin 1/{self.current_time}] process {self.current_process.pid} finished it's time quanta at {self.current_time}")
-                self.gantt_chart.append(
-                    GanttChart(self.current_process.pid, current_burst_start, self.current_time, "RR1"))
+                self.queue1.put(i)
+                self.record_queue_event(QUEUE_RR1, ENQUEUE, i)
+                self.add_to_log("RR1", FINISHED_QUANTUM, i)
+                self.add_to_gantt_chart(i, current_burst_start, "RR1")
                 break
             else:
                 # process this burst and set state as running
-                current_burst -= 1
-                self.current_process.cpu_burst_duration[self.current_process.current_cpu_burst_index] = current_burst
-                self.tick()
-                self.round_robin_1_process_total_cpu_duration_for_burst[self.current_process.pid] += 1
-                self.current_process.state = "running"
+                units = self.units_to_run(min(
+                    current_burst, current_burst_start + self.q1 - self.current_time,
+                    10 * self.q1 - self.round_robin_1_process_total_cpu_duration_for_burst[i]))
+                current_burst = self.run_current_process(units)
+                self.round_robin_1_process_total_cpu_duration_for_burst[i] += units
+                self.states[i] = RUNNING
 
     def run_round_robin_2(self):
         # get process from queue2 without removing it
-        self.current_process = self.queue2.queue[0]
-        self.current_process.state = "running"
+        self.current = i = self.queue2.peek()
+        self.states[i] = RUNNING
         # increase burst time duration
-        current_burst = self.current_process.cpu_burst_duration[self.current_process.current_cpu_burst_index]
-        self.add_to_log(
-            f"[Round Robin 2/{self.current_time}] processing for process {self.current_process.pid}, at {self.current_time}")
-        current_burst -= 1
-        self.current_process.cpu_burst_duration[self.current_process.current_cpu_burst_index] = current_burst
-        start_time = self.processes_start_time[self.current_process.pid]
+        self.log_processing("RR2", i)
+        units = self.units_to_run(min(
+            self.remaining_burst[i], self.max_time - self.current_time,
+            self.q2 - self.round_robin_2_process_burst_cpu_duration[i],
+            10 * self.q2 - self.round_robin_2_process_total_cpu_duration_for_burst[i]))
+        start_time = self.processes_start_time[i]
         # capture start time
         if start_time == 0:
-            self.processes_start_time[self.current_process.pid] = self.current_time
+            self.processes_start_time[i] = self.current_time
             start_time = self.current_time
-        self.tick()
-        self.round_robin_2_process_total_cpu_duration_for_burst[self.current_process.pid] += 1
-        self.round_robin_2_process_burst_cpu_duration[self.current_process.pid] += 1
+        current_burst = self.run_current_process(units)
+        self.round_robin_2_process_total_cpu_duration_for_burst[i] += units
+        self.round_robin_2_process_burst_cpu_duration[i] += units
 
         if current_burst == 0:
             # this burst finished remove it from queue
-            self.queue2.queue.remove(self.current_process)
-            # all process finished remove it from queue
-            if self.current_process.is_cpu_bursts_completed():
-                self.current_process.terminate(self.current_time)
-                self.add_to_log(
-                    f"[Round Robin 2/{self.current_time}] process {self.current_process.pid} finished all bursts at {self.current_time}")
-            else:
-                # this burst finished, mark process blocked and it to IO queue
-                self.current_process.state = "blocked"
-                self.current_process.current_cpu_burst_index += 1
-                self.recent_queue_per_process[self.current_process.pid] = self.queue2
-                self.io_queue.put(self.current_process)
-                self.add_to_log(
-                    f"[Round Robin 2/{self.current_time}] process {self.current_process.pid} finished current burst {self.current_process.current_cpu_burst_index} at {self.current_time}, adding to IO Queue")
-            self.round_robin_2_process_burst_cpu_duration[self.current_process.pid] = 0
-            self.round_robin_2_process_total_cpu_duration_for_burst[self.current_process.pid] = 0
-            self.gantt_chart.append(GanttChart(self.current_process.pid, start_time, self.current_time, "RR2"))
-            self.processes_start_time[self.current_process.pid] = 0
+            self.queue2.remove(i)
+            self.record_queue_event(QUEUE_RR2, DEQUEUE, i)
+            # all process finished remove it from queue, else mark process blocked and it to IO queue
+            self.finish_burst("RR2", self.queue2)
+            self.round_robin_2_process_burst_cpu_duration[i] = 0
+            self.round_robin_2_process_total_cpu_duration_for_burst[i] = 0
+            self.add_to_gantt_chart(i, start_time, "RR2")
+            self.processes_start_time[i] = 0
             # total quantum for this process reached limit, remove it from this queue, and add it to next queue
-        elif current_burst > 0 and self.round_robin_2_process_total_cpu_duration_for_burst[
-            self.current_process.pid] == 10 * self.q2:
-            self.round_robin_2_process_total_cpu_duration_for_burst[self.current_process.pid] = 0
-            self.round_robin_2_process_burst_cpu_duration[self.current_process.pid] = 0
-            self.current_process.state = "ready"
-            self.add_to_log(
-                f"[Round Robin 2/{self.current_time}] process {self.current_process.pid} finished its limit at {self.current_time}, "
-                f"adding to next queue")
+        elif current_burst > 0 and self.round_robin_2_process_total_cpu_duration_for_burst[i] == 10 * self.q2:
+            self.round_robin_2_process_total_cpu_duration_for_burst[i] = 0
+            self.round_robin_2_process_burst_cpu_duration[i] = 0
+            self.states[i] = READY
+            self.add_to_log("RR2", FINISHED_LIMIT, i)
             # remove from queue2
-            self.queue2.queue.remove(self.current_process)
+            self.queue2.remove(i)
             # add it to queue3
-            self.queue3.put((self.current_process.total_remaining_cpu_bursts(), self.current_process))
-            self.gantt_chart.append(GanttChart(self.current_process.pid, start_time, self.current_time, "RR2"))
-            self.processes_start_time[self.current_process.pid] = 0
+            self.queue3.push(i, self.queue3_key(i), i)
+            self.record_queue_event(QUEUE_SRTF, DEMOTE, i)
+            self.add_to_gantt_chart(i, start_time, "RR2")
+            self.processes_start_time[i] = 0
             # time auantum finished for this process remove it from this queue, and add it to the end again
-        elif current_burst > 0 and self.round_robin_2_process_burst_cpu_duration[self.current_process.pid] == self.q2:
-            self.round_robin_2_process_burst_cpu_duration[self.current_process.pid] = 0
-            self.current_process.state = "ready"
-            self.queue2.queue.remove(self.current_process)
-            self.queue2.put(self.current_process)
-            self.round_robin_2_process_burst_cpu_duration[self.current_process.pid] = 0
-            self.add_to_log(
-                f"[Round Robin 2/{self.current_time}] process {self.current_process.pid} finished it's time quanta at {self.current_time}")
-            self.gantt_chart.append(GanttChart(self.current_process.pid, start_time, self.current_time, "RR2"))
-            self.processes_start_time[self.current_process.pid] = 0
+        elif current_burst > 0 and self.round_robin_2_process_burst_cpu_duration[i] == self.q2:
+            self.round_robin_2_process_burst_cpu_duration[i] = 0
+            self.states[i] = READY
+            self.queue2.rotate(i)
+            self.record_queue_event(QUEUE_RR2, DEQUEUE, i)
+            self.record_queue_event(QUEUE_RR2, ENQUEUE, i)
+            self.add_to_log("RR2", FINISHED_QUANTUM, i)
+            self.add_to_gantt_chart(i, start_time, "RR2")
+            self.processes_start_time[i] = 0
         else:
             # lower priority put it on ready
-            self.current_process.state = "ready"
+            self.states[i] = READY
 
     def run_first_come_first_served(self):
         # get process without removing
-        self.current_process = self.queue4.queue[0]
-        self.current_process.state = "running"
-        start_time = self.processes_start_time[self.current_process.pid]
+        self.current = i = self.queue4.peek()
+        self.states[i] = RUNNING
+        start_time = self.processes_start_time[i]
         if start_time == 0:
-            self.processes_start_time[self.current_process.pid] = self.current_time
+            self.processes_start_time[i] = self.current_time
             start_time = self.current_time
-        self.add_to_log(
-            f"[FCFS {self.current_process.pid}/{self.current_time}] processing for {self.current_process.pid}, at {self.current_time}")
-        current_burst = self.current_process.cpu_burst_duration[self.current_process.current_cpu_burst_index]
-        current_burst -= 1
-        self.current_process.cpu_burst_duration[self.current_process.current_cpu_burst_index] = current_burst
-        self.tick()
+        self.log_processing("FCFS", i)
+        units = self.units_to_run(min(self.remaining_burst[i], self.max_time - self.current_time))
+        current_burst = self.run_current_process(units)
         # finished current burst
         if current_burst == 0:
             # remove oit from queue4
             self.queue4.get()
-            if self.current_process.is_cpu_bursts_completed():
-                self.current_process.terminate(self.current_time)
-                self.add_to_log(
-                    f"[FCFS {self.current_process.pid}/{self.current_time}] process {self.current_process.pid} finished all bursts at {self.current_time}")
-            else:
-                # add it to IO queue and mark it as blocked
-                self.current_process.state = "blocked"
-                self.current_process.current_cpu_burst_index += 1
-                self.recent_queue_per_process[self.current_process.pid] = self.queue4
-                self.io_queue.put(self.current_process)
-                self.add_to_log(
-                    f"[FCFS {self.current_process.pid}/{self.current_time}] process {self.current_process.pid} finished current burst {self.current_process.current_cpu_burst_index} at {self.current_time}, adding to IO Queue")
-            self.gantt_chart.append(GanttChart(self.current_process.pid, start_time, self.current_time, "FCFS"))
-            self.processes_start_time[self.current_process.pid] = 0
+            self.record_queue_event(QUEUE_FCFS, DEQUEUE, i)
+            # terminate or add it to IO queue and mark it as blocked
+            self.finish_burst("FCFS", self.queue4)
+            self.add_to_gantt_chart(i, start_time, "FCFS")
+            self.processes_start_time[i] = 0
         elif current_burst > 0:
             # mark it as ready
-            self.current_process.state = "ready"
+            self.states[i] = READY
 
     def run_shortest_remaining_time_first(self):
         # get process withput removing it
-        self.current_process = self.queue3.queue[0][1]
-        start_time = self.processes_start_time[self.current_process.pid]
+        self.current = i = self.queue3.peek()
+        start_time = self.processes_start_time[i]
         # capture time
         if start_time == 0:
-            self.processes_start_time[self.current_process.pid] = self.current_time
+            self.processes_start_time[i] = self.current_time
             start_time = self.current_time
 
         # preempted happened, add it to queue4 and remove it from current queue if it equals 3
-        if self.prev_process is not None and not self.current_process.pid == self.prev_process.pid:
-            self.prev_process.preempted += 1
+        prev = self.prev
+        if prev is not None and not i == prev:
+            self.preempted[prev] += 1
             # preempted equals 3 delete from this queue and add it to queue3
-            if self.prev_process.preempted == 3:
-                self.add_to_log(
-                    f"[SRTF {self.current_process.pid}/{self.current_time}] process {self.prev_process.pid} was preemted 3 times, at {self.current_time}")
-                delete_from_queue(self.queue3, self.prev_process.pid)
-                self.queue4.put(self.prev_process)
+            if self.preempted[prev] == 3:
+                self.add_to_log("SRTF", PREEMPTED, prev, self.pids[i])
+                self.queue3.remove(prev)
+                self.queue4.put(prev)
+                self.record_queue_event(QUEUE_FCFS, DEMOTE, prev)
                 return
         #process this burst
-        self.current_process.state = "running"
-        self.prev_process = self.current_process
-        self.add_to_log(
-            f"[SRTF {self.current_process.pid}/{self.current_time}] processing for {self.current_process.pid}, at {self.current_time}")
-        current_burst = self.current_process.cpu_burst_duration[self.current_process.current_cpu_burst_index]
-        current_burst -= 1
-        self.current_process.cpu_burst_duration[self.current_process.current_cpu_burst_index] = current_burst
-        self.tick()
+        self.states[i] = RUNNING
+        self.prev = i
+        self.log_processing("SRTF", i)
+        units = self.units_to_run(min(self.remaining_burst[i], self.max_time - self.current_time))
+        # keep the priority in sync with the remaining time
+        self.queue3.update(i, self.queue3_key(i, units))
+        current_burst = self.run_current_process(units)
         if current_burst == 0:
             # delete from queue
-            delete_from_queue(self.queue3, self.current_process.pid)
-            self.prev_process = None
-            # all bursts finished
-            if self.current_process.is_cpu_bursts_completed():
-                self.current_process.terminate(self.current_time)
-                self.add_to_log(
-                    f"[SRTF {self.current_process.pid}/{self.current_time}] process {self.current_process.pid} finished all bursts at {self.current_time}")
-            else:
-                # this burst finished makr it blocked and add it to IO queue
-                self.current_process.state = "blocked"
-                self.current_process.current_cpu_burst_index += 1
-                self.recent_queue_per_process[self.current_process.pid] = self.queue3
-                self.io_queue.put(self.current_process)
-                self.add_to_log(
-                    f"[SRTF {self.current_process.pid}/{self.current_time}] process {self.current_process.pid} finished current burst {self.current_process.current_cpu_burst_index} at {self.current_time}, adding to IO Queue")
-            self.gantt_chart.append(GanttChart(self.current_process.pid, start_time, self.current_time, "SRTF"))
-            self.processes_start_time[self.current_process.pid] = 0
+            self.queue3.remove(i)
+            self.record_queue_event(QUEUE_SRTF, DEQUEUE, i)
+            self.prev = None
+            # all bursts finished, else makr it blocked and add it to IO queue
+            self.finish_burst("SRTF", self.queue3)
+            self.add_to_gantt_chart(i, start_time, "SRTF")
+            self.processes_start_time[i] = 0
         elif current_burst > 0:
-            self.current_process.state = "ready"
+            self.states[i] = READY
+
+    def run_current_process(self, units: int) -> int:
+        # run the current process for some ticks, returns what is left from its burst
+        i = self.current
+        self.remaining_burst[i] -= units
+        self.remaining_cpu_time[i] -= units
+        self.tick(units)
+        return self.remaining_burst[i]
+
+    def finish_burst(self, algo: str, queue: Union[ReadyQueue, IndexedHeap]):
+        # current process finished its cpu burst, terminate it if it was the last one,
+        # otherwise block it on its next IO burst and return to this queue afterwards
+        i = self.current
+        self.predictor.observe(i, self.workload.cpu_burst(i, self.cpu_burst_index[i]))
+        if self.cpu_burst_index[i] == self.workload.number_of_cpu_bursts(i) - 1:
+            self.states[i] = TERMINATED
+            self.complete_time[i] = self.current_time
+            self.terminated_count += 1
+            self.record_terminated(algo, i)
+            self.add_to_log(algo, FINISHED_ALL_BURSTS, i)
+        else:
+            self.states[i] = BLOCKED
+            self.cpu_burst_index[i] += 1
+            self.remaining_burst[i] = self.workload.cpu_burst(i, self.cpu_burst_index[i])
+            self.recent_queue_per_process[i] = queue
+            self.start_io(i)
+            self.add_to_log(algo, FINISHED_BURST, i, self.cpu_burst_index[i])
+
+    def queue3_key(self, i: int, units: int = 0) -> float:
+        # key of the process in queue3 after it runs units more
+        if self.queue3_order == ORDER_REMAINING:
+            return self.remaining_cpu_time[i] - units
+        if self.queue3_order == ORDER_SJF:
+            return self.predictor.predicted[i]
+        elapsed = self.workload.cpu_burst(i, self.cpu_burst_index[i]) - self.remaining_burst[i] + units
+        return self.predictor.predicted[i] - elapsed
+
+    def record_terminated(self, algo: str, i: int):
+        # a process is running, ready or in IO, where an IO burst takes at least one tick
+        workload = self.workload
+        io_time = sum(max(workload.io_burst(i, k), 1) for k in range(workload.number_of_cpu_bursts(i) - 1))
+        self.metrics.add_process(algo, self.arrival_times[i], self.start_time[i], self.complete_time[i],
+                                 workload.total_cpu_time(i), io_time)
 
     def check_arrived_processes(self):
-        # find which process to run, set state as new_added
-        for process in self.processes:
-            if process.state == "new" and process.arrival_time <= self.current_time:
-                process.state = "new_added"
-                self.queue1.put(process)
+        # add processes that arrived to queue1 and set state as new_added, the cursor walks the
+        # arrival order so every process is checked once
+        while self.next_arrival_index < len(self.arrival_order) and \
+                self.arrival_times[self.arrival_order[self.next_arrival_index]] <= self.current_time:
+            i = self.arrival_order[self.next_arrival_index]
+            self.next_arrival_index += 1
+            if self.states[i] == NEW:
+                self.states[i] = NEW_ADDED
+                self.queue1.put(i)
+                self.record_queue_event(QUEUE_RR1, ENQUEUE, i)
+
+    def next_arrival_time(self) -> Optional[int]:
+        if self.next_arrival_index < len(self.arrival_order):
+            return self.arrival_times[self.arrival_order[self.next_arrival_index]]
+        return None
+
+    def start_io(self, i: int):
+        # block the process until its current IO burst is done, an IO burst takes at least one tick
+        duration = self.workload.io_burst(i, self.io_burst_index[i])
+        heappush(self.io_queue, (self.current_time + max(duration, 1), self.io_queue_counter, i))
+        self.io_queue_counter += 1
 
     def check_io_queue(self):
-        # check which processes finished thier IO, if finished return it back to it's queue
-        indexes_to_remove = []
-        for i, process in enumerate(self.io_queue.queue):
-            current_io_index = process.current_io_burst_index
-            try:
-                process.io_burst_duration[current_io_index] -= 1
-            except IndexError:
-                return
-            # finished io return to queue
-            if process.io_burst_duration[current_io_index] <= 0 and \
-                    self.recent_queue_per_process[process.pid] is not None:
-                self.add_to_log(
-                    f"[IO] process {process.pid} finished IO at {self.current_time}, returning back to queue")
-                process.current_io_burst_index += 1
-                # mark it as ready and remove it
-                process.state = "ready"
-                indexes_to_remove.append(i)
-                queue_to_add = self.recent_queue_per_process[process.pid]
-                if queue_to_add == self.queue3:
-                    self.queue3.put((process.total_remaining_cpu_bursts(), process))
-                else:
-                    self.recent_queue_per_process[process.pid].put(process)
-        # remove from IO queue
-        for index in indexes_to_remove:
-            try:
-                del self.io_queue.queue[index]
-            except IndexError:
-                pass
-
-    # represents a cpu tick
-    def tick(self):
-        self.queues_per_time[self.current_time] = (
-        deepcopy(self.queue1.queue), deepcopy(self.queue2.queue), deepcopy(self.queue3.queue),
-        deepcopy(self.queue4.queue))
-        self.current_time += 1
+        # return processes that finished their IO back to their recent queue, in the order they were blocked
+        while self.io_queue and self.io_queue[0][0] <= self.current_time:
+            _, _, i = heappop(self.io_queue)
+            self.add_to_log("IO", FINISHED_IO, i)
+            self.io_burst_index[i] += 1
+            # mark it as ready
+            self.states[i] = READY
+            queue_to_add = self.recent_queue_per_process[i]
+            if queue_to_add == self.queue3:
+                self.queue3.push(i, self.queue3_key(i), i)
+            else:
+                queue_to_add.put(i)
+            self.record_queue_event(self.ready_queues().index(queue_to_add), ENQUEUE, i)
+
+    # represents a cpu tick, or a jump of several ticks in event driven mode
+    def tick(self, units: int = 1):
+        self.current_time += units
         # check which process arrived and add them to queue1
         self.check_arrived_processes()
         # check which processes finished IO processing
         self.check_io_queue()
 
-    def add_to_log(self, message: str):
-        print(message)
-        self.logs.append(message)
+    def time_to_next_event(self) -> Optional[int]:
+        # time units until the next arrival or IO completion, None if nothing is pending
+        next_times = []
+        next_arrival = self.next_arrival_time()
+        if next_arrival is not None:
+            next_times.append(next_arrival - self.current_time)
+        if self.io_queue:
+            next_times.append(self.io_queue[0][0] - self.current_time)
+        return min(next_times, default=None)
+
+    def units_to_run(self, limit: int) -> int:
+        # how many ticks to run in one step, nothing can happen in between so in event driven mode
+        # the step goes until limit or the next event
+        if not self.event_driven:
+            return 1
+        next_event = self.time_to_next_event()
+        if next_event is not None:
+            limit = min(limit, next_event)
+        if self.stop_time is not None and 0 < self.stop_time - self.current_time < limit:
+            # nothing happens at the stop time, without it the step would have gone on
+            limit = self.stop_time - self.current_time
+            self.resumed_step = (self.current, self.stop_time)
+        elif self.stop_time is not None:
+            limit = min(limit, self.stop_time - self.current_time)
+        return max(limit, 1)
+
+    def ready_queues(self) -> tuple:
+        return self.queue1, self.queue2, self.queue3, self.queue4
+
+    def record_queue_event(self, queue_id: int, op: int, i: int):
+        if self.queue_history is not None:
+            self.queue_history.record(self.current_time, queue_id, op, self.pids[i])
+
+    def queues_at(self, time: int) -> tuple[list[int], ...]:
+        # pids waiting in queue1..queue4 at this time, rebuilt from the queue history
+        if self.queue_history is None:
+            raise ValueError("the queue history isn't recorded, create the simulator with record_history=True")
+        return self.queue_history.queues_at(time)
 
-    def run(self):
+    def add_to_log(self, algo: str, kind: int, i: int, detail: int = -1):
+        self.logs.add(self.current_time, algo, self.pids[i], kind, detail)
+
+    def log_processing(self, algo: str, i: int):
+        # a step cut short by run_until() goes on in the next one without a second PROCESSING event, so the log
+        # is the same as an uninterrupted run's
+        if self.resumed_step == (i, self.current_time):
+            self.resumed_step = None
+        else:
+            self.add_to_log(algo, PROCESSING, i)
+
+    def add_to_gantt_chart(self, i: int, start_time: int, algo: str):
+        self.metrics.add_segment(0, self.pids[i])
+        self.gantt_chart.append(GanttChart(self.pids[i], start_time, self.current_time, algo))
+
+    def cancel(self):
+        self.cancelled = True
+
+    def queue_depths(self) -> tuple[int, int, int, int, int]:
+        # processes waiting in queue1..queue4 and in IO
+        return len(self.queue1), len(self.queue2), len(self.queue3), len(self.queue4), len(self.io_queue)
+
+    def finished(self) -> bool:
+        # all processes terminated and all queues are empty, or out of time
+        return (self.terminated_count >= len(self.workload) and self.queue1.empty() and self.queue2.empty() and
+                self.queue3.empty() and self.queue4.empty()) or self.current_time >= self.max_time
+
+    def run_step(self):
+        self.check_arrived_processes()
+        # start with queue1, if empty go to next queue2, and so on, queue1 highest priority, queue4 lowest priority
+        if not self.queue1.empty():
+            self.run_round_robin_1()
+        elif not self.queue2.empty():
+            self.run_round_robin_2()
+        elif not self.queue3.empty():
+            self.run_shortest_remaining_time_first()
+        elif not self.queue4.empty():
+            self.run_first_come_first_served()
+        else:
+            # no queue to be processed
+            units = self.units_to_run(self.max_time - self.current_time)
+            self.tick(units)
+            self.free_cpu_time += units
+
+    def step(self, steps: int = 1) -> int:
+        # run up to steps scheduling steps, a step runs one process (a whole quantum for round robin 1)
+        # or waits for the next event, returns the number of steps run
+        count = 0
+        while count < steps and not self.finished() and not self.cancelled:
+            self.run_step()
+            count += 1
+        return count
+
+    def run_until(self, time: Optional[int], progress: Callable[["Simulator"], None] = None,
+                  progress_every: int = 256) -> bool:
+        # run until the clock reaches time, or to the end when time is None, and return whether the simulation
+        # finished. Event driven jumps stop at time but a round robin 1 quantum is never split, so the clock
+        # can end up to q1 - 1 units past it. A step cut at time goes on in the next call as if it wasn't.
+        # progress is called with the simulator every progress_every steps and once at the end
+        steps = 0
+        self.stop_time = time
+        try:
+            while not self.finished() and not self.cancelled and (time is None or self.current_time < time):
+                self.run_step()
+                steps += 1
+                if progress is not None and steps % progress_every == 0:
+                    progress(self)
+        finally:
+            self.stop_time = None
+        if progress is not None:
+            progress(self)
+        return self.finished()
+
+    def run(self, progress: Callable[["Simulator"], None] = None, progress_every: int = 256):
         # run simulation until all processes are terminated and all queues are empty
-        while (not all(p.is_terminated() for p in self.processes) or not self.queue1.empty() or \
-                not self.queue2.empty() or not self.queue3.empty() or not self.queue4.empty()) and not self.current_time >= MAX_CPU_TIME:
-            self.check_arrived_processes()
-            # start with queue1, if empty go to next queue2, and so on, queue1 highest priority, queue4 lowest priority
-            if not self.queue1.empty():
-                self.run_round_robin_1()
-            elif not self.queue2.empty():
-                self.run_round_robin_2()
-            elif not self.queue3.empty():
-                self.run_shortest_remaining_time_first()
-            elif not self.queue4.empty():
-                self.run_first_come_first_served()
-            else:
-                # no queue to be processed
-                self.tick()
-                self.free_cpu_time += 1
+        self.run_until(None, progress, progress_every)
+
+    def waiting_time(self, i: int) -> int:
+        return self.start_time[i] - self.arrival_times[i]
+
+    def turnaround_time(self, i: int) -> int:
+        return self.complete_time[i] - self.arrival_times[i]
+
+    def is_terminated(self, i: int) -> bool:
+        return self.states[i] == TERMINATED
 
     def cpu_utilization(self):
         # calculate cpu utilization
@@ -352,5 +505,15 @@ class Simulator:
         return 0
 
     def avg_waiting_time(self):
-        # calculate average time
-        return round(sum(p.waiting_time() for p in self.processes) / len(self.processes), 1)
\ No newline at end of file
+        # only processes that started before max_time have a waiting time, the others still have start time -1
+        started = [i for i in range(len(self.workload)) if self.start_time[i] != -1]
+        if not started:
+            return 0
+        return round(sum(self.waiting_time(i) for i in started) / len(started), 1)
+
+    def avg_turnaround_time(self):
+        # only processes that terminated before max_time have a turnaround time
+        terminated = [i for i in range(len(self.workload)) if self.is_terminated(i)]
+        if not terminated:
+            return 0
+        return round(sum(self.turnaround_time(i) for i in terminated) / len(terminated), 1)
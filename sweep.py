@@ -0,0 +1,102 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from typing import Iterable, Optional
+
+from event_log import LOG_OFF
+from prediction import ORDER_REMAINING, QUEUE3_ORDERS
+from simulation import Simulator
+from workload import Workload
+from workload_io import read_workload
+
+COLUMNS = ["q1", "q2", "alpha", "cpu_utilization", "avg_waiting_time", "avg_turnaround_time", "makespan",
+           "prediction_mean_error", "prediction_mean_absolute_error", "prediction_root_mean_squared_error"]
+
+# workload of a worker process, it is sent once when the worker starts instead of with every config
+worker_workload: Optional[Workload] = None
+worker_queue3_order = ORDER_REMAINING
+
+
+def simulate(workload: Workload, q1: int, q2: int, alpha: float, queue3_order: str = ORDER_REMAINING) -> dict:
+    simulator = Simulator(workload, q1, q2, alpha, event_driven=True, log_level=LOG_OFF, queue3_order=queue3_order,
+                          record_history=False)
+    simulator.run()
+    # the burst predictions depend on alpha and not on the quanta, they show which alpha fits the workload best
+    prediction = simulator.predictor.stats
+    return {
+        "q1": q1,
+        "q2": q2,
+        "alpha": alpha,
+        "cpu_utilization": simulator.cpu_utilization(),
+        "avg_waiting_time": simulator.avg_waiting_time(),
+        "avg_turnaround_time": simulator.avg_turnaround_time(),
+        "makespan": simulator.current_time,
+        "prediction_mean_error": round(prediction.mean_error(), 3),
+        "prediction_mean_absolute_error": round(prediction.mean_absolute_error(), 3),
+        "prediction_root_mean_squared_error": round(prediction.root_mean_squared_error(), 3),
+    }
+
+
+def init_worker(workload: Workload, queue3_order: str):
+    global worker_workload, worker_queue3_order
+    worker_workload = workload
+    worker_queue3_order = queue3_order
+
+
+def simulate_config(config: tuple[int, int, float]) -> dict:
+    return simulate(worker_workload, *config, queue3_order=worker_queue3_order)
+
+
+def grid(q1_values: Iterable[int], q2_values: Iterable[int], alphas: Iterable[float]) -> list[tuple[int, int, float]]:
+    return list(itertools.product(q1_values, q2_values, alphas))
+
+
+def run_sweep(workload: Workload, configs: list[tuple[int, int, float]], workers: int = None,
+              queue3_order: str = ORDER_REMAINING) -> list[dict]:
+    # run every (q1, q2, alpha) config on its own simulator, spread over a pool of worker processes.
+    # Results are in the same order as configs
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(configs) <= 1:
+        return [simulate(workload, *config, queue3_order=queue3_order) for config in configs]
+    # imported here so the headless cli doesn't pay for multiprocessing when it only runs one simulation
+    from concurrent.futures import ProcessPoolExecutor
+    chunk_size = max(1, len(configs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(workload, queue3_order)) as executor:
+        return list(executor.map(simulate_config, configs, chunksize=chunk_size))
+
+
+def write_results(results: list[dict], output_format: str, file=sys.stdout):
+    if output_format == "json":
+        json.dump(results, file, indent=2)
+        file.write("\n")
+    else:
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("workload", help="workload file")
+    parser.add_argument("--q1", type=int, nargs="+", required=True, help="quantum 1 values")
+    parser.add_argument("--q2", type=int, nargs="+", required=True, help="quantum 2 values")
+    parser.add_argument("--alpha", type=float, nargs="+", default=[0.5], help="alpha values")
+    parser.add_argument("--queue3-order", choices=QUEUE3_ORDERS, default=ORDER_REMAINING,
+                        help="sort queue3 by remaining cpu time, predicted time left in the burst or predicted burst")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the cpu count")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv", dest="output_format")
+
+
+def main(args: argparse.Namespace):
+    workload = read_workload(args.workload)
+    results = run_sweep(workload, grid(args.q1, args.q2, args.alpha), args.workers, args.queue3_order)
+    write_results(results, args.output_format)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the simulator for every combination of q1, q2 and alpha")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,130 @@
+import pytest
+
+from checkpoint import CheckpointError, CheckpointSeries, checkpoint, fork, load_checkpoint, restore, save_checkpoint
+from event_log import LOG_ALL
+from generator import Uniform, UniformArrivals, generate
+from multicore import MultiCoreSimulator
+from simulation import Simulator
+from workload import Workload
+
+
+def small_workload(seed: int) -> Workload:
+    return generate(25, seed, arrivals=UniformArrivals(300), cpu_bursts_per_process=Uniform(1, 4),
+                    cpu=Uniform(1, 120), io=Uniform(0, 30), use_numpy=False)
+
+
+def results(simulator: Simulator) -> tuple:
+    gantt_chart = [(segment.pid, segment.start_time, segment.end_time, segment.algo, segment.core)
+                   for segment in simulator.gantt_chart]
+    return (gantt_chart, list(simulator.start_time), list(simulator.complete_time), simulator.current_time,
+            simulator.free_cpu_time, simulator.metrics.as_dict(simulator.current_time),
+            simulator.predictor.stats.as_dict())
+
+
+def make_simulator(workload: Workload, kind: str) -> Simulator:
+    if kind == "tick":
+        return Simulator(workload, 2, 5, 0.5, log_level=LOG_ALL)
+    if kind == "event":
+        return Simulator(workload, 2, 5, 0.5, event_driven=True, log_level=LOG_ALL)
+    return MultiCoreSimulator(workload, 2, 5, 0.5, cores=2, global_queue=False, balance_interval=20,
+                              log_level=LOG_ALL)
+
+
+def finished(simulator: Simulator) -> Simulator:
+    simulator.run()
+    return simulator
+
+
+@pytest.mark.parametrize("include_workload", [True, False])
+@pytest.mark.parametrize("kind", ["tick", "event", "multicore"])
+@pytest.mark.parametrize("seed", range(3))
+def test_restored_step_checkpoints_finish_like_uninterrupted_runs(seed, kind, include_workload):
+    workload = small_workload(seed)
+    expected = finished(make_simulator(workload, kind))
+    for steps in (0, 1, 17, 80):
+        simulator = make_simulator(workload, kind)
+        simulator.step(steps)
+        data = checkpoint(simulator, include_workload)
+        restored = finished(restore(data, None if include_workload else workload))
+        assert results(restored) == results(expected)
+        assert list(restored.logs.events) == list(expected.logs.events)
+        assert restored.queues_at(restored.current_time // 2) == expected.queues_at(expected.current_time // 2)
+
+
+@pytest.mark.parametrize("kind", ["tick", "event", "multicore"])
+@pytest.mark.parametrize("seed", range(3))
+def test_restored_run_until_checkpoints_finish_like_uninterrupted_runs(seed, kind):
+    workload = small_workload(seed)
+    expected = finished(make_simulator(workload, kind))
+    for time in (1, 50, 173, 400):
+        simulator = make_simulator(workload, kind)
+        simulator.run_until(time)
+        restored = finished(restore(checkpoint(simulator)))
+        assert results(restored) == results(expected)
+        assert list(restored.logs.events) == list(expected.logs.events)
+
+
+@pytest.mark.parametrize("kind", ["tick", "event"])
+@pytest.mark.parametrize("seed", range(3))
+def test_runs_cut_into_many_pieces_log_the_same(seed, kind):
+    # run_until cuts event driven steps at its time, the cut steps go on without logging twice
+    workload = small_workload(seed)
+    expected = finished(make_simulator(workload, kind))
+    simulator = make_simulator(workload, kind)
+    time = 0
+    while not simulator.run_until(time):
+        time += 7
+        if time % 140 == 0:
+            simulator = restore(checkpoint(simulator))
+    assert results(simulator) == results(expected)
+    assert list(simulator.logs.events) == list(expected.logs.events)
+
+
+def test_saved_checkpoint_loads_and_finishes_the_run(tmp_path):
+    workload = small_workload(0)
+    expected = results(finished(make_simulator(workload, "event")))
+    simulator = make_simulator(workload, "event")
+    simulator.run_until(120)
+    file_name = str(tmp_path / "run.ckpt")
+    save_checkpoint(simulator, file_name, include_workload=False)
+    assert results(finished(load_checkpoint(file_name, workload))) == expected
+    assert not (tmp_path / "run.ckpt.tmp").exists()
+
+
+def test_fork_is_independent_of_the_original():
+    workload = small_workload(1)
+    simulator = make_simulator(workload, "tick")
+    simulator.run_until(100)
+    before = results(simulator)
+    forked = fork(simulator)
+    assert forked.workload is workload
+    forked.q2 = 9
+    forked.run()
+    assert results(simulator) == before
+    assert results(finished(simulator)) == results(finished(make_simulator(workload, "tick")))
+
+
+def test_restore_rejects_bad_checkpoints():
+    workload = small_workload(2)
+    simulator = make_simulator(workload, "event")
+    simulator.run_until(50)
+    with pytest.raises(CheckpointError):
+        restore(b"not a checkpoint")
+    with pytest.raises(CheckpointError):
+        restore(checkpoint(simulator, include_workload=False))
+    with pytest.raises(CheckpointError):
+        restore(checkpoint(simulator, include_workload=False), Workload.from_processes(list(workload)[:10]))
+
+
+def test_checkpoint_series_goes_back_to_any_time():
+    workload = small_workload(0)
+    simulator = make_simulator(workload, "event")
+    series = CheckpointSeries(60)
+    series.run(simulator)
+    assert len(series) > 2
+    assert series.at(-1, workload) is None
+    expected = results(simulator)
+    for time in (0, 59, 61, 250):
+        restored = series.at(time, workload)
+        assert restored.current_time >= time
+        assert results(finished(restored)) == expected
@@ -0,0 +1,95 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cpusched
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("contents, arguments", [
+    ("1 0\n", []),
+    ("1 0 5\n", ["--alpha", "3"]),
+])
+def test_bad_input_is_reported_as_a_usage_error(tmp_path, capsys, contents, arguments):
+    file_name = tmp_path / "workload.txt"
+    file_name.write_text(contents)
+    with pytest.raises(SystemExit) as exit_info:
+        cpusched.main(["run", str(file_name), "--q1", "4", "--q2", "8", *arguments])
+    assert exit_info.value.code == 2
+    assert "error:" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("arguments", [
+    ["--q1", "0"],
+    ["--cores", "0"],
+    ["--cache", "--stats"],
+    ["--cache", "--cores", "2"],
+    ["--stats", "--cores", "2"],
+    ["--resume"],
+    ["--resume", "--checkpoint", "missing.ckpt"],
+])
+def test_bad_run_options_are_usage_errors(tmp_path, capsys, arguments):
+    file_name = tmp_path / "workload.txt"
+    file_name.write_text("1 0 5\n")
+    with pytest.raises(SystemExit) as exit_info:
+        cpusched.main(["run", str(file_name), "--q2", "8", "--q1", "4", *arguments])
+    assert exit_info.value.code == 2
+    assert "error:" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("arguments", [
+    ["run", "missing.txt", "--q1", "4", "--q2", "8"],
+    ["sweep", "missing.txt", "--q1", "4", "--q2", "8", "0"],
+    ["convert", "missing.txt", "out.wkl"],
+    ["generate", "out.wkl", "--processes", "5", "--cpu", "exponential:0"],
+    ["generate", "out.wkl", "--processes", "5", "--arrivals", "poisson:-1"],
+    ["generate", "out.wkl", "--processes", "5", "--bursts", "uniform:5:1"],
+])
+def test_bad_arguments_are_rejected_before_the_command_runs(tmp_path, monkeypatch, capsys, arguments):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(SystemExit) as exit_info:
+        cpusched.main(arguments)
+    assert exit_info.value.code == 2
+    assert "error:" in capsys.readouterr().err
+    assert not (tmp_path / "out.wkl").exists()
+
+
+def test_errors_of_the_command_itself_are_not_hidden(tmp_path, monkeypatch):
+    # only malformed files are usage errors, a bug in a command keeps its traceback
+    def failing(args):
+        raise ValueError("bug")
+
+    file_name = tmp_path / "workload.txt"
+    file_name.write_text("1 0 5\n")
+    monkeypatch.setattr(cpusched, "convert", failing)
+    with pytest.raises(ValueError):
+        cpusched.main(["convert", str(file_name), str(tmp_path / "out.wkl")])
+
+
+def test_damaged_checkpoint_is_a_usage_error(tmp_path, capsys):
+    file_name = tmp_path / "workload.txt"
+    file_name.write_text("1 0 5\n")
+    checkpoint_name = tmp_path / "run.ckpt"
+    checkpoint_name.write_bytes(b"damaged")
+    with pytest.raises(SystemExit) as exit_info:
+        cpusched.main(["run", str(file_name), "--q1", "4", "--q2", "8", "--resume", "--checkpoint", str(checkpoint_name)])
+    assert exit_info.value.code == 2
+    assert "invalid checkpoint" in capsys.readouterr().err
+
+
+def test_subcommand_modules_are_imported_by_their_handlers():
+    # numpy comes in through the generator, a run doesn't need it
+    code = ("import sys, cpusched; print(' '.join(sorted({'benchmark', 'checkpoint', 'generator', 'multicore', "
+            "'numpy', 'online', 'result_cache'} & set(sys.modules))))")
+    imported = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert imported.stdout.split() == ["benchmark"]
+
+
+def test_cache_size_help_matches_the_cache_default(capsys):
+    from result_cache import DEFAULT_MAX_BYTES
+    with pytest.raises(SystemExit):
+        cpusched.main(["run", "--help"])
+    assert f"{DEFAULT_MAX_BYTES // (1024 * 1024)} when not given" in " ".join(capsys.readouterr().out.split())
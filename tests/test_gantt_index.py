@@ -0,0 +1,35 @@
+import random
+
+from gantt_index import GanttLane
+from simulation import GanttChart
+
+
+def test_visible_finds_segments_after_a_longer_earlier_one():
+    # the SRTF segment of pid 1 spans the preemption by pid 2, whose segment ends first
+    lane = GanttLane([GanttChart(1, 0, 20, "SRTF"), GanttChart(2, 5, 8, "SRTF"), GanttChart(3, 9, 12, "SRTF")], 20)
+    first, last = lane.visible(10, 11)
+    assert {lane.pids[k] for k in range(first, last) if lane.ends[k] > 10} == {1, 3}
+
+
+def test_visible_covers_every_overlapping_segment():
+    rng = random.Random(3)
+    for _ in range(50):
+        segments = []
+        for pid in range(40):
+            start = rng.randint(0, 500)
+            segments.append(GanttChart(pid, start, start + rng.randint(1, 80), "FCFS"))
+        lane = GanttLane(segments, 600)
+        for _ in range(20):
+            start_time = rng.randint(0, 600)
+            end_time = start_time + rng.randint(1, 100)
+            first, last = lane.visible(start_time, end_time)
+            expected = {segment.pid for segment in segments if segment.start_time < end_time and
+                        segment.end_time > start_time}
+            assert expected <= {lane.pids[k] for k in range(first, last)}
+
+
+def test_busy_time_is_clamped_to_the_bucket():
+    lane = GanttLane([GanttChart(1, 0, 10, "RR2"), GanttChart(2, 2, 6, "RR2")], 10)
+    for level, busy in enumerate(lane.busy):
+        size = lane.bucket_size << level
+        assert all(time <= size for time in busy)
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from generator import Bimodal, Distribution, Exponential, Uniform, UniformArrivals, generate, parse_distribution
+
+SPECS = ["uniform:1:5", "uniform:0:3", "exponential:20", "pareto:1.5:5", "bimodal:5:200:0.1"]
+
+
+def columns(workload) -> tuple:
+    return tuple(list(column) for column in (workload.pids, workload.arrival_times, workload.offsets,
+                                             workload.bursts))
+
+
+def check_workload(workload, number_of_processes: int):
+    assert len(workload) == number_of_processes
+    assert list(workload.pids) == list(range(number_of_processes))
+    assert list(workload.arrival_times) == sorted(workload.arrival_times)
+    for i in range(number_of_processes):
+        bursts = workload.bursts[workload.offsets[i]:workload.offsets[i + 1]]
+        # cpu, io, ..., cpu
+        assert len(bursts) % 2 == 1
+        assert min(bursts) >= 1
+
+
+def test_distribution_subclasses_need_both_backends():
+    class FloatsOnly(Distribution):
+        def draw_floats(self, rng, count):
+            return [1.0] * count
+
+    with pytest.raises(TypeError):
+        Distribution()
+    with pytest.raises(TypeError):
+        FloatsOnly()
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_draw_gives_positive_integers(spec):
+    values = parse_distribution(spec).draw(random.Random(3), 500)
+    assert len(values) == 500
+    assert all(isinstance(value, int) and value >= 1 for value in values)
+
+
+def test_bimodal_mixes_its_modes():
+    values = Bimodal(Uniform(1, 1), Uniform(100, 100), 0.25).draw(random.Random(0), 2000)
+    assert set(values) == {1, 100}
+    assert 0.2 < values.count(100) / len(values) < 0.3
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_generate_is_seeded(spec):
+    workloads = [generate(100, seed, arrivals=UniformArrivals(500), cpu=parse_distribution(spec),
+                          io=Exponential(10), use_numpy=False) for seed in (4, 4, 5)]
+    check_workload(workloads[0], 100)
+    assert columns(workloads[0]) == columns(workloads[1])
+    assert columns(workloads[0]) != columns(workloads[2])
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_generate_with_numpy(spec):
+    numpy = pytest.importorskip("numpy")
+    rng = numpy.random.default_rng(1)
+    values = parse_distribution(spec).draw(rng, 500)
+    assert values.dtype == numpy.int64
+    assert values.min() >= 1
+    workloads = [generate(100, seed, arrivals=UniformArrivals(500), cpu_bursts_per_process=Uniform(1, 5),
+                          cpu=parse_distribution(spec), io=parse_distribution(spec), use_numpy=True)
+                 for seed in (4, 4)]
+    check_workload(workloads[0], 100)
+    assert columns(workloads[0]) == columns(workloads[1])
+    # offsets follow the drawn counts, their sum gives the number of cpu bursts
+    cpu_bursts = sum(workloads[0].number_of_cpu_bursts(i) for i in range(100))
+    assert workloads[0].offsets[-1] == 2 * cpu_bursts - 100
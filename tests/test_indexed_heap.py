@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from indexed_heap import IndexedHeap
+
+
+def check_invariants(heap: IndexedHeap):
+    entries = heap.heap
+    for position in range(1, len(entries)):
+        assert not heap.less(position, (position - 1) // 2)
+    assert len(heap.positions) == len(entries)
+    for pid, position in heap.positions.items():
+        assert entries[position][2] == pid
+
+
+def expected_order(keys: dict[int, tuple[int, int]]) -> list[int]:
+    # by key, then by push order
+    return sorted(keys, key=keys.__getitem__)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_operations_keep_the_heap_invariants(seed):
+    rng = random.Random(seed)
+    heap = IndexedHeap()
+    # pid -> (key, push order)
+    keys: dict[int, tuple[int, int]] = {}
+    pushes = 0
+    for _ in range(400):
+        operation = rng.random()
+        if operation < 0.4 or not keys:
+            pid = rng.randrange(1000)
+            if pid in keys:
+                with pytest.raises(KeyError):
+                    heap.push(pid, 0, pid)
+                continue
+            key = rng.randint(0, 20)
+            heap.push(pid, key, pid)
+            keys[pid] = (key, pushes)
+            pushes += 1
+        elif operation < 0.6:
+            pid = rng.choice(list(keys))
+            assert heap.remove(pid) == pid
+            del keys[pid]
+        elif operation < 0.85:
+            pid = rng.choice(list(keys))
+            key = rng.randint(0, 20)
+            heap.update(pid, key)
+            keys[pid] = (key, keys[pid][1])
+            assert heap.key(pid) == key
+        else:
+            pid = heap.pop()
+            assert pid == expected_order(keys)[0]
+            del keys[pid]
+        check_invariants(heap)
+        assert len(heap) == len(keys)
+        assert all(pid in heap for pid in keys)
+        assert list(heap.in_order()) == expected_order(keys)
+        assert heap.peek() == (expected_order(keys)[0] if keys else None)
+        if keys:
+            assert heap.key(heap.last()) == max(key for key, _ in keys.values())
+
+
+def test_equal_keys_come_out_in_push_order():
+    heap = IndexedHeap()
+    for pid in (5, 3, 9, 1):
+        heap.push(pid, 7, pid)
+    heap.update(3, 7)
+    assert [heap.pop() for _ in range(4)] == [5, 3, 9, 1]
+    assert heap.empty()
@@ -0,0 +1,60 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from event_log import LOG_ALL, LogEvent
+from generator import Uniform, UniformArrivals, generate
+from online import JsonLinesSink, ListSink, OnlineSimulator
+from simulation import GanttChart
+
+
+def test_json_lines_sink_writes_valid_json():
+    file = io.StringIO()
+    sink = JsonLinesSink(file)
+    sink.add_segment(GanttChart(1, 0, 4, 'R"R\\1'))
+    sink.add_event(LogEvent(3, 'F"CFS', 2, 0, -1))
+    sink.close()
+    segment, event = map(json.loads, file.getvalue().splitlines())
+    assert segment == {"type": "segment", "pid": 1, "start_time": 0, "end_time": 4, "algo": 'R"R\\1'}
+    assert event["algo"] == 'F"CFS' and event["time"] == 3 and event["pid"] == 2
+
+
+def test_json_lines_sink_of_a_simulation():
+    file = io.StringIO()
+    simulator = OnlineSimulator([(1, 0, [5, 3, 2]), (2, 1, [4])], 2, 4, 0.5, sink=JsonLinesSink(file),
+                                log_level=LOG_ALL)
+    simulator.run()
+    records = [json.loads(line) for line in file.getvalue().splitlines()]
+    assert {record["type"] for record in records} == {"segment", "event"}
+    assert sum(record["end_time"] - record["start_time"] for record in records if record["type"] == "segment") == 11
+
+
+def arrivals(seed: int) -> list[tuple[int, int, list[int]]]:
+    workload = generate(40, seed, arrivals=UniformArrivals(2000), cpu_bursts_per_process=Uniform(1, 4),
+                        cpu=Uniform(1, 120), io=Uniform(0, 30), use_numpy=False)
+    return [(process.pid, process.arrival_time, list(workload.bursts[workload.offsets[i]:workload.offsets[i + 1]]))
+            for i, process in enumerate(workload)]
+
+
+async def trickle(items):
+    for item in items:
+        await asyncio.sleep(0)
+        yield item
+
+
+@pytest.mark.parametrize("event_driven", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_run_async_logs_the_same_as_run(seed, event_driven):
+    # run_async stops at every arrival it hasn't read past, the steps it cuts short don't log twice
+    sinks = ListSink(), ListSink()
+    simulators = [OnlineSimulator(source, 2, 5, 0.5, event_driven=event_driven, sink=sink, log_level=LOG_ALL)
+                  for source, sink in zip((arrivals(seed), trickle(arrivals(seed))), sinks)]
+    simulators[0].run()
+    asyncio.run(simulators[1].run_async())
+    assert list(sinks[1].events) == list(sinks[0].events)
+    gantt_charts = [[(segment.pid, segment.start_time, segment.end_time, segment.algo) for segment in sink.gantt_chart]
+                    for sink in sinks]
+    assert gantt_charts[1] == gantt_charts[0]
+    assert simulators[1].current_time == simulators[0].current_time
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from event_log import LOG_OFF
+from queue_history import QueueHistory
+from simulation import Simulator
+from workload import Workload
+
+
+def random_workload(seed: int, n: int = 15) -> Workload:
+    rng = random.Random(seed)
+    workload = Workload()
+    for pid in range(n):
+        bursts = []
+        for k in range(rng.randint(1, 4)):
+            if k:
+                bursts.append(rng.randint(0, 30))
+            bursts.append(rng.randint(1, 40))
+        workload.append_bursts(pid, rng.randint(0, 150), bursts)
+    return workload.sorted_by_arrival()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_queues_at_is_the_same_for_every_checkpoint_interval(seed):
+    simulator = Simulator(random_workload(seed), 2, 5, 0.5, event_driven=True, log_level=LOG_OFF)
+    simulator.run()
+    records = simulator.queue_history.records
+    histories = [QueueHistory(interval) for interval in (0, 3, 7, 4096)]
+    for history in histories:
+        for k in range(0, len(records), 4):
+            history.record(*records[k:k + 4])
+    for time in range(simulator.current_time + 1):
+        expected = histories[0].queues_at(time)
+        assert all(history.queues_at(time) == expected for history in histories[1:])
+
+
+def test_queues_at_without_a_recorded_history():
+    workload = random_workload(0)
+    recorded = Simulator(workload, 2, 5, 0.5, event_driven=True, log_level=LOG_OFF)
+    recorded.run()
+    simulator = Simulator(workload, 2, 5, 0.5, event_driven=True, log_level=LOG_OFF, record_history=False)
+    simulator.run()
+    segments = [(segment.pid, segment.start_time, segment.end_time, segment.algo) for segment in simulator.gantt_chart]
+    assert segments == [(segment.pid, segment.start_time, segment.end_time, segment.algo)
+                        for segment in recorded.gantt_chart]
+    with pytest.raises(ValueError):
+        simulator.queues_at(0)
@@ -0,0 +1,164 @@
+import os
+
+import pytest
+
+from event_log import LOG_OFF
+from generator import Uniform, UniformArrivals, generate
+from prediction import ORDER_SJF
+from result_cache import RESULT_SUFFIX, ResultCache, result_key
+from simulation import Simulator
+from workload import Workload
+
+
+def small_workload(seed: int) -> Workload:
+    return generate(25, seed, arrivals=UniformArrivals(300), cpu_bursts_per_process=Uniform(1, 4),
+                    cpu=Uniform(1, 120), io=Uniform(0, 30), use_numpy=False)
+
+
+def copy_of(workload: Workload) -> Workload:
+    return Workload.from_processes(workload)
+
+
+def results(simulator) -> tuple:
+    gantt_chart = [(segment.pid, segment.start_time, segment.end_time, segment.algo)
+                   for segment in simulator.gantt_chart]
+    return (gantt_chart, list(simulator.start_time), list(simulator.complete_time), simulator.current_time,
+            simulator.cpu_utilization(), simulator.avg_waiting_time(), simulator.avg_turnaround_time(),
+            simulator.metrics.as_dict(simulator.current_time), list(simulator.logs.events))
+
+
+def cached_files(directory) -> list[str]:
+    return sorted(name for name in os.listdir(directory) if name.endswith(RESULT_SUFFIX))
+
+
+def test_cached_result_is_the_same_as_an_uncached_run(tmp_path):
+    workload = small_workload(0)
+    simulator = Simulator(workload, 4, 8, 0.5, event_driven=True)
+    simulator.run()
+    cache = ResultCache(str(tmp_path))
+    assert results(cache.run(workload, 4, 8, 0.5)) == results(simulator)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert results(cache.run(copy_of(workload), 4, 8, 0.5)) == results(simulator)
+    # a new cache only has the entry on disk
+    cache = ResultCache(str(tmp_path))
+    assert results(cache.run(copy_of(workload), 4, 8, 0.5)) == results(simulator)
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def rows(workload: Workload) -> list[tuple[int, int, list[int]]]:
+    bursts, offsets = workload.bursts, workload.offsets
+    return [(workload.pids[i], workload.arrival_times[i], list(bursts[offsets[i]:offsets[i + 1]]))
+            for i in range(len(workload))]
+
+
+def from_rows(rows) -> Workload:
+    workload = Workload()
+    for pid, arrival_time, bursts in rows:
+        workload.append_bursts(pid, arrival_time, bursts)
+    return workload
+
+
+def changed_workloads(workload: Workload):
+    original = rows(workload)
+    changes = [
+        lambda row: (row[0] + 1000, row[1], row[2]),
+        lambda row: (row[0], row[1] + 1, row[2]),
+        lambda row: (row[0], row[1], row[2][:-1] + [row[2][-1] + 1]),
+        lambda row: (row[0], row[1], row[2] + [1, 1]),
+        lambda row: (row[0], row[1], row[2] + [0]),
+    ]
+    for i, change in enumerate(changes):
+        changed = list(original)
+        changed[i] = change(changed[i])
+        yield from_rows(changed)
+    # the same processes in a different order, and one process less
+    yield from_rows(original[1:] + original[:1])
+    yield from_rows(original[:-1])
+    # the same bursts split between the processes in another way
+    yield from_rows([(1, 0, [5, 1, 5]), (2, 0, [5])])
+    yield from_rows([(1, 0, [5]), (2, 0, [1, 5, 5])])
+
+
+def test_any_workload_change_misses_the_cache():
+    workload = small_workload(1)
+    key = result_key(workload, 4, 8, 0.5)
+    assert result_key(from_rows(rows(workload)), 4, 8, 0.5) == key
+    keys = {key}
+    for changed in changed_workloads(workload):
+        changed_key = result_key(changed, 4, 8, 0.5)
+        assert changed_key not in keys
+        keys.add(changed_key)
+
+
+def test_any_parameter_change_misses_the_cache():
+    workload = small_workload(2)
+    parameters = [
+        dict(q1=4, q2=8, alpha=0.5),
+        dict(q1=5, q2=8, alpha=0.5),
+        dict(q1=4, q2=9, alpha=0.5),
+        dict(q1=4, q2=8, alpha=0.6),
+        dict(q1=4, q2=8, alpha=0.5, event_driven=False),
+        dict(q1=4, q2=8, alpha=0.5, log_level=LOG_OFF),
+        dict(q1=4, q2=8, alpha=0.5, queue3_order=ORDER_SJF),
+        dict(q1=4, q2=8, alpha=0.5, initial_prediction=7),
+        dict(q1=4, q2=8, alpha=0.5, max_time=1000),
+    ]
+    keys = [result_key(workload, **p) for p in parameters]
+    assert len(set(keys)) == len(keys)
+    cache = ResultCache()
+    for p in parameters[:-1]:
+        cache.run(workload, **p)
+    assert (cache.hits, cache.misses) == (0, len(parameters) - 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    workloads = [small_workload(seed) for seed in range(3)]
+    cache = ResultCache(str(tmp_path), memory_entries=0)
+    keys = [result_key(workload, 4, 8, 0.5) for workload in workloads]
+    for key, workload, time in zip(keys, workloads, (1, 2, 3)):
+        cache.run(workload, 4, 8, 0.5)
+        os.utime(cache.path(key), (time, time))
+    # reading the oldest entry makes the second the least recently used
+    assert cache.get(keys[0], workloads[0]) is not None
+    cache.max_bytes = sum(os.path.getsize(cache.path(key)) for key in keys) - 1
+    cache.evict()
+    assert cached_files(tmp_path) == sorted(keys[i] + RESULT_SUFFIX for i in (0, 2))
+    cache.max_bytes = 0
+    cache.evict()
+    assert cached_files(tmp_path) == []
+
+
+def test_damaged_entry_is_a_miss(tmp_path):
+    workload = small_workload(3)
+    ResultCache(str(tmp_path)).run(workload, 4, 8, 0.5)
+    [name] = cached_files(tmp_path)
+    (tmp_path / name).write_bytes(b"damaged")
+    cache = ResultCache(str(tmp_path))
+    result = cache.run(workload, 4, 8, 0.5)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert result.current_time > 0
+    assert cached_files(tmp_path) == [name]
+    # an entry of another workload with the same key is a miss too
+    cache = ResultCache(str(tmp_path))
+    assert cache.get(result_key(workload, 4, 8, 0.5), from_rows(rows(workload)[:5])) is None
+
+
+def test_unusable_directory_keeps_results_in_memory(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = ResultCache(str(blocker / "cache"))
+    assert cache.directory is None
+    workload = small_workload(0)
+    first = cache.run(workload, 4, 8, 0.5)
+    assert cache.run(workload, 4, 8, 0.5) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.parametrize("memory_entries", [0, 1])
+def test_memory_tier_keeps_recent_results(memory_entries):
+    cache = ResultCache(memory_entries=memory_entries)
+    workload = small_workload(0)
+    cache.run(workload, 4, 8, 0.5)
+    cache.run(workload, 4, 8, 0.5)
+    assert cache.hits == memory_entries
+    assert len(cache.memory) == memory_entries
@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from event_log import LOG_OFF
+from generator import Uniform, UniformArrivals, generate
+from online import OnlineSimulator
+from prediction import QUEUE3_ORDERS
+from process import Process
+from simulation import Simulator
+from workload import Workload
+from workload_io import read_workload
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_workload(processes) -> Workload:
+    workload = Workload()
+    for pid, arrival_time, bursts in processes:
+        workload.append_bursts(pid, arrival_time, bursts)
+    return workload
+
+
+def test_avg_waiting_time_leaves_out_processes_that_never_started():
+    # the last process arrives after max_time, it never starts
+    workload = make_workload([(1, 0, [30]), (2, 5, [10]), (3, 500, [10])])
+    simulator = Simulator(workload, 4, 8, 0.5, event_driven=True, log_level=LOG_OFF)
+    simulator.max_time = 100
+    simulator.run()
+    assert simulator.start_time[2] == -1
+    started = [i for i in range(2) if simulator.start_time[i] != -1]
+    assert started == [0, 1]
+    expected = round(sum(simulator.waiting_time(i) for i in started) / len(started), 1)
+    assert simulator.avg_waiting_time() == expected
+    assert simulator.avg_waiting_time() >= 0
+
+
+def test_avg_waiting_time_without_started_processes():
+    simulator = Simulator(make_workload([(1, 50, [10])]), 4, 8, 0.5, event_driven=True, log_level=LOG_OFF)
+    simulator.max_time = 10
+    simulator.run()
+    assert simulator.avg_waiting_time() == 0
+
+
+def test_workload_rejects_empty_cpu_bursts():
+    # a 0 unit burst coming back from io into round robin 2, SRTF or FCFS never finished
+    with pytest.raises(ValueError):
+        Workload().append(1, 0, [30, 0], [2])
+    with pytest.raises(ValueError):
+        Workload().append_bursts(1, 0, [30, 2, 0])
+    with pytest.raises(ValueError):
+        Simulator([Process(1, 0, 2, [2], [30, 0])], 1, 8, 0.5)
+    with pytest.raises(ValueError):
+        OnlineSimulator([(1, 0, [30, 2, 0])], 1, 8, 0.5).run()
+
+
+def results(simulator: Simulator) -> tuple:
+    gantt_chart = [(segment.pid, segment.start_time, segment.end_time, segment.algo)
+                   for segment in simulator.gantt_chart]
+    return (gantt_chart, list(simulator.start_time), list(simulator.complete_time), simulator.current_time,
+            simulator.cpu_utilization(), simulator.avg_waiting_time(), simulator.avg_turnaround_time(),
+            simulator.metrics.as_dict(simulator.current_time), simulator.predictor.stats.as_dict())
+
+
+def small_workload(seed: int) -> Workload:
+    return generate(25, seed, arrivals=UniformArrivals(300), cpu_bursts_per_process=Uniform(1, 4),
+                    cpu=Uniform(1, 120), io=Uniform(0, 30), use_numpy=False)
+
+
+@pytest.mark.parametrize("queue3_order", QUEUE3_ORDERS)
+@pytest.mark.parametrize("q1, q2", [(1, 2), (2, 3), (3, 5)])
+@pytest.mark.parametrize("seed", range(8))
+def test_event_driven_matches_tick_mode(seed, q1, q2, queue3_order):
+    workload = small_workload(seed)
+    runs = []
+    for event_driven in (False, True):
+        simulator = Simulator(workload, q1, q2, 0.5, event_driven=event_driven, log_level=LOG_OFF,
+                              queue3_order=queue3_order)
+        simulator.run()
+        runs.append(results(simulator))
+    assert runs[0] == runs[1]
+
+
+@pytest.mark.parametrize("file_name", ["processes.txt", "saved_processes.txt"])
+def test_event_driven_matches_tick_mode_on_the_shipped_workloads(file_name):
+    workload = read_workload(os.path.join(ROOT, file_name))
+    runs = []
+    for event_driven in (False, True):
+        simulator = Simulator(workload, 4, 8, 0.5, event_driven=event_driven, log_level=LOG_OFF)
+        simulator.run()
+        runs.append(results(simulator))
+    assert runs[0] == runs[1]
+
+
+def test_instrumented_context_switches_come_from_the_metrics():
+    simulator = Simulator(small_workload(0), 2, 3, 0.5, event_driven=True, log_level=LOG_OFF, instrument=True)
+    simulator.run()
+    stats = simulator.stats
+    assert stats.context_switches == simulator.metrics.context_switches > 0
+    assert stats.as_dict()["context_switches"] == simulator.metrics.context_switches
+    assert stats.dispatches == len(simulator.gantt_chart)
+    assert f"{simulator.metrics.context_switches} context switches" in stats.report()
@@ -0,0 +1,87 @@
+import pytest
+
+from workload import Workload
+from workload_io import HEADER, BinaryWorkloadWriter, TextWorkloadWriter, WorkloadFormatError, column_starts, \
+    read_workload
+
+# (pid, arrival time, bursts in file order), sorted by arrival time like read_workload returns them
+PROCESSES = [
+    (3, 0, [5]),
+    (1, 2, [4, 10, 6]),
+    # the last burst is io
+    (7, 2, [3, 8]),
+    (2, 9, [1, 0, 2, 12, 7, 4]),
+    (5, 15, [20, 3, 1, 6, 2, 9, 4, 0, 8]),
+]
+
+
+def make_workload(processes=PROCESSES) -> Workload:
+    workload = Workload()
+    for pid, arrival_time, bursts in processes:
+        workload.append_bursts(pid, arrival_time, bursts)
+    return workload
+
+
+def assert_same_columns(workload: Workload, expected: Workload):
+    assert list(workload.pids) == list(expected.pids)
+    assert list(workload.arrival_times) == list(expected.arrival_times)
+    assert list(workload.offsets) == list(expected.offsets)
+    assert list(workload.bursts) == list(expected.bursts)
+
+
+@pytest.mark.parametrize("buffer_lines", [0, 1, 2, 4096])
+def test_text_writer_round_trip(tmp_path, buffer_lines):
+    file_name = str(tmp_path / "workload.txt")
+    with TextWorkloadWriter(file_name, buffer_lines=buffer_lines) as writer:
+        for process in PROCESSES:
+            writer.write(*process)
+    assert_same_columns(read_workload(file_name), make_workload())
+
+
+@pytest.mark.parametrize("buffer_bursts", [0, 1, 2, 7, 1 << 16])
+def test_binary_writer_round_trip(tmp_path, buffer_bursts):
+    # buffers smaller than a process's bursts spill to the temporary file after every process
+    file_name = str(tmp_path / "workload.wkl")
+    with BinaryWorkloadWriter(file_name, buffer_bursts=buffer_bursts) as writer:
+        for process in PROCESSES:
+            writer.write(*process)
+            assert len(writer.bursts) < max(buffer_bursts, 1)
+    assert_same_columns(read_workload(file_name), make_workload())
+
+
+@pytest.mark.parametrize("writer_class", [TextWorkloadWriter, BinaryWorkloadWriter])
+def test_write_workload_round_trip(tmp_path, writer_class):
+    # whole workloads and single processes mixed in one file
+    file_name = str(tmp_path / "workload")
+    with writer_class(file_name) as writer:
+        writer.write_workload(make_workload(PROCESSES[:2]))
+        writer.write(*PROCESSES[2])
+        writer.write_workload(make_workload(PROCESSES[3:]))
+    assert_same_columns(read_workload(file_name), make_workload())
+
+
+def test_binary_columns_are_aligned(tmp_path):
+    # an odd number of processes needs padding after the int32 columns
+    file_name = str(tmp_path / "workload.wkl")
+    with BinaryWorkloadWriter(file_name) as writer:
+        for process in PROCESSES:
+            writer.write(*process)
+    with open(file_name, "rb") as f:
+        _, _, _, n, m = HEADER.unpack_from(f.read(HEADER.size))
+    assert n % 2 == 1
+    assert all(start % 8 == 0 for start in column_starts(n, m)[:4])
+    assert_same_columns(read_workload(file_name), make_workload())
+
+
+@pytest.mark.parametrize("line", ["1 0 0\n", "1 0 30 2 0\n", "1 0 5 0 0 4 3\n"])
+def test_rejects_empty_cpu_bursts(tmp_path, line):
+    file_name = tmp_path / "workload.txt"
+    file_name.write_text(line)
+    with pytest.raises(WorkloadFormatError, match="cpu bursts must be at least 1"):
+        read_workload(str(file_name))
+
+
+def test_accepts_empty_io_bursts(tmp_path):
+    file_name = tmp_path / "workload.txt"
+    file_name.write_text("1 0 5 0 3 0\n")
+    assert list(read_workload(str(file_name)).bursts) == [5, 0, 3, 0]
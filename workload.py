@@ -0,0 +1,114 @@
+from array import array
+from typing import Iterable, Iterator, Sequence, Union
+
+from process import Process
+
+
+def check_cpu_bursts(cpu_bursts: Sequence[int]):
+    # a cpu burst that takes no time would never finish in the round robin 2, SRTF and FCFS queues
+    if cpu_bursts and min(cpu_bursts) < 1:
+        raise ValueError("cpu bursts must be at least 1 time unit")
+
+
+class Workload:
+    # columnar storage of processes: pid and arrival time columns and one flat array with the bursts of
+    # all processes. The bursts of process i are bursts[offsets[i]:offsets[i + 1]] in the same order as
+    # the workload file: cpu, io, cpu, io, ... so even positions are cpu bursts and odd positions io bursts
+    def __init__(self):
+        self.pids = array("i")
+        self.arrival_times = array("i")
+        self.offsets = array("q", [0])
+        self.bursts = array("i")
+
+    @classmethod
+    def from_columns(cls, pids: Sequence[int], arrival_times: Sequence[int], offsets: Sequence[int],
+                     bursts: Sequence[int]) -> "Workload":
+        # columns can be arrays or read only memoryviews (a memory mapped file), a workload over
+        # memoryviews can't be appended to
+        workload = cls()
+        workload.pids = pids
+        workload.arrival_times = arrival_times
+        workload.offsets = offsets
+        workload.bursts = bursts
+        return workload
+
+    @classmethod
+    def from_processes(cls, processes: Iterable[Process]) -> "Workload":
+        workload = cls()
+        for process in processes:
+            workload.append(process.pid, process.arrival_time, process.cpu_burst_duration, process.io_burst_duration)
+        return workload
+
+    def append(self, pid: int, arrival_time: int, cpu_bursts: Sequence[int], io_bursts: Sequence[int]):
+        # can't be called while Process views of this workload are alive, they share the bursts buffer.
+        # io bursts after the last cpu burst are kept, missing io bursts between cpu bursts count as 0
+        check_cpu_bursts(cpu_bursts)
+        self.pids.append(pid)
+        self.arrival_times.append(arrival_time)
+        for k, cpu in enumerate(cpu_bursts):
+            if k > 0:
+                self.bursts.append(io_bursts[k - 1] if k - 1 < len(io_bursts) else 0)
+            self.bursts.append(cpu)
+        if cpu_bursts and len(io_bursts) >= len(cpu_bursts):
+            self.bursts.append(io_bursts[len(cpu_bursts) - 1])
+        self.offsets.append(len(self.bursts))
+
+    def append_bursts(self, pid: int, arrival_time: int, bursts: Sequence[int]):
+        # bursts in file order: cpu, io, cpu, io, ...
+        check_cpu_bursts(bursts[0::2])
+        self.pids.append(pid)
+        self.arrival_times.append(arrival_time)
+        self.bursts.extend(bursts)
+        self.offsets.append(len(self.bursts))
+
+    def __len__(self):
+        return len(self.pids)
+
+    def __getstate__(self):
+        # memoryview columns can't be pickled, they are sent as arrays
+        return {name: to_array(column) for name, column in self.__dict__.items()}
+
+    def __getitem__(self, i: int) -> Process:
+        # a lightweight Process whose bursts are read only views into this workload
+        if i < 0:
+            i += len(self)
+        bursts = memoryview(self.bursts).toreadonly()[self.offsets[i]:self.offsets[i + 1]]
+        return Process(self.pids[i], self.arrival_times[i], len(bursts[0::2]), bursts[1::2], bursts[0::2])
+
+    def __iter__(self) -> Iterator[Process]:
+        return (self[i] for i in range(len(self)))
+
+    def number_of_cpu_bursts(self, i: int) -> int:
+        return (self.offsets[i + 1] - self.offsets[i] + 1) // 2
+
+    def cpu_burst(self, i: int, k: int) -> int:
+        return self.bursts[self.offsets[i] + 2 * k]
+
+    def io_burst(self, i: int, k: int) -> int:
+        # 0 if the process has no such io burst
+        position = self.offsets[i] + 2 * k + 1
+        return self.bursts[position] if position < self.offsets[i + 1] else 0
+
+    def total_cpu_time(self, i: int) -> int:
+        return sum(self.bursts[self.offsets[i]:self.offsets[i + 1]:2])
+
+    def sorted_by_arrival(self) -> "Workload":
+        order = sorted(range(len(self)), key=self.arrival_times.__getitem__)
+        workload = Workload()
+        for i in order:
+            workload.append_bursts(self.pids[i], self.arrival_times[i], self.bursts[self.offsets[i]:self.offsets[i + 1]])
+        return workload
+
+
+def to_array(column: Union[array, memoryview]) -> array:
+    if isinstance(column, array):
+        return column
+    copy = array(column.format)
+    copy.frombytes(column.cast("B"))
+    return copy
+
+
+def as_workload(processes: Union[Workload, Iterable[Process]]) -> Workload:
+    if isinstance(processes, Workload):
+        return processes
+    return Workload.from_processes(processes)
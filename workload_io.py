@@ -0,0 +1,270 @@
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from typing import BinaryIO, Iterator, Sequence, Union
+
+from workload import Workload, to_array
+
+# text workloads: one process per line, whitespace separated pid, arrival time, then cpu, io, cpu, ...
+# bursts. Empty lines and lines starting with # are skipped.
+#
+# binary workloads: a little endian header and the four workload columns one after the other
+#   magic, version, reserved, number of processes n, number of bursts m   (32 bytes)
+#   pids int32[n], arrival times int32[n], offsets int64[n + 1], bursts int32[m]
+# the pids and arrival times are zero padded to a multiple of 8 bytes so every column starts 8 byte
+# aligned and can be used straight from a memory map
+MAGIC = b"MLFQWKLD"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+BINARY_SUFFIX = ".wkl"
+FORMAT_TEXT = "text"
+FORMAT_BINARY = "binary"
+COPY_BLOCK_SIZE = 1 << 20
+
+
+class WorkloadFormatError(ValueError):
+    def __init__(self, file_name: str, line_number: int, message: str):
+        # line_number is 0 for errors that aren't about a single line, like a bad binary header
+        location = f"{file_name}:{line_number}" if line_number else file_name
+        super().__init__(f"{location}: {message}")
+        self.file_name = file_name
+        self.line_number = line_number
+
+
+def iter_text_workload(file_name: str) -> Iterator[tuple[int, int, list[int]]]:
+    # (pid, arrival time, bursts) of every process in file order, read one line at a time
+    with open(file_name, "r") as f:
+        for line_number, line in enumerate(f, 1):
+            values = line.split()
+            if not values or values[0].startswith("#"):
+                continue
+            if len(values) < 3:
+                raise WorkloadFormatError(file_name, line_number,
+                                          "expected a pid, an arrival time and at least one cpu burst")
+            try:
+                values = list(map(int, values))
+            except ValueError as e:
+                raise WorkloadFormatError(file_name, line_number, str(e)) from None
+            if values[1] < 0 or min(values[2:]) < 0:
+                raise WorkloadFormatError(file_name, line_number, "arrival time and bursts can't be negative")
+            if min(values[2::2]) < 1:
+                raise WorkloadFormatError(file_name, line_number, "cpu bursts must be at least 1 time unit")
+            yield values[0], values[1], values[2:]
+
+
+def read_text_workload(file_name: str) -> Workload:
+    # processes are sorted by arrival time
+    workload = Workload()
+    for pid, arrival_time, bursts in iter_text_workload(file_name):
+        workload.append_bursts(pid, arrival_time, bursts)
+    return workload.sorted_by_arrival()
+
+
+def column(data: memoryview, start: int, typecode: str, count: int) -> Union[memoryview, array]:
+    # a view of count values at byte offset start, big endian machines get a byte swapped copy instead
+    view = data[start:start + count * array(typecode).itemsize].cast(typecode)
+    if sys.byteorder == "little":
+        return view
+    copy = to_array(view)
+    copy.byteswap()
+    return copy
+
+
+def aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def column_starts(n: int, m: int) -> tuple[int, int, int, int, int]:
+    # byte offsets of the pids, arrival times, offsets and bursts columns and the file size
+    int32_column = aligned(4 * n)
+    pids = HEADER.size
+    arrival_times = pids + int32_column
+    offsets = arrival_times + int32_column
+    bursts = offsets + 8 * (n + 1)
+    return pids, arrival_times, offsets, bursts, bursts + 4 * m
+
+
+def binary_columns(file_name: str) -> tuple[memoryview, memoryview, memoryview, memoryview]:
+    # pids, arrival times, offsets and bursts as read only views of the memory mapped file
+    with open(file_name, "rb") as f:
+        try:
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except ValueError:
+            raise WorkloadFormatError(file_name, 0, "empty file") from None
+    if len(data) < HEADER.size:
+        raise WorkloadFormatError(file_name, 0, "truncated header")
+    magic, version, _, n, m = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise WorkloadFormatError(file_name, 0, "not a binary workload")
+    if version != VERSION:
+        raise WorkloadFormatError(file_name, 0, f"unsupported version {version}")
+    pids_start, arrival_times_start, offsets_start, bursts_start, size = column_starts(n, m)
+    if len(data) != size:
+        raise WorkloadFormatError(file_name, 0, f"expected {n} processes and {m} bursts, file size doesn't match")
+    pids = column(data, pids_start, "i", n)
+    arrival_times = column(data, arrival_times_start, "i", n)
+    offsets = column(data, offsets_start, "q", n + 1)
+    bursts = column(data, bursts_start, "i", m)
+    if offsets[0] != 0 or offsets[n] != m:
+        raise WorkloadFormatError(file_name, 0, "offsets don't match the bursts")
+    return pids, arrival_times, offsets, bursts
+
+
+def read_binary_workload(file_name: str, copy: bool = False) -> Workload:
+    # without copy the workload reads straight from the memory mapped file and can't be appended to
+    columns = binary_columns(file_name)
+    if copy:
+        columns = map(to_array, columns)
+    return Workload.from_columns(*columns)
+
+
+def numpy_columns(file_name: str) -> tuple:
+    # the binary workload columns as numpy arrays sharing the memory map. numpy is imported here, it takes
+    # longer to import than most commands take to run
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("numpy is required for numpy_columns") from None
+    pids, arrival_times, offsets, bursts = binary_columns(file_name)
+    return (numpy.frombuffer(pids, dtype=numpy.int32), numpy.frombuffer(arrival_times, dtype=numpy.int32),
+            numpy.frombuffer(offsets, dtype=numpy.int64), numpy.frombuffer(bursts, dtype=numpy.int32))
+
+
+def is_binary_workload(file_name: str) -> bool:
+    with open(file_name, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_workload(file_name: str) -> Workload:
+    # text or binary workload, the format is detected from the file contents
+    if is_binary_workload(file_name):
+        return read_binary_workload(file_name)
+    return read_text_workload(file_name)
+
+
+class TextWorkloadWriter:
+    # writes processes one at a time, lines are collected and written to the file in blocks
+    def __init__(self, file_name: str, buffer_lines: int = 4096):
+        self.file = open(file_name, "w")
+        self.buffer_lines = buffer_lines
+        self.lines: list[str] = []
+
+    def __enter__(self) -> "TextWorkloadWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, pid: int, arrival_time: int, bursts: Sequence[int]):
+        # bursts in file order: cpu, io, cpu, io, ...
+        bursts = "\t".join(map(str, bursts))
+        self.lines.append(f"{pid}\t{arrival_time}\t{bursts}\n")
+        if len(self.lines) >= self.buffer_lines:
+            self.flush()
+
+    def write_workload(self, workload: Workload):
+        for i in range(len(workload)):
+            self.write(workload.pids[i], workload.arrival_times[i], workload.bursts[workload.offsets[i]:workload.offsets[i + 1]])
+
+    def flush(self):
+        self.file.write("".join(self.lines))
+        self.lines.clear()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+
+class BinaryWorkloadWriter:
+    # the header and the per process columns come before the bursts in the file, so bursts are streamed to
+    # a temporary file and copied after the columns on close. Only 16 bytes per process are kept in memory
+    def __init__(self, file_name: str, buffer_bursts: int = 1 << 16):
+        self.file_name = file_name
+        self.buffer_bursts = buffer_bursts
+        self.pids = array("i")
+        self.arrival_times = array("i")
+        self.offsets = array("q", [0])
+        self.bursts = array("i")
+        self.spill = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(file_name)))
+        self.closed = False
+
+    def __enter__(self) -> "BinaryWorkloadWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, pid: int, arrival_time: int, bursts: Sequence[int]):
+        self.pids.append(pid)
+        self.arrival_times.append(arrival_time)
+        self.bursts.extend(bursts)
+        self.offsets.append(self.offsets[-1] + len(bursts))
+        if len(self.bursts) >= self.buffer_bursts:
+            self.flush()
+
+    def write_workload(self, workload: Workload):
+        self.flush()
+        base = self.offsets[-1]
+        self.pids.extend(to_array(workload.pids))
+        self.arrival_times.extend(to_array(workload.arrival_times))
+        self.offsets.extend(base + offset for offset in workload.offsets[1:])
+        write_column(self.spill, workload.bursts, "i")
+
+    def flush(self):
+        write_column(self.spill, self.bursts, "i")
+        del self.bursts[:]
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        self.spill.seek(0)
+        with open(self.file_name, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, len(self.pids), self.offsets[-1]))
+            padding = bytes(aligned(4 * len(self.pids)) - 4 * len(self.pids))
+            write_column(f, self.pids, "i")
+            f.write(padding)
+            write_column(f, self.arrival_times, "i")
+            f.write(padding)
+            write_column(f, self.offsets, "q")
+            shutil.copyfileobj(self.spill, f, COPY_BLOCK_SIZE)
+        self.spill.close()
+
+
+def write_column(f: BinaryIO, values: Sequence[int], typecode: str):
+    values = to_array(values)
+    if sys.byteorder == "big":
+        values = array(typecode, values)
+        values.byteswap()
+    values.tofile(f)
+
+
+def workload_format(file_name: str) -> str:
+    return FORMAT_BINARY if file_name.endswith(BINARY_SUFFIX) else FORMAT_TEXT
+
+
+def workload_writer(file_name: str, file_format: str = None) -> Union[TextWorkloadWriter, BinaryWorkloadWriter]:
+    # without file_format the format is chosen by the file suffix, binary for .wkl files
+    file_format = file_format or workload_format(file_name)
+    if file_format == FORMAT_BINARY:
+        return BinaryWorkloadWriter(file_name)
+    if file_format == FORMAT_TEXT:
+        return TextWorkloadWriter(file_name)
+    raise ValueError(f"unknown workload format {file_format}")
+
+
+def write_workload(workload: Workload, file_name: str, file_format: str = None):
+    with workload_writer(file_name, file_format) as writer:
+        writer.write_workload(workload)
+
+
+def convert_workload(source: str, destination: str, file_format: str = None):
+    # text to binary or binary to text, by file_format or the destination suffix
+    write_workload(read_workload(source), destination, file_format)